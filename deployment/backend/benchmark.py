@@ -0,0 +1,592 @@
+"""
+API Benchmarks - Multi-Agent RCA System
+=======================================
+
+Load and latency benchmarks for the RCA API. Each benchmark is a subcommand;
+run against a live server, e.g.:
+
+    python benchmark.py equipment-latency --url http://localhost:8000
+
+Offline benchmarks (no server needed) import the backend modules directly:
+
+    python benchmark.py inference-backends
+    python benchmark.py ingest-allocations
+    python benchmark.py rca-scheduling
+
+Storage benchmarks write to a scratch database on a MongoDB server:
+
+    python benchmark.py sensor-storage --mongodb-uri mongodb://localhost:27017
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+import requests
+
+BASE_URL = "http://localhost:8000"
+
+SAMPLE_READING = {
+    "air_temperature": 298.1,
+    "process_temperature": 308.6,
+    "rotational_speed": 1551.0,
+    "torque": 42.8,
+    "tool_wear": 0.0,
+}
+
+
+def _percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    if not samples_ms:
+        return {"n": 0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples_ms)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2)
+
+    return {
+        "n": len(ordered),
+        "p50": round(statistics.median(ordered), 2),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": round(ordered[-1], 2),
+    }
+
+
+def _print_row(label: str, stats: Dict[str, float]):
+    print(f"   {label:<28} n={stats['n']:<5} p50={stats['p50']:>8.2f} ms  "
+          f"p95={stats['p95']:>8.2f} ms  p99={stats['p99']:>8.2f} ms  max={stats['max']:>8.2f} ms")
+
+
+def _time_get(session: requests.Session, url: str) -> float:
+    start = time.perf_counter()
+    session.get(url, timeout=30).raise_for_status()
+    return (time.perf_counter() - start) * 1000.0
+
+
+# ---------------------------------------------------------------------------
+# equipment-latency: /api/equipment p99 while ingest is saturated
+# ---------------------------------------------------------------------------
+
+def bench_equipment_latency(args):
+    """Measure /api/equipment latency idle, then while ingest is saturated."""
+    url = args.url.rstrip("/")
+    session = requests.Session()
+
+    def probe(seconds: float) -> List[float]:
+        samples = []
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            samples.append(_time_get(session, f"{url}/api/equipment"))
+            time.sleep(args.probe_interval)
+        return samples
+
+    print(f"Warming up ingest path at {url} ...")
+    requests.post(f"{url}/api/sensor/ingest", json=SAMPLE_READING, timeout=120)
+
+    print(f"Probing /api/equipment for {args.duration}s (idle) ...")
+    idle = probe(args.duration)
+
+    stop = threading.Event()
+    ingest_ms: List[float] = []
+    statuses: Dict[int, int] = {}
+    lock = threading.Lock()
+
+    def hammer(worker: int):
+        s = requests.Session()
+        i = 0
+        while not stop.is_set():
+            body = {**SAMPLE_READING, "machine_id": f"bench-{worker}",
+                    "rotational_speed": 1500.0 + (i % 50)}
+            start = time.perf_counter()
+            try:
+                code = s.post(f"{url}/api/sensor/ingest", json=body, timeout=60).status_code
+            except requests.RequestException:
+                code = -1
+            with lock:
+                statuses[code] = statuses.get(code, 0) + 1
+                ingest_ms.append((time.perf_counter() - start) * 1000.0)
+            i += 1
+
+    print(f"Saturating /api/sensor/ingest with {args.concurrency} clients ...")
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for w in range(args.concurrency):
+            pool.submit(hammer, w)
+        time.sleep(1.0)  # let the backlog build
+        print(f"Probing /api/equipment for {args.duration}s (ingest saturated) ...")
+        loaded = probe(args.duration)
+        stop.set()
+
+    print("\n/api/equipment latency")
+    _print_row("idle", _percentiles(idle))
+    _print_row("ingest saturated", _percentiles(loaded))
+    print("\n/api/sensor/ingest during load")
+    _print_row("all responses", _percentiles(ingest_ms))
+    print(f"   status codes: {dict(sorted(statuses.items()))}")
+
+
+# ---------------------------------------------------------------------------
+# dashboard-summary: in-memory counters vs the per-request query fan-out
+# ---------------------------------------------------------------------------
+
+def bench_dashboard_summary(args):
+    """Compare /api/dashboard/summary from counters with ?refresh=true (query fan-out)."""
+    url = args.url.rstrip("/")
+    variants = {
+        "in-memory counters": f"{url}/api/dashboard/summary",
+        "query fan-out": f"{url}/api/dashboard/summary?refresh=true",
+    }
+    requests.get(variants["in-memory counters"], timeout=30).raise_for_status()
+
+    print(f"{args.requests} requests per variant, {args.concurrency} concurrent clients")
+    for label, target in variants.items():
+        sessions = threading.local()
+
+        def one(_):
+            if not hasattr(sessions, "s"):
+                sessions.s = requests.Session()
+            return _time_get(sessions.s, target)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            samples = list(pool.map(one, range(args.requests)))
+        elapsed = time.perf_counter() - start
+        _print_row(label, _percentiles(samples))
+        print(f"   {'':<28} {args.requests / elapsed:.0f} req/s")
+
+
+# ---------------------------------------------------------------------------
+# inference-backends: Keras vs NumPy engine (cold start, RSS, batch latency)
+# ---------------------------------------------------------------------------
+
+def _probe_backend(args):
+    """(internal) Load one backend in a fresh process and print JSON stats."""
+    import resource
+
+    start = time.perf_counter()
+    os.environ["RCA_INFERENCE_BACKEND"] = args.backend
+    import numpy as np
+    from rca_api import _load_lstm_model
+    model = _load_lstm_model()
+    cold_start_ms = (time.perf_counter() - start) * 1000.0
+
+    rng = np.random.default_rng(0)
+    latency = {}
+    for n in args.batch_sizes:
+        x = rng.normal(size=(n, 10, 13)).astype(np.float32)
+        model.predict(x, batch_size=max(32, n), verbose=0)  # warm this shape
+        samples = []
+        for _ in range(args.repeats):
+            t = time.perf_counter()
+            model.predict(x, batch_size=max(32, n), verbose=0)
+            samples.append((time.perf_counter() - t) * 1000.0)
+        latency[str(n)] = _percentiles(samples)
+
+    print(json.dumps({
+        "backend": args.backend,
+        "cold_start_ms": round(cold_start_ms, 1),
+        # ru_maxrss is KiB on Linux
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0, 1),
+        "latency_ms": latency,
+    }))
+
+
+def bench_inference_backends(args):
+    """Compare Keras and NumPy LSTM engines: cold start, RSS, per-batch latency."""
+    results = []
+    for backend in args.backends:
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "_probe-backend", "--backend", backend,
+             "--repeats", str(args.repeats), "--batch-sizes", *map(str, args.batch_sizes)],
+            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        lines = [l for l in out.stdout.splitlines() if l.startswith("{")]
+        if out.returncode != 0 or not lines:
+            print(f"   {backend}: probe failed\n{out.stderr[-2000:]}")
+            continue
+        results.append(json.loads(lines[-1]))
+
+    print(f"\n   {'backend':<8} {'cold start':>12} {'max RSS':>10}")
+    for r in results:
+        print(f"   {r['backend']:<8} {r['cold_start_ms']:>9.0f} ms {r['max_rss_mb']:>7.0f} MB")
+    for r in results:
+        print(f"\n{r['backend']} — predict latency per batch")
+        for n, stats in r["latency_ms"].items():
+            _print_row(f"batch={n}", stats)
+
+
+# ---------------------------------------------------------------------------
+# ingest-allocations: post-inference work per ingest, dict sorting vs the array path
+# ---------------------------------------------------------------------------
+
+def _legacy_postprocess(scorer, feature_names, windows, x_hat):
+    """Reference for the replaced path: 13 dicts per reading, sorted, then compute()."""
+    import numpy as np
+    per_feature_error = np.mean((windows - x_hat) ** 2, axis=1)
+    reconstruction_errors = np.mean(per_feature_error, axis=1)
+    top_features = [
+        sorted(
+            [{'feature_name': feature_names[i], 'error': round(float(row[i]), 6)}
+             for i in range(len(feature_names))],
+            key=lambda x: x['error'],
+            reverse=True,
+        )[:5]
+        for row in per_feature_error
+    ]
+    scores = [scorer.compute(err, top) for err, top in zip(reconstruction_errors.tolist(), top_features)]
+    return top_features, scores
+
+
+def _per_row_postprocess(scorer, feature_names, windows, x_hat):
+    """Reference for the replaced small-batch path: a sorted index list and compute() per reading."""
+    import numpy as np
+    squared = windows - x_hat
+    np.square(squared, out=squared)
+    per_feature_error = np.mean(squared, axis=1)
+    reconstruction_errors = np.mean(per_feature_error, axis=1)
+    top_features, scores = [], []
+    columns = range(len(feature_names))
+    for row, recon in zip(per_feature_error.tolist(), reconstruction_errors.tolist()):
+        top = [{'feature_name': feature_names[j], 'error': round(row[j], 6)}
+               for j in sorted(columns, key=row.__getitem__, reverse=True)[:5]]
+        top_features.append(top)
+        scores.append(scorer.compute(recon, top))
+    return top_features, scores
+
+
+def _array_postprocess(spec, windows, x_hat, response: bool):
+    """Current path: `_score_reconstruction` arrays, plus the response dicts ingest builds."""
+    import rca_api
+    result = rca_api._score_reconstruction(spec, windows, x_hat)
+    if not response:
+        return result
+    scorer, _ = rca_api._get_scorer(spec)
+    _, top_columns, top_errors, scores = result
+    return ([rca_api._top_feature_list(spec.feature_names, columns, errors)
+             for columns, errors in zip(top_columns.tolist(), top_errors.tolist())],
+            [scorer.scores_dict(*row) for row in scores.tolist()])
+
+
+def _allocation_stats(fn, repeats: int, setup=lambda: None, kept: int = 100) -> Dict[str, float]:
+    """Allocations of `fn(setup())`; `setup` (e.g. a fresh predict output) runs untraced and untimed.
+
+    The result size is averaged over `kept` results held at once: one result
+    can fit in CPython's float/dict free lists and look free of charge.
+    """
+    fn(setup())  # warm caches (importance lookups, numpy dispatch)
+    arg = setup()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    result = fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result, arg
+
+    args = [setup() for _ in range(kept)]
+    results = [None] * kept
+    tracemalloc.start()
+    kept_base, _ = tracemalloc.get_traced_memory()
+    for i, arg in enumerate(args):
+        results[i] = fn(arg)
+    kept_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del args, results
+
+    samples = []
+    for _ in range(repeats):
+        arg = setup()
+        t = time.perf_counter()
+        fn(arg)
+        samples.append((time.perf_counter() - t) * 1e6)
+    return {
+        "peak_kb": (peak - base) / 1024.0,                         # working set incl. numpy temporaries
+        "result_kb": (kept_bytes - kept_base) / kept / 1024.0,    # what each call's result keeps alive
+        "p50_us": statistics.median(samples),
+    }
+
+
+def bench_ingest_allocations(args):
+    """Memory allocated and time spent turning reconstructions into ingest results."""
+    import numpy as np
+    from rca_api import model_registry, _get_scorer
+
+    rng = np.random.default_rng(0)
+    for domain in ("ai4i", "metropt"):
+        spec = model_registry.spec(domain)
+        scorer, _ = _get_scorer(spec)
+        print(f"\n{spec.key} ({spec.n_features} features) — per ingest call")
+        print(f"   {'path':<13} {'batch':>5} {'peak KB':>9} {'result KB':>10} {'p50 µs':>9} {'µs/reading':>11}")
+        for n in args.batch_sizes:
+            windows = rng.normal(size=(n, spec.window, spec.n_features)).astype(np.float32)
+            x_hat = (windows + rng.normal(scale=0.3, size=windows.shape)).astype(np.float32)
+            paths = {
+                "dicts":        lambda x: _legacy_postprocess(scorer, spec.feature_names, windows, x),
+                "per-row":      lambda x: _per_row_postprocess(scorer, spec.feature_names, windows, x),
+                "arrays":       lambda x: _array_postprocess(spec, windows, x, response=False),
+                "arrays+dicts": lambda x: _array_postprocess(spec, windows, x, response=True),
+            }
+            for name, fn in paths.items():
+                st = _allocation_stats(fn, args.repeats, setup=x_hat.copy)
+                print(f"   {name:<13} {n:>5} {st['peak_kb']:>9.1f} {st['result_kb']:>10.1f} "
+                      f"{st['p50_us']:>9.0f} {st['p50_us'] / n:>11.1f}")
+    print("\n   dicts:        F feature dicts per reading, sorted, then EnsembleScorer.compute (replaced);"
+          "\n   per-row:      top-5 of a sorted index list per reading, then compute (replaced; batches under 12);"
+          "\n   arrays:       _score_reconstruction, every batch size — what the inference step returns;"
+          "\n   arrays+dicts: arrays plus the 5 feature dicts and score dict per reading ingest responds with;"
+          "\n   result KB:    kept alive per call, averaged over 100 results held at once")
+
+
+# ---------------------------------------------------------------------------
+# sensor-storage: per-reading documents vs hourly buckets + rollups
+# ---------------------------------------------------------------------------
+
+def _synthetic_readings(days: float, interval_s: float, equipment_id: str):
+    """Scored AI4I-shaped reading documents, oldest first, ending now."""
+    import random
+    from datetime import datetime, timedelta, timezone
+    rnd = random.Random(0)
+    n = int(days * 86400 / interval_s)
+    start = datetime.now(timezone.utc) - timedelta(seconds=n * interval_s)
+    for i in range(n):
+        score = rnd.random() ** 4
+        yield {
+            "equipment_id": equipment_id,
+            "timestamp": start + timedelta(seconds=i * interval_s),
+            "model": "ai4i/best",
+            "air_temperature": rnd.gauss(300.0, 2.0),
+            "process_temperature": rnd.gauss(310.0, 1.5),
+            "rotational_speed": rnd.gauss(1540.0, 180.0),
+            "torque": rnd.gauss(40.0, 10.0),
+            "tool_wear": float(i % 250),
+            "reconstruction_error": rnd.expovariate(8.0),
+            "ensemble_score": round(score, 4),
+            "severity": "high" if score > 0.5 else "low",
+            "anomaly_detected": score > 0.5,
+        }
+
+
+async def _sensor_storage(args):
+    from datetime import datetime, timedelta, timezone
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pymongo import ASCENDING, DESCENDING, IndexModel
+    from timeseries import SensorTimeSeries
+
+    client = AsyncIOMotorClient(args.mongodb_uri)
+    db = client[args.database]
+    legacy = db["bench_sensor_readings"]
+    series = SensorTimeSeries(collections={t: f"bench_{c}" for t, c in
+                                           {"raw": "sensor_buckets", "1m": "sensor_rollups_1m",
+                                            "1h": "sensor_rollups_1h"}.items()})
+    names = [legacy.name, *series.collections.values()]
+    for name in names:
+        await db.drop_collection(name)
+    # Same indexes as db._create_indexes
+    await legacy.create_indexes([IndexModel([("timestamp", ASCENDING)]),
+                                 IndexModel([("equipment_id", ASCENDING)])])
+    await db[series.collections["raw"]].create_indexes([
+        IndexModel([("equipment_id", ASCENDING), ("bucket_start", ASCENDING)]),
+        IndexModel([("last_ts", DESCENDING)]), IndexModel([("bucket_start", ASCENDING)])])
+    for tier in ("1m", "1h"):
+        await db[series.collections[tier]].create_indexes([
+            IndexModel([("equipment_id", ASCENDING), ("ts", ASCENDING)], unique=True),
+            IndexModel([("ts", ASCENDING)])])
+
+    print(f"Writing {args.days:g} days at one reading per {args.interval:g}s ...")
+    batch = []
+    n = 0
+    for doc in _synthetic_readings(args.days, args.interval, "bench-eq"):
+        batch.append(doc)
+        if len(batch) == 500:
+            await legacy.insert_many([dict(d) for d in batch], ordered=False)
+            await series.write(db, batch)
+            n += len(batch)
+            batch = []
+    if batch:
+        await legacy.insert_many([dict(d) for d in batch], ordered=False)
+        await series.write(db, batch)
+        n += len(batch)
+
+    print(f"\n   {n} readings")
+    print(f"   {'collection':<28} {'docs':>8} {'data MB':>9} {'storage MB':>11} {'index MB':>9}")
+    for name in names:
+        st = await db.command("collStats", name)
+        print(f"   {name:<28} {st['count']:>8} {st['size'] / 1e6:>9.2f} "
+              f"{st.get('storageSize', 0) / 1e6:>11.2f} {st.get('totalIndexSize', 0) / 1e6:>9.2f}")
+
+    since = datetime.now(timezone.utc) - timedelta(days=args.days)
+    queries = {
+        "per-reading docs": lambda: legacy.find(
+            {"equipment_id": "bench-eq", "timestamp": {"$gte": since}}, {"_id": 0}
+        ).sort("timestamp", 1).to_list(length=10_000),   # the old endpoint's cap
+        f"tier {series.pick_tier(timedelta(days=args.days))} (auto)": lambda: series.history(
+            db, "bench-eq", since, series.pick_tier(timedelta(days=args.days))),
+    }
+    print(f"\n{args.days:g}-day history query for one machine")
+    for label, query in queries.items():
+        await query()   # warm the cache
+        samples = []
+        for _ in range(args.repeats):
+            t = time.perf_counter()
+            points = await query()
+            samples.append((time.perf_counter() - t) * 1000.0)
+        _print_row(f"{label} ({len(points)} pts)", _percentiles(samples))
+
+    if not args.keep:
+        for name in names:
+            await db.drop_collection(name)
+    client.close()
+
+
+def bench_sensor_storage(args):
+    """Storage, index size and history latency: per-reading docs vs buckets + rollups."""
+    import asyncio
+    asyncio.run(_sensor_storage(args))
+
+
+# ---------------------------------------------------------------------------
+# rca-scheduling: time to root cause per severity during a synthetic alert storm
+# ---------------------------------------------------------------------------
+
+# Severity mix of the storm and the ensemble-score band of each (see _classify_severity)
+_STORM_MIX = {"critical": (0.05, 0.8, 1.0), "high": (0.15, 0.6, 0.8),
+              "medium": (0.35, 0.4, 0.6), "low": (0.45, 0.2, 0.4)}
+
+
+async def _rca_storm(args, scheduler: str, scale: float) -> Dict[str, List]:
+    """Replay one storm through an RCAJobQueue; returns severity -> latencies (None = shed)."""
+    import asyncio
+    import random
+    import tempfile
+    from rca_jobs import DEFAULT_DEADLINES_S, RCAJobQueue, SQLiteJobStore
+
+    rnd = random.Random(args.seed)
+    arrived: Dict[str, float] = {}
+    severity_of: Dict[str, str] = {}
+    outcome: Dict[str, List] = {severity: [] for severity in _STORM_MIX}
+
+    async def run_workflow(job_id, payload):
+        await asyncio.sleep(args.service_ms / 1000.0)
+        outcome[severity_of[job_id]].append(time.perf_counter() - arrived[job_id])
+
+    def shed(job_id):
+        outcome[severity_of[job_id]].append(None)
+
+    options = dict(workers=args.workers, poll_interval_s=0.01, shed_backlog=args.shed_backlog,
+                   deadlines_s={sev: d * scale for sev, d in DEFAULT_DEADLINES_S.items()})
+    if scheduler == "fifo":
+        # Arrival order: every job looks the same and nothing is shed
+        options.update(shed_severities=(), reserved_workers=0)
+    with tempfile.TemporaryDirectory() as tmp:
+        queue = RCAJobQueue(run_workflow, on_shed=shed, **options)
+        await queue.start(SQLiteJobStore(os.path.join(tmp, "jobs.sqlite3")))
+        severities = list(_STORM_MIX)
+        weights = [mix[0] for mix in _STORM_MIX.values()]
+        for i in range(args.alerts):
+            await asyncio.sleep(rnd.expovariate(args.alerts / args.storm_s))
+            severity = rnd.choices(severities, weights)[0]
+            _, low, high = _STORM_MIX[severity]
+            score = rnd.uniform(low, high)
+            job_id = f"storm-{i}"
+            arrived[job_id], severity_of[job_id] = time.perf_counter(), severity
+            if scheduler == "fifo":
+                queue.admit(["medium"])
+                await queue.enqueue(job_id, {}, "medium", 0.0)
+            elif queue.admit([severity])[0]:
+                await queue.enqueue(job_id, {}, severity, score)
+            else:
+                shed(job_id)
+        while sum(len(v) for v in outcome.values()) < args.alerts:
+            await asyncio.sleep(0.05)
+        await queue.close()
+    return outcome
+
+
+def bench_rca_scheduling(args):
+    """Time to root cause per severity during an alert storm: arrival order vs severity scheduling."""
+    import asyncio
+    from rca_jobs import DEFAULT_DEADLINES_S
+
+    # The storm runs faster than real time: one workflow takes --service-ms
+    # instead of --workflow-s, and every time is scaled back when reported
+    scale = args.service_ms / 1000.0 / args.workflow_s
+    print(f"{args.alerts} alerts in {args.storm_s / scale / 60:.0f} min, {args.workers} workers, "
+          f"{args.workflow_s:g} s per RCA workflow (simulated {1 / scale:.0f}x faster)")
+    print(f"   {'scheduler':<10} {'severity':<9} {'alerts':>6} {'shed':>5} "
+          f"{'p50 min':>8} {'p95 min':>8} {'max min':>8} {'missed':>7}")
+    for scheduler in ("fifo", "priority"):
+        outcome = asyncio.run(_rca_storm(args, scheduler, scale))
+        for severity, results in outcome.items():
+            minutes = [r / scale / 60 for r in results if r is not None]
+            stats = _percentiles(minutes)
+            deadline = DEFAULT_DEADLINES_S[severity] / 60
+            missed = sum(m > deadline for m in minutes)
+            print(f"   {scheduler:<10} {severity:<9} {len(results):>6} {results.count(None):>5} "
+                  f"{stats['p50']:>8.1f} {stats['p95']:>8.1f} {stats['max']:>8.1f} {missed:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RCA API benchmarks")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    p = sub.add_parser("equipment-latency", help=bench_equipment_latency.__doc__)
+    p.add_argument("--url", default=BASE_URL)
+    p.add_argument("--duration", type=float, default=15.0, help="seconds per probe phase")
+    p.add_argument("--concurrency", type=int, default=32, help="concurrent ingest clients")
+    p.add_argument("--probe-interval", type=float, default=0.05)
+    p.set_defaults(func=bench_equipment_latency)
+
+    p = sub.add_parser("dashboard-summary", help=bench_dashboard_summary.__doc__)
+    p.add_argument("--url", default=BASE_URL)
+    p.add_argument("--requests", type=int, default=500, help="requests per variant")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.set_defaults(func=bench_dashboard_summary)
+
+    p = sub.add_parser("inference-backends", help=bench_inference_backends.__doc__)
+    p.add_argument("--backends", nargs="+", default=["keras", "numpy"])
+    p.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 32, 256])
+    p.add_argument("--repeats", type=int, default=50)
+    p.set_defaults(func=bench_inference_backends)
+
+    p = sub.add_parser("ingest-allocations", help=bench_ingest_allocations.__doc__)
+    p.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 4, 16, 64])
+    p.add_argument("--repeats", type=int, default=200)
+    p.set_defaults(func=bench_ingest_allocations)
+
+    p = sub.add_parser("sensor-storage", help=bench_sensor_storage.__doc__)
+    p.add_argument("--mongodb-uri", default=os.getenv("MONGODB_URI", "mongodb://localhost:27017"))
+    p.add_argument("--database", default="rca_benchmark", help="scratch database (collections are dropped)")
+    p.add_argument("--days", type=float, default=7.0)
+    p.add_argument("--interval", type=float, default=10.0, help="seconds between readings")
+    p.add_argument("--repeats", type=int, default=20)
+    p.add_argument("--keep", action="store_true", help="keep the benchmark collections")
+    p.set_defaults(func=bench_sensor_storage)
+
+    p = sub.add_parser("rca-scheduling", help=bench_rca_scheduling.__doc__)
+    p.add_argument("--alerts", type=int, default=300, help="anomalies in the storm")
+    p.add_argument("--storm-s", type=float, default=3.0, help="simulated seconds over which they arrive")
+    p.add_argument("--workers", type=int, default=2)
+    p.add_argument("--service-ms", type=float, default=100.0, help="simulated duration of one workflow")
+    p.add_argument("--workflow-s", type=float, default=180.0, help="real duration of one workflow")
+    p.add_argument("--shed-backlog", type=int, default=100)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=bench_rca_scheduling)
+
+    p = sub.add_parser("_probe-backend")
+    p.add_argument("--backend", required=True)
+    p.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 32, 256])
+    p.add_argument("--repeats", type=int, default=50)
+    p.set_defaults(func=_probe_backend)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+"""Incrementally maintained counters behind /api/dashboard/summary.
+
+The summary used to cost an equipment scan plus four count queries per page
+load, and wallboards reload it every few seconds. DashboardCounters keeps the
+numbers in memory instead and is told about every change as it happens:
+
+  - alerts created by ingest, acknowledged or deleted (active / critical)
+  - anomalous readings, kept per minute so the 24-hour window slides
+  - maintenance tasks created or moved between statuses (open tasks)
+
+Equipment totals come from the equipment state table, which keeps its own
+counts. Changes made outside this process (or missed, e.g. a failed write)
+are corrected by a periodic reconcile that re-runs the count queries and
+replaces the counters. The queries see every event recorded before they
+start (the reconcile function flushes the write buffer first); events
+recorded after that are applied again on top of the fresh counts, so the
+swap neither loses them nor counts them twice.
+
+Configuration (environment):
+  - RCA_SUMMARY_RECONCILE_S : seconds between reconciles against MongoDB (default 60)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OPEN_TASK_STATUSES = ("open", "in_progress")
+
+
+def _minute(ts: datetime) -> int:
+    if ts.tzinfo is None:   # Motor returns naive UTC datetimes
+        ts = ts.replace(tzinfo=timezone.utc)
+    return int(ts.timestamp() // 60)
+
+
+class DashboardCounters:
+    """Alert, anomaly and task counters for the dashboard summary.
+
+    `reconcile_fn(fence)` returns fresh counts from MongoDB: `active_alerts`,
+    `critical_alerts`, `open_tasks` and `anomaly_minutes`, a list of
+    (minute timestamp, anomalies) pairs covering the window. It calls
+    `fence()` just before its first count query, once every event recorded
+    so far is visible in MongoDB.
+    """
+
+    def __init__(self, reconcile_fn: Callable[[Callable[[], None]], Awaitable[Dict[str, Any]]],
+                 window_hours: float = 24.0, reconcile_interval_s: float = 60.0):
+        self.reconcile_fn = reconcile_fn
+        self.window_minutes = int(float(window_hours) * 60)
+        self.reconcile_interval = max(1.0, float(reconcile_interval_s))
+
+        self._lock = threading.Lock()
+        self._active_alerts = 0
+        self._critical_alerts = 0
+        self._open_tasks = 0
+        self._anomaly_minutes: Deque[List[int]] = deque()   # [minute, count], oldest first
+        self._anomalies = 0
+        self._reconciled_at: Optional[float] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reconciles = 0
+        self._drift: Dict[str, int] = {}
+        # One event log per reconcile in progress, replayed onto its fresh counts
+        self._journals: List[List[Tuple[Callable[..., None], tuple]]] = []
+
+    @classmethod
+    def from_env(cls, reconcile_fn: Callable[[Callable[[], None]], Awaitable[Dict[str, Any]]]
+                 ) -> "DashboardCounters":
+        return cls(
+            reconcile_fn,
+            reconcile_interval_s=float(os.getenv("RCA_SUMMARY_RECONCILE_S", "60")),
+        )
+
+    # ------------------------------------------------------------------
+    # Events
+    # ------------------------------------------------------------------
+
+    def alerts_created(self, severities: Iterable[str]) -> None:
+        """New unacknowledged alerts, one severity per alert."""
+        self._event(self._alerts_created, tuple(severities))
+
+    def alert_closed(self, severity: Optional[str]) -> None:
+        """An unacknowledged alert was acknowledged or deleted."""
+        self._event(self._alert_closed, severity)
+
+    def anomalies_detected(self, n: int, ts: datetime) -> None:
+        """`n` anomalous readings taken at `ts` (backfilled uploads may be older than the last)."""
+        if n > 0:
+            self._event(self._anomalies_detected, n, ts)
+
+    def task_status_changed(self, old: Optional[str], new: Optional[str]) -> None:
+        """A task moved from `old` to `new` status (None: did not exist / deleted)."""
+        delta = (new in OPEN_TASK_STATUSES) - (old in OPEN_TASK_STATUSES)
+        if delta:
+            self._event(self._open_tasks_changed, delta)
+
+    def _event(self, apply: Callable[..., None], *args: Any) -> None:
+        with self._lock:
+            apply(*args)
+            for journal in self._journals:
+                journal.append((apply, args))
+
+    # Event handlers; the caller holds self._lock
+
+    def _alerts_created(self, severities: Tuple[str, ...]) -> None:
+        for severity in severities:
+            self._active_alerts += 1
+            if severity == "critical":
+                self._critical_alerts += 1
+
+    def _alert_closed(self, severity: Optional[str]) -> None:
+        self._active_alerts = max(0, self._active_alerts - 1)
+        if severity == "critical":
+            self._critical_alerts = max(0, self._critical_alerts - 1)
+
+    def _anomalies_detected(self, n: int, ts: datetime) -> None:
+        minute = _minute(ts)
+        if minute < int(time.time() // 60) - self.window_minutes:
+            return   # already outside the window
+        minutes = self._anomaly_minutes
+        idx = len(minutes)
+        while idx and minutes[idx - 1][0] > minute:
+            idx -= 1
+        if idx and minutes[idx - 1][0] == minute:
+            minutes[idx - 1][1] += n
+        else:
+            minutes.insert(idx, [minute, n])
+        self._anomalies += n
+
+    def _open_tasks_changed(self, delta: int) -> None:
+        self._open_tasks = max(0, self._open_tasks + delta)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @property
+    def reconciled(self) -> bool:
+        return self._reconciled_at is not None
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            self._expire(int(time.time() // 60))
+            return {
+                "active_alerts":   self._active_alerts,
+                "critical_alerts": self._critical_alerts,
+                "anomalies":       self._anomalies,
+                "open_tasks":      self._open_tasks,
+            }
+
+    # ------------------------------------------------------------------
+    # Reconcile
+    # ------------------------------------------------------------------
+
+    async def reconcile(self) -> Dict[str, Any]:
+        """Replace the counters with fresh counts from MongoDB; returns those counts.
+
+        Events recorded after `reconcile_fn` calls its fence are applied
+        again on top of the fresh counts; earlier ones are taken as counted.
+        An event whose write lands just before a query but which is only
+        recorded once the query has started is counted twice until the
+        next reconcile, rather than lost.
+        """
+        journal: List[Tuple[Callable[..., None], tuple]] = []
+
+        def fence() -> None:
+            # The queries are about to start: what was journalled so far is in MongoDB
+            with self._lock:
+                journal.clear()
+
+        with self._lock:
+            self._journals.append(journal)
+        try:
+            counts = await self.reconcile_fn(fence)
+        except BaseException:
+            with self._lock:
+                self._journals.remove(journal)
+            raise
+        with self._lock:
+            self._journals.remove(journal)
+            before = {
+                "active_alerts":   self._active_alerts,
+                "critical_alerts": self._critical_alerts,
+                "open_tasks":      self._open_tasks,
+                "anomalies":       self._anomalies,
+            }
+            self._active_alerts = counts["active_alerts"]
+            self._critical_alerts = counts["critical_alerts"]
+            self._open_tasks = counts["open_tasks"]
+            self._anomaly_minutes = deque(
+                [_minute(ts), n] for ts, n in sorted(counts["anomaly_minutes"]) if n
+            )
+            self._anomalies = sum(n for _, n in self._anomaly_minutes)
+            for apply, args in journal:
+                apply(*args)
+            self._expire(int(time.time() // 60))
+            after = {
+                "active_alerts":   self._active_alerts,
+                "critical_alerts": self._critical_alerts,
+                "open_tasks":      self._open_tasks,
+                "anomalies":       self._anomalies,
+            }
+            self._drift = {k: before[k] - after[k] for k in after} if self.reconciled else {}
+            self._reconciled_at = time.time()
+            self._reconciles += 1
+        self._ensure_worker()
+        return counts
+
+    async def ensure_reconciled(self) -> None:
+        if not self.reconciled:
+            await self.reconcile()
+
+    async def close(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._worker = None
+        self._loop = None
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "reconcile_interval_s": self.reconcile_interval,
+                "reconciles":           self._reconciles,
+                "reconciled_age_s":     (round(time.time() - self._reconciled_at, 1)
+                                         if self._reconciled_at else None),
+                # counter minus fresh count at the last reconcile (0 = no drift)
+                "last_drift":           dict(self._drift),
+                "anomaly_minutes":      len(self._anomaly_minutes),
+            }
+
+    def _expire(self, now_minute: int) -> None:
+        # Caller holds self._lock. Drops minutes that left the window.
+        oldest = now_minute - self.window_minutes
+        while self._anomaly_minutes and self._anomaly_minutes[0][0] < oldest:
+            self._anomalies -= self._anomaly_minutes.popleft()[1]
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and self._loop is loop and not self._worker.done():
+            return
+        # First use, or the previous loop went away (e.g. test clients)
+        self._loop = loop
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile()
+            except Exception as exc:   # keep serving the last counters
+                logger.warning("Dashboard summary reconcile failed: %s", exc)
@@ -2,9 +2,13 @@
 
 Collections:
   - equipment        : equipment registry (eq-001 … eq-004 seeded at startup)
-  - sensor_readings  : per-reading documents; TTL index expires after 24 hours
+  - sensor_readings  : legacy per-reading documents (no longer written); TTL 24 hours
+  - sensor_buckets   : readings bucketed per equipment and hour; TTL 24 hours
+  - sensor_rollups_1m: per-minute min/max/mean rollups; TTL 14 days
+  - sensor_rollups_1h: per-hour min/max/mean rollups; TTL 400 days
   - alerts           : anomaly alerts generated from sensor ingest
   - rca_results      : completed RCA workflow results
+  - rca_jobs         : RCA job queue when RCA_JOB_STORE=mongo (see rca_jobs.py)
   - maintenance_tasks: open maintenance tasks derived from recommendations
   - maintenance_history: closed/completed maintenance records
 """
@@ -75,23 +79,50 @@ async def close_db() -> None:
 # ---------------------------------------------------------------------------
 
 async def _create_indexes(db: AsyncIOMotorDatabase) -> None:
-    # sensor_readings – TTL 24 hours
+    # sensor_readings – TTL 24 hours (legacy; drains as old readings expire)
     await db.sensor_readings.create_indexes([
         IndexModel([("timestamp", ASCENDING)], expireAfterSeconds=86_400, name="ttl_24h"),
         IndexModel([("equipment_id", ASCENDING)], name="idx_sr_equipment"),
     ])
 
+    # sensor time series (see timeseries.py) – an hour bucket expires 25 h
+    # after it starts, so every reading in it is kept for at least 24 hours
+    await db.sensor_buckets.create_indexes([
+        IndexModel([("equipment_id", ASCENDING), ("bucket_start", ASCENDING)], name="idx_sb_eq_start"),
+        IndexModel([("last_ts", DESCENDING)], name="idx_sb_last"),
+        IndexModel([("bucket_start", ASCENDING)], expireAfterSeconds=90_000, name="ttl_sb_25h"),
+        # a replayed write-behind batch must not land in a second bucket
+        IndexModel([("batches", ASCENDING)], unique=True, sparse=True, name="idx_sb_batches"),
+    ])
+    await db.sensor_rollups_1m.create_indexes([
+        IndexModel([("equipment_id", ASCENDING), ("ts", ASCENDING)], unique=True, name="idx_r1m_eq_ts"),
+        IndexModel([("ts", ASCENDING)], expireAfterSeconds=14 * 86_400, name="ttl_r1m_14d"),
+    ])
+    await db.sensor_rollups_1h.create_indexes([
+        IndexModel([("equipment_id", ASCENDING), ("ts", ASCENDING)], unique=True, name="idx_r1h_eq_ts"),
+        IndexModel([("ts", ASCENDING)], expireAfterSeconds=400 * 86_400, name="ttl_r1h_400d"),
+    ])
+
     # equipment
     await db.equipment.create_indexes([
         IndexModel([("equipment_id", ASCENDING)], unique=True, name="idx_eq_id"),
         IndexModel([("status", ASCENDING)], name="idx_eq_status"),
     ])
 
+    # Paged lists sort on (field, _id) – see pagination.py. Each filter the
+    # endpoint accepts gets a compound index ending in the same keys, so any
+    # page is one index seek.
+
     # alerts
     await db.alerts.create_indexes([
         IndexModel([("equipment_id", ASCENDING)], name="idx_al_equipment"),
         IndexModel([("timestamp", DESCENDING)], name="idx_al_time"),
         IndexModel([("acknowledged", ASCENDING)], name="idx_al_ack"),
+        IndexModel([("timestamp", DESCENDING), ("_id", DESCENDING)], name="idx_al_page"),
+        IndexModel([("equipment_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+                   name="idx_al_eq_page"),
+        IndexModel([("acknowledged", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+                   name="idx_al_ack_page"),
     ])
 
     # rca_results
@@ -99,6 +130,22 @@ async def _create_indexes(db: AsyncIOMotorDatabase) -> None:
         IndexModel([("workflow_id", ASCENDING)], unique=True, name="idx_rca_wf"),
         IndexModel([("equipment_id", ASCENDING)], name="idx_rca_equipment"),
         IndexModel([("created_at", DESCENDING)], name="idx_rca_time"),
+        IndexModel([("status", ASCENDING), ("completed_at", DESCENDING), ("_id", DESCENDING)],
+                   name="idx_rca_page"),
+        IndexModel([("equipment_id", ASCENDING), ("status", ASCENDING),
+                    ("completed_at", DESCENDING), ("_id", DESCENDING)], name="idx_rca_eq_page"),
+    ])
+
+    # rca_jobs – claims take the most urgent due queued job (or a lapsed
+    # lease); completed and shed jobs expire after 7 days
+    await db.rca_jobs.create_indexes([
+        IndexModel([("job_id", ASCENDING)], unique=True, name="idx_job_id"),
+        IndexModel([("status", ASCENDING), ("priority", ASCENDING), ("available_at", ASCENDING)],
+                   name="idx_job_next"),
+        IndexModel([("status", ASCENDING), ("severity", ASCENDING), ("deadline_at", ASCENDING)],
+                   name="idx_job_deadline"),
+        IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="idx_job_lease"),
+        IndexModel([("finished_at", ASCENDING)], expireAfterSeconds=7 * 86_400, name="ttl_job_7d"),
     ])
 
     # maintenance_tasks
@@ -106,12 +153,20 @@ async def _create_indexes(db: AsyncIOMotorDatabase) -> None:
         IndexModel([("equipment_id", ASCENDING)], name="idx_mt_equipment"),
         IndexModel([("status", ASCENDING)], name="idx_mt_status"),
         IndexModel([("due_date", ASCENDING)], name="idx_mt_due"),
+        IndexModel([("due_date", ASCENDING), ("_id", ASCENDING)], name="idx_mt_page"),
+        IndexModel([("equipment_id", ASCENDING), ("due_date", ASCENDING), ("_id", ASCENDING)],
+                   name="idx_mt_eq_page"),
+        IndexModel([("status", ASCENDING), ("due_date", ASCENDING), ("_id", ASCENDING)],
+                   name="idx_mt_status_page"),
     ])
 
     # maintenance_history
     await db.maintenance_history.create_indexes([
         IndexModel([("equipment_id", ASCENDING)], name="idx_mh_equipment"),
         IndexModel([("completed_at", DESCENDING)], name="idx_mh_time"),
+        IndexModel([("completed_at", DESCENDING), ("_id", DESCENDING)], name="idx_mh_page"),
+        IndexModel([("equipment_id", ASCENDING), ("completed_at", DESCENDING), ("_id", DESCENDING)],
+                   name="idx_mh_eq_page"),
     ])
 
     # settings (cost config, etc.)
@@ -0,0 +1,161 @@
+"""Per-machine deadband (change suppression) for near-identical sensor readings.
+
+Many machines report readings that barely move between samples. When every
+raw sensor field of a new reading is within a configured tolerance of the
+machine's last scored reading, and that reading was not anomalous, ingest
+reuses the last score instead of running the LSTM, ensemble scoring and a
+MongoDB write.
+
+Suppressed readings are coalesced: they are not written individually, and the
+next reading that is scored in full records how many readings it stands for
+(`coalesced_readings`, a count for history only). Each suppressed reading
+still decays its machine's health as it arrives, with the reused score — the
+reference's `result`. After `max_coalesce` suppressed readings in a row the
+band expires, so a steady machine is still re-scored and written at a reduced rate.
+Readings are compared only against results that have already been scored, so
+a reading is never suppressed by another reading of the same batch.
+
+`check` does not change any state. Ingest calls `reuse` and `record` only
+once a request has passed every admission check, so a request refused with a
+503 and retried is not counted twice.
+
+Configuration (environment):
+  - RCA_DEADBAND_ENABLED      : "1" turns suppression on (default off)
+  - RCA_DEADBAND_TOLERANCES   : per-field absolute tolerances, e.g.
+                                "torque=0.5,rotational_speed=5"; unspecified fields
+                                use DEFAULT_TOLERANCES
+  - RCA_DEADBAND_MAX_COALESCE : max readings folded into one written reading (default 60)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Absolute tolerances in sensor units, in SensorReading field order
+DEFAULT_TOLERANCES: Dict[str, float] = {
+    "air_temperature":     0.05,   # K
+    "process_temperature": 0.05,   # K
+    "rotational_speed":    2.0,    # rpm
+    "torque":              0.2,    # Nm
+    "tool_wear":           0.0,    # min — any wear increment is re-scored
+}
+
+
+def _parse_tolerances(spec: str) -> Dict[str, float]:
+    tolerances = dict(DEFAULT_TOLERANCES)
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in tolerances:
+            raise ValueError(f"Unknown deadband field: {name!r}")
+        tolerances[name] = float(value)
+    return tolerances
+
+
+class DeadbandReference:
+    """Last fully scored reading of a machine and how many readings reused it."""
+
+    __slots__ = ("values", "result", "suppressed")
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        self.result: Optional[Dict[str, Any]] = None
+        self.suppressed = 0
+
+
+class DeadbandFilter:
+    """Decides per reading whether the machine's previous result can be reused."""
+
+    def __init__(self, fields: Sequence[str], tolerances: Optional[Dict[str, float]] = None,
+                 enabled: bool = False, max_coalesce: int = 60, max_machines: int = 5000):
+        tolerances = tolerances or DEFAULT_TOLERANCES
+        self.fields = tuple(fields)
+        self.tolerances = np.array([tolerances[f] for f in self.fields], dtype=np.float64)
+        self.enabled = enabled
+        self.max_coalesce = max(1, int(max_coalesce))
+        self.max_machines = max(1, int(max_machines))
+        self._refs: "OrderedDict[str, DeadbandReference]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._checked = 0
+        self._suppressed = 0
+
+    @classmethod
+    def from_env(cls, fields: Sequence[str]) -> "DeadbandFilter":
+        return cls(
+            fields,
+            tolerances=_parse_tolerances(os.getenv("RCA_DEADBAND_TOLERANCES", "")),
+            enabled=os.getenv("RCA_DEADBAND_ENABLED", "0") == "1",
+            max_coalesce=int(os.getenv("RCA_DEADBAND_MAX_COALESCE", "60")),
+        )
+
+    def check(self, machine_ids: Sequence[str], rows: np.ndarray) -> List[Optional[Dict[str, Any]]]:
+        """Per reading, the result to reuse if its values fall inside the machine's band, else None.
+
+        Readings of one machine in the same call share its `max_coalesce`
+        budget. Nothing is counted against the band until `reuse`.
+        """
+        if not self.enabled:
+            return [None] * len(rows)
+        reused: List[Optional[Dict[str, Any]]] = []
+        pending: Dict[str, int] = {}
+        with self._lock:
+            for machine_id, values in zip(machine_ids, rows):
+                self._checked += 1
+                ref = self._refs.get(machine_id)
+                if (
+                    ref is None
+                    or ref.result is None
+                    or ref.result["anomaly_detected"]   # anomalies are always re-scored
+                    or ref.suppressed + pending.get(machine_id, 0) >= self.max_coalesce
+                    or not np.all(np.abs(values - ref.values) <= self.tolerances)
+                ):
+                    reused.append(None)
+                    continue
+                pending[machine_id] = pending.get(machine_id, 0) + 1
+                reused.append(ref.result)
+        return reused
+
+    def reuse(self, machine_id: str) -> None:
+        """Count an accepted reading that reused the machine's result (see `check`)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            ref = self._refs.get(machine_id)
+            if ref is not None:
+                ref.suppressed += 1
+                self._refs.move_to_end(machine_id)
+            self._suppressed += 1
+
+    def record(self, machine_id: str, values: np.ndarray, result: Dict[str, Any]) -> int:
+        """Make a fully scored reading the machine's new reference.
+
+        Returns how many suppressed readings the previous reference absorbed,
+        so the caller can record them against this written reading.
+        """
+        if not self.enabled:
+            return 0
+        with self._lock:
+            previous = self._refs.pop(machine_id, None)
+            ref = DeadbandReference(np.array(values, dtype=np.float64))
+            ref.result = result
+            self._refs[machine_id] = ref
+            while len(self._refs) > self.max_machines:
+                self._refs.popitem(last=False)
+            return previous.suppressed if previous is not None else 0
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled":           self.enabled,
+                "tolerances":        dict(zip(self.fields, self.tolerances.tolist())),
+                "max_coalesce":      self.max_coalesce,
+                "machines":          len(self._refs),
+                "checked":           self._checked,
+                "suppressed":        self._suppressed,
+                "suppression_ratio": round(self._suppressed / self._checked, 4) if self._checked else 0.0,
+            }
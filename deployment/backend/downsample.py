@@ -0,0 +1,99 @@
+"""Largest-Triangle-Three-Buckets downsampling for sensor history charts.
+
+A chart ~800 pixels wide gains nothing from 10,000 points, but the API used to
+ship them all and the browser had to lay every one out. `downsample_points`
+reduces a history to at most `max_points` points before serialisation while
+keeping the visual shape of each series:
+
+  - LTTB (Steinarsson, 2013) splits a series into equal buckets and keeps, per
+    bucket, the point forming the largest triangle with the point kept in the
+    previous bucket and the mean of the next bucket — peaks and troughs
+    survive, flat runs collapse.
+  - History points are records carrying several series (air_temperature,
+    torque, ...). Each numeric series gets an equal share of `max_points`, and
+    a point is kept if any series picked it; every series is then drawn from
+    at least its own LTTB selection.
+  - Anomalous points (`anomaly_detected`, or rollups with `anomalies`) and the
+    first and last points are always kept, on top of `max_points`.
+
+Bucket means, areas and the per-bucket argmax are NumPy array operations; only
+the walk from one bucket's chosen point to the next is a Python loop, one step
+per output point.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+
+# Numeric fields of history points that are not sensor series
+_NON_SERIES = frozenset({"count", "anomalies", "coalesced_readings"})
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """Indices of the `n_out` points LTTB keeps from (x, y); x must be sorted."""
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1][:max(n_out, 0)], dtype=np.int64)
+
+    # Bucket boundaries for the n - 2 interior points; the ends are always kept
+    every = (n - 2) / (n_out - 2)
+    edges = (np.arange(n_out - 1) * every).astype(np.int64) + 1
+    starts, ends = edges[:-1], edges[1:]
+    sizes = ends - starts
+
+    # Mean of every bucket, plus the last point standing in for the bucket after the last
+    mean_x = np.append(np.add.reduceat(x[1:n - 1], starts - 1) / sizes, x[-1])
+    mean_y = np.append(np.add.reduceat(y[1:n - 1], starts - 1) / sizes, y[-1])
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        s, e = starts[i], ends[i]
+        cx, cy = mean_x[i + 1], mean_y[i + 1]
+        ax, ay = x[a], y[a]
+        # Twice the triangle area (a, p, c) for every candidate p in the bucket
+        area = np.abs((ax - cx) * (y[s:e] - ay) - (ax - x[s:e]) * (cy - ay))
+        a = s + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def series_fields(points: Sequence[Dict[str, Any]]) -> List[str]:
+    """Numeric sensor series present in `points`, in first-seen order."""
+    fields: Dict[str, None] = {}
+    for point in points[:100]:
+        for key, value in point.items():
+            if (key not in _NON_SERIES and isinstance(value, (int, float))
+                    and not isinstance(value, bool)):
+                fields[key] = None
+    return list(fields)
+
+
+def _is_anomaly(point: Dict[str, Any]) -> bool:
+    return bool(point.get("anomaly_detected") or point.get("anomalies"))
+
+
+def downsample_points(points: List[Dict[str, Any]], max_points: int) -> List[Dict[str, Any]]:
+    """At most `max_points` points (plus anomalies) of a time-ordered history."""
+    n = len(points)
+    if n <= max_points:
+        return points
+    fields = series_fields(points)
+    x = np.fromiter((p["timestamp"].timestamp() for p in points), dtype=np.float64, count=n)
+
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, n - 1]] = True
+    share = max(3, max_points // max(1, len(fields)))
+    for field in fields:
+        y = np.fromiter((np.nan if p.get(field) is None else p[field] for p in points),
+                        dtype=np.float64, count=n)
+        present = np.flatnonzero(~np.isnan(y))
+        if len(present):
+            keep[present[lttb_indices(x[present], y[present], share)]] = True
+    if not fields:
+        keep[np.linspace(0, n - 1, max_points).astype(np.int64)] = True
+    keep |= np.fromiter((_is_anomaly(p) for p in points), dtype=bool, count=n)
+    return [points[i] for i in np.flatnonzero(keep)]
@@ -0,0 +1,321 @@
+"""Authoritative in-process equipment state (health score, status, last reading).
+
+Applying a reading's health decay used to cost two MongoDB round trips — read
+the equipment's health_score, write the decayed value back — and concurrent
+readings for the same machine could both read the old score and lose a decay
+step. The EquipmentStateTable keeps every equipment document in memory,
+applies decay synchronously under a lock (so updates to one machine are
+strictly serialised and never interleave), and marks the machine dirty. A
+background task writes all dirty machines to MongoDB with one bulk_write every
+`flush_interval_ms`, and once more on shutdown.
+
+The table is loaded from the `equipment` collection at startup and is what
+/api/equipment and the dashboard summary read; per-status counts and the
+health total are kept up to date on every change, so `summary()` is O(1).
+Edits made through the equipment endpoints go to MongoDB and are mirrored
+here. It assumes a single API process owns health updates; with several
+workers, each would flush its own view.
+
+Configuration (environment):
+  - RCA_EQUIPMENT_FLUSH_MS : interval between bulk writes of dirty equipment (default 2000)
+"""
+
+import asyncio
+import bisect
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set
+
+logger = logging.getLogger(__name__)
+
+# Fields owned by the table; flushes $set only these
+HEALTH_FIELDS = ("health_score", "status", "last_reading_at")
+
+
+def _as_utc(ts: datetime) -> datetime:
+    # Documents read back from MongoDB carry naive UTC datetimes
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def health_status(health_score: float) -> str:
+    return (
+        "critical" if health_score < 40
+        else "warning" if health_score < 70
+        else "operational"
+    )
+
+
+class EquipmentStateTable:
+    """Equipment documents keyed by equipment_id, with write-behind health updates.
+
+    `compute_health(ensemble_score, current_health)` returns the decayed
+    health; `get_db()` returns the database handle at load and flush time.
+    """
+
+    def __init__(self, get_db: Callable[[], Any],
+                 compute_health: Callable[[float, float], float],
+                 flush_interval_ms: float = 2000.0):
+        self.get_db = get_db
+        self.compute_health = compute_health
+        self.flush_interval = max(0.01, float(flush_interval_ms) / 1000.0)
+
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._sorted_ids: Optional[List[str]] = None   # rebuilt after machines are added
+        self._dirty: Set[str] = set()
+        self._status_counts: Dict[str, int] = {}
+        self._health_total = 0.0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        self._updates = 0
+        self._flushes = 0
+        self._flushed = 0
+        self._failed_flushes = 0
+        self._last_flush_ms = 0.0
+        self._last_flush_at: Optional[float] = None
+
+    @classmethod
+    def from_env(cls, get_db: Callable[[], Any],
+                 compute_health: Callable[[float, float], float]) -> "EquipmentStateTable":
+        return cls(
+            get_db,
+            compute_health,
+            flush_interval_ms=float(os.getenv("RCA_EQUIPMENT_FLUSH_MS", "2000")),
+        )
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    async def load(self) -> int:
+        """(Re)load every equipment document from MongoDB; returns the count.
+
+        Machines updated in memory but not yet flushed keep their health fields.
+        Holds the flush lock from the find to the merge: a flush in between
+        would mark a machine clean whose update the find may not have seen.
+        """
+        self._ensure_worker()
+        async with self._flush_lock:
+            docs = await self.get_db().equipment.find({}, {"_id": 0}).to_list(length=None)
+            with self._lock:
+                fresh = {}
+                for doc in docs:
+                    eq_id = doc["equipment_id"]
+                    current = self._docs.get(eq_id)
+                    if current is not None and eq_id in self._dirty:
+                        doc.update({f: current[f] for f in HEALTH_FIELDS if f in current})
+                    fresh[eq_id] = doc
+                for eq_id in self._dirty:
+                    fresh.setdefault(eq_id, self._docs[eq_id])
+                self._docs = fresh
+                self._sorted_ids = None
+                self._status_counts = {}
+                self._health_total = 0.0
+                for doc in fresh.values():
+                    self._count(doc, 1)
+                self._loaded = True
+        return len(docs)
+
+    async def ensure_loaded(self) -> None:
+        if not self._loaded:
+            await self.load()
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def record(self, equipment_id: str, ensemble_score: float, timestamp: datetime) -> float:
+        """Apply one reading's health decay; returns the new health.
+
+        Decay is applied in arrival order. `last_reading_at` only moves
+        forward: a reading stamped earlier than the last one (a late gateway
+        upload) decays health but leaves it as it was.
+        """
+        with self._lock:
+            doc = self._docs.get(equipment_id)
+            if doc is None:
+                # Unknown machine: created on first reading, as the upsert used to
+                doc = self._docs[equipment_id] = {"equipment_id": equipment_id, "health_score": 100.0}
+                self._sorted_ids = None
+            else:
+                self._count(doc, -1)
+            health = self.compute_health(ensemble_score, doc.get("health_score", 100.0))
+            doc["health_score"] = health
+            doc["status"] = health_status(health)
+            last = doc.get("last_reading_at")
+            if not isinstance(last, datetime) or _as_utc(timestamp) > _as_utc(last):
+                doc["last_reading_at"] = timestamp
+            self._count(doc, 1)
+            self._dirty.add(equipment_id)
+            self._updates += 1
+        self._ensure_worker()
+        return health
+
+    def apply(self, equipment_id: str, fields: Dict[str, Any], create: bool = False) -> bool:
+        """Mirror an edit already written to MongoDB; False if the machine is unknown.
+
+        Edits to health fields are marked dirty so a flush never writes back
+        an older value over them. A health_score set without a status gets
+        the status `record` would give it, which the next flush writes too.
+        """
+        with self._lock:
+            doc = self._docs.get(equipment_id)
+            if doc is None:
+                if not create:
+                    return False
+                doc = self._docs[equipment_id] = {"equipment_id": equipment_id}
+                self._sorted_ids = None
+            else:
+                self._count(doc, -1)
+            doc.update(fields)
+            if "health_score" in fields and "status" not in fields:
+                doc["status"] = health_status(doc["health_score"])
+            self._count(doc, 1)
+            if any(f in fields for f in HEALTH_FIELDS):
+                self._dirty.add(equipment_id)
+            return True
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def get(self, equipment_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            doc = self._docs.get(equipment_id)
+            return dict(doc) if doc is not None else None
+
+    def list(self, limit: Optional[int] = None, after: Optional[str] = None,
+             where: Optional[Dict[str, Any]] = None,
+             fields: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+        """Machines ordered by equipment_id, starting after `after`.
+
+        `where` keeps machines whose fields equal the given values; `fields`
+        limits each returned document to those fields.
+        """
+        with self._lock:
+            if self._sorted_ids is None:
+                self._sorted_ids = sorted(self._docs)
+            ids = self._sorted_ids
+            start = bisect.bisect_right(ids, after) if after is not None else 0
+            out: List[Dict[str, Any]] = []
+            for eq_id in ids[start:]:
+                if limit is not None and len(out) >= limit:
+                    break
+                doc = self._docs[eq_id]
+                if where and any(doc.get(k) != v for k, v in where.items()):
+                    continue
+                out.append({f: doc[f] for f in fields if f in doc} if fields else dict(doc))
+            return out
+
+    def summary(self) -> Dict[str, Any]:
+        """Equipment totals for the dashboard, from the running counts."""
+        with self._lock:
+            total = len(self._docs)
+            return {
+                "total": total,
+                "operational": self._status_counts.get("operational", 0),
+                "warning": self._status_counts.get("warning", 0),
+                "critical": self._status_counts.get("critical", 0),
+                "avg_health_score": round(self._health_total / total, 1) if total else 0,
+            }
+
+    def _count(self, doc: Dict[str, Any], sign: int) -> None:
+        # Caller holds self._lock. Adds (sign=1) or removes (-1) a doc from the counts.
+        status = doc.get("status")
+        self._status_counts[status] = self._status_counts.get(status, 0) + sign
+        self._health_total += sign * doc.get("health_score", 100)
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+
+    async def flush(self) -> int:
+        """Write every dirty machine's health fields with one bulk_write; returns the count."""
+        from pymongo import UpdateOne
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                snapshot = {
+                    eq_id: {f: self._docs[eq_id][f] for f in HEALTH_FIELDS if f in self._docs[eq_id]}
+                    for eq_id in dirty
+                }
+            if not snapshot:
+                return 0
+            started = time.perf_counter()
+            try:
+                await self.get_db().equipment.bulk_write([
+                    UpdateOne({"equipment_id": eq_id}, {"$set": fields}, upsert=True)
+                    for eq_id, fields in snapshot.items()
+                ], ordered=False)
+            except Exception as exc:
+                # Keep them dirty; the next flush retries with the latest values
+                with self._lock:
+                    self._dirty |= dirty
+                self._failed_flushes += 1
+                logger.warning("Equipment state flush of %d machines failed: %s", len(dirty), exc)
+                return 0
+            self._flushes += 1
+            self._flushed += len(snapshot)
+            self._last_flush_ms = (time.perf_counter() - started) * 1000.0
+            self._last_flush_at = time.time()
+            return len(snapshot)
+
+    async def close(self) -> None:
+        """Stop the periodic flush and write what is still dirty."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self._loop is not asyncio.get_running_loop():
+            self._flush_lock = None
+        await self.flush()
+        self._worker = None
+        self._loop = None
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "loaded":             self._loaded,
+                "equipment":          len(self._docs),
+                "dirty":              len(self._dirty),
+                "flush_interval_ms":  round(self.flush_interval * 1000.0, 3),
+                "updates":            self._updates,
+                "flushes":            self._flushes,
+                "flushed":            self._flushed,
+                "failed_flushes":     self._failed_flushes,
+                "last_flush_ms":      round(self._last_flush_ms, 3),
+                "last_flush_age_s":   (round(time.time() - self._last_flush_at, 1)
+                                       if self._last_flush_at else None),
+            }
+
+    def _ensure_worker(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return   # called outside the event loop; flushed by close()
+        if self._worker is not None and self._loop is loop and not self._worker.done():
+            return
+        # First use, or the previous loop went away (e.g. test clients).
+        # The flush lock is only replaced with the loop: a load may be holding it.
+        if self._loop is not loop or self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        self._loop = loop
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as exc:   # never let the flusher die
+                logger.warning("Equipment state flush failed: %s", exc)
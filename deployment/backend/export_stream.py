@@ -0,0 +1,125 @@
+"""Streaming NDJSON / CSV exports for the history and results endpoints.
+
+The JSON endpoints build their whole answer in memory (`to_list`, then one
+array), so memory and time-to-first-byte grow with the window. An export
+instead iterates the Motor cursor `RCA_EXPORT_BATCH_SIZE` documents at a time
+and writes rows to the client as they arrive; a week of readings for the
+noisiest machine costs no more memory than an hour.
+
+The format is picked by the `format` query parameter (json / ndjson / csv) or,
+when that is absent, by the Accept header (`application/x-ndjson`,
+`text/csv`); everything else keeps the JSON array.
+
+CSV needs its header before the first row, so the columns are the keys of the
+first batch of rows, in first-seen order. Nested objects are flattened to
+dotted columns (`min.torque`), lists are written as JSON, and keys that first
+appear after the header was written are dropped — use NDJSON for documents
+whose shape varies.
+
+Configuration (environment):
+  - RCA_EXPORT_BATCH_SIZE : documents fetched per cursor batch and rows per
+                            write (default 1000)
+"""
+
+import csv
+import io
+import json
+import os
+import re
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi.responses import StreamingResponse
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv":    "text/csv",
+}
+
+EXPORT_BATCH_SIZE = max(1, int(os.getenv("RCA_EXPORT_BATCH_SIZE", "1000")))
+
+
+def pick_format(format_param: Optional[str], accept: Optional[str]) -> str:
+    """`format` wins; otherwise the first export type named in Accept; else json."""
+    if format_param:
+        return format_param
+    accept = (accept or "").lower()
+    if "application/x-ndjson" in accept or "application/ndjson" in accept:
+        return "ndjson"
+    if "text/csv" in accept:
+        return "csv"
+    return "json"
+
+
+def jsonable(value: Any) -> Any:
+    """Datetimes to ISO strings and ObjectIds (anything unknown) to str, recursively."""
+    if isinstance(value, dict):
+        return {k: jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonable(v) for v in value]
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def _flatten(doc: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    row: Dict[str, Any] = {}
+    for key, value in doc.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            row.update(_flatten(value, f"{name}."))
+        elif isinstance(value, list):
+            row[name] = json.dumps(value)
+        else:
+            row[name] = value
+    return row
+
+
+async def _batches(rows: AsyncIterator[Dict[str, Any]], size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    async for row in rows:
+        batch.append(jsonable(row))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def ndjson_chunks(rows: AsyncIterator[Dict[str, Any]],
+                        batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    async for batch in _batches(rows, batch_size):
+        yield "".join(json.dumps(row) + "\n" for row in batch).encode()
+
+
+async def csv_chunks(rows: AsyncIterator[Dict[str, Any]],
+                     batch_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    writer = None
+    buf = io.StringIO()
+    async for batch in _batches(rows, batch_size):
+        flat = [_flatten(row) for row in batch]
+        if writer is None:
+            columns = list(dict.fromkeys(key for row in flat for key in row))
+            writer = csv.DictWriter(buf, fieldnames=columns, extrasaction="ignore")
+            writer.writeheader()
+        writer.writerows(flat)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+
+
+def export_response(rows: AsyncIterator[Dict[str, Any]], fmt: str, filename: str,
+                    headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    """StreamingResponse writing `rows` as NDJSON or CSV, offered as `filename`.<ext>."""
+    chunks = csv_chunks(rows) if fmt == "csv" else ndjson_chunks(rows)
+    filename = re.sub(r"[^A-Za-z0-9_.-]", "_", filename)   # may carry an equipment_id
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[fmt],
+        headers={
+            **(headers or {}),
+            "Content-Disposition": f'attachment; filename="{filename}.{fmt}"',
+        },
+    )
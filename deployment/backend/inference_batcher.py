@@ -0,0 +1,228 @@
+"""Dynamic micro-batching for LSTM autoencoder inference.
+
+Concurrent /api/sensor/ingest calls each need a forward pass over a handful of
+rows, and `model.predict` cost is dominated by per-call overhead rather than by
+the rows themselves. The InferenceBatcher collects requests that arrive within
+a short window (or until a row budget is reached), runs them through the model
+as one stacked batch, and hands every caller back only its own rows.
+
+Forward passes run on an InferenceExecutor, so the event loop keeps serving
+other requests while a batch is in the model. Up to `executor.workers`
+batches run at once; while all workers are busy new requests keep queueing,
+which makes the next batch larger rather than the backlog longer.
+
+Configuration (environment):
+  - RCA_BATCHING_ENABLED : "0" disables batching (each call runs on its own)
+  - RCA_BATCH_WINDOW_MS  : max time the first request waits for company (default 3)
+  - RCA_BATCH_MAX_SIZE   : max rows per forward pass (default 64)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from inference_executor import InferenceExecutor
+
+logger = logging.getLogger(__name__)
+
+# Number of recent batches / requests kept for percentile metrics
+_METRIC_SAMPLES = 1024
+
+
+@dataclass
+class _PendingRequest:
+    features: np.ndarray
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+
+def _percentile(samples, q: float) -> float:
+    if not samples:
+        return 0.0
+    return round(float(np.percentile(np.fromiter(samples, dtype=np.float64), q)), 3)
+
+
+class InferenceBatcher:
+    """Coalesces concurrent inference requests into single forward passes.
+
+    `infer_fn` takes an (N, ...) input tensor (e.g. (N, 10, 13) LSTM windows)
+    and returns a tuple of row-aligned sequences (arrays or lists). `submit` returns the same tuple
+    restricted to the caller's rows, in the caller's order.
+    """
+
+    def __init__(self, infer_fn: Callable[[np.ndarray], Tuple[Any, ...]],
+                 executor: InferenceExecutor,
+                 max_batch_size: int = 64, max_wait_ms: float = 3.0,
+                 enabled: bool = True):
+        self.infer_fn = infer_fn
+        self.executor = executor
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.enabled = enabled
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._dispatches: Set[asyncio.Task] = set()
+
+        self._batches = 0
+        self._requests = 0
+        self._rows = 0
+        self._batch_sizes: Deque[int] = deque(maxlen=_METRIC_SAMPLES)
+        self._queue_waits_ms: Deque[float] = deque(maxlen=_METRIC_SAMPLES)
+        self._infer_ms: Deque[float] = deque(maxlen=_METRIC_SAMPLES)
+
+    @classmethod
+    def from_env(cls, infer_fn: Callable[[np.ndarray], Tuple[Any, ...]],
+                 executor: InferenceExecutor) -> "InferenceBatcher":
+        return cls(
+            infer_fn,
+            executor,
+            max_batch_size=int(os.getenv("RCA_BATCH_MAX_SIZE", "64")),
+            max_wait_ms=float(os.getenv("RCA_BATCH_WINDOW_MS", "3")),
+            enabled=os.getenv("RCA_BATCHING_ENABLED", "1") != "0",
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def submit(self, features: np.ndarray) -> Tuple[Any, ...]:
+        """Queue an (n, ...) input tensor and wait for its slice of the batch result.
+
+        `features` is copied first, in every mode: the forward pass runs on a
+        worker after this coroutine yields, and the caller's array (or the
+        buffer it is a view of) may change in the meantime.
+
+        Raises InferenceSaturated (without queueing) when the executor backlog is full.
+        """
+        features = np.array(features, copy=True)
+        if not self.enabled:
+            return await self.executor.run(self.infer_fn, features)
+        self.executor.reserve()
+        try:
+            self._ensure_worker()
+            future = self._loop.create_future()
+            await self._queue.put(_PendingRequest(features, future))
+            return await future
+        finally:
+            self.executor.release()
+
+    async def close(self) -> None:
+        """Stop the worker and fail any request still waiting in the queue."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except (asyncio.CancelledError, Exception):
+                pass
+        for task in list(self._dispatches):
+            task.cancel()
+        if self._queue is not None:
+            while not self._queue.empty():
+                pending = self._queue.get_nowait()
+                if not pending.future.done():
+                    pending.future.set_exception(RuntimeError("Inference batcher shut down"))
+        self._worker = None
+        self._queue = None
+        self._loop = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled":             self.enabled,
+            "window_ms":           round(self.max_wait * 1000.0, 3),
+            "max_batch_size":      self.max_batch_size,
+            "batches":             self._batches,
+            "requests":            self._requests,
+            "rows":                self._rows,
+            "queue_depth":         self._queue.qsize() if self._queue is not None else 0,
+            "avg_requests_per_batch": round(self._requests / self._batches, 3) if self._batches else 0.0,
+            "batch_size_p50":      _percentile(self._batch_sizes, 50),
+            "batch_size_p99":      _percentile(self._batch_sizes, 99),
+            "batch_size_max":      max(self._batch_sizes, default=0),
+            "queue_wait_ms_p50":   _percentile(self._queue_waits_ms, 50),
+            "queue_wait_ms_p99":   _percentile(self._queue_waits_ms, 99),
+            "inference_ms_p50":    _percentile(self._infer_ms, 50),
+            "inference_ms_p99":    _percentile(self._infer_ms, 99),
+        }
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and self._loop is loop and not self._worker.done():
+            return
+        # First use, or the previous loop went away (e.g. test clients)
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.executor.workers)
+        self._worker = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            # Wait for a free executor worker before forming the next batch
+            await self._slots.acquire()
+            batch = [await self._queue.get()]
+            rows = len(batch[0].features)
+            deadline = self._loop.time() + self.max_wait
+            while rows < self.max_batch_size:
+                if self._queue.empty():
+                    remaining = deadline - self._loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        pending = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    pending = self._queue.get_nowait()
+                batch.append(pending)
+                rows += len(pending.features)
+            task = self._loop.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch: List[_PendingRequest]) -> None:
+        try:
+            await self._dispatch_batch(batch)
+        finally:
+            self._slots.release()
+
+    async def _dispatch_batch(self, batch: List[_PendingRequest]) -> None:
+        started = time.perf_counter()
+        for pending in batch:
+            self._queue_waits_ms.append((started - pending.enqueued_at) * 1000.0)
+
+        try:
+            stacked = (batch[0].features if len(batch) == 1
+                       else np.concatenate([p.features for p in batch], axis=0))
+            result = await self.executor.call(self.infer_fn, stacked)
+        except Exception as exc:
+            logger.warning("Batched inference failed for %d requests: %s", len(batch), exc)
+            for pending in batch:
+                if not pending.future.done():
+                    pending.future.set_exception(exc)
+            return
+        finally:
+            self._infer_ms.append((time.perf_counter() - started) * 1000.0)
+
+        self._batches += 1
+        self._requests += len(batch)
+        self._rows += len(stacked)
+        self._batch_sizes.append(len(stacked))
+
+        offset = 0
+        for pending in batch:
+            n = len(pending.features)
+            if not pending.future.done():
+                pending.future.set_result(tuple(part[offset:offset + n] for part in result))
+            offset += n
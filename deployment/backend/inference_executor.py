@@ -0,0 +1,126 @@
+"""Dedicated executor that keeps blocking model inference off the event loop.
+
+`model.predict` is CPU-bound and blocking. Running it inside an `async def`
+handler stalls every other request on the worker (dashboard reads, auth)
+for the duration of the forward pass. The InferenceExecutor runs inference in
+its own thread or process pool and caps how many callers may be waiting on it;
+beyond that cap, callers are rejected immediately with InferenceSaturated so
+the API can answer 503 instead of queueing without bound.
+
+Configuration (environment):
+  - RCA_INFERENCE_EXECUTOR    : "thread" (default) or "process"
+  - RCA_INFERENCE_WORKERS     : pool size (default 1)
+  - RCA_INFERENCE_MAX_PENDING : max callers queued or running (default 256)
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceSaturated(RuntimeError):
+    """Raised when the inference backlog is full; callers should retry later."""
+
+
+class InferenceExecutor:
+    """Bounded thread/process pool for blocking inference calls."""
+
+    def __init__(self, kind: str = "thread", workers: int = 1, max_pending: int = 256,
+                 initializer: Optional[Callable[[], Any]] = None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor kind: {kind!r}")
+        self.kind = kind
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.initializer = initializer
+        self._pool: Optional[Executor] = None
+        self._pending = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+
+    @classmethod
+    def from_env(cls, initializer: Optional[Callable[[], Any]] = None) -> "InferenceExecutor":
+        return cls(
+            kind=os.getenv("RCA_INFERENCE_EXECUTOR", "thread").lower(),
+            workers=int(os.getenv("RCA_INFERENCE_WORKERS", "1")),
+            max_pending=int(os.getenv("RCA_INFERENCE_MAX_PENDING", "256")),
+            initializer=initializer,
+        )
+
+    # ------------------------------------------------------------------
+    # Admission control
+    # ------------------------------------------------------------------
+
+    def reserve(self, n: int = 1) -> None:
+        """Admit `n` callers or raise InferenceSaturated if the backlog is full."""
+        if self._pending + n > self.max_pending:
+            self._rejected += n
+            raise InferenceSaturated(
+                f"Inference backlog full ({self._pending}/{self.max_pending}) — retry shortly"
+            )
+        self._pending += n
+
+    def release(self, n: int = 1) -> None:
+        self._pending = max(0, self._pending - n)
+
+    # ------------------------------------------------------------------
+    # Execution
+    # ------------------------------------------------------------------
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Admit one caller and run `fn(*args)` in the pool."""
+        self.reserve()
+        try:
+            return await self.call(fn, *args)
+        finally:
+            self.release()
+
+    async def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run `fn(*args)` in the pool for callers that were already admitted."""
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            return await loop.run_in_executor(self._get_pool(), fn, *args)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "kind":        self.kind,
+            "workers":     self.workers,
+            "max_pending": self.max_pending,
+            "pending":     self._pending,
+            "in_flight":   self._in_flight,
+            "completed":   self._completed,
+            "rejected":    self._rejected,
+        }
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                # spawn, not fork: forking a process that already holds TF state is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer,
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="rca-inference",
+                    initializer=self.initializer,
+                )
+            logger.info("Inference executor started: %s × %d", self.kind, self.workers)
+        return self._pool
@@ -0,0 +1,212 @@
+"""Deterministic, KG-only RCA for anomalies with a strong SWRL rule match.
+
+When `evaluate_swrl_rules` finds a rule that matches well, the three LLM
+agents mostly restate it — symptoms from the rule description, the rule's
+failure mode as root cause, the matching maintenance strategy as the plan —
+after more than a minute of LLM calls. KGFastPath builds that result straight
+from the knowledge graph instead, in milliseconds:
+
+  - symptoms and affected entities from the top contributing features and the
+    rule description;
+  - the root cause and causal chain from the failure mode in the rule's SWRL
+    consequent (`hasFailure(?e, ToolWearFailure)`) and its cross-domain
+    counterpart in `failure_mapping`;
+  - the remediation plan from the maintenance strategy for the severity (or
+    the rule's `requiresMaintenance` consequent) in `maintenance_mapping`.
+
+Confidences are the rule's match confidence. The path is taken only when the
+top match reaches `min_confidence`; weaker matches run the LLM workflow.
+
+Modes:
+  - "off"    : every workflow runs the LLM agents (the default)
+  - "on"     : strong matches get the KG result only
+  - "enrich" : strong matches get the KG result at once, and an LLM workflow
+               is queued at low priority to upgrade the stored result later
+               (it is shed first under a large backlog)
+
+Every result records the path that produced it in `rca_path`: "llm",
+"kg_fast_path" or "llm_enriched".
+
+Configuration (environment):
+  - RCA_KG_FAST_PATH                : "off" (default), "on" or "enrich"
+  - RCA_KG_FAST_PATH_MIN_CONFIDENCE : top rule match confidence that takes the fast path (default 0.7)
+"""
+
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FAST_PATH_MODES = ("off", "on", "enrich")
+
+# Strategy in maintenance_mapping used for a failure mode, by severity
+_SEVERITY_MAINTENANCE = {
+    "critical": "CorrectiveMaintenance",
+    "high":     "CorrectiveMaintenance",
+    "medium":   "PredictiveMaintenance",
+    "low":      "PreventiveMaintenance",
+}
+_ACTION_PRIORITIES = {
+    "critical": ("critical", "high"),
+    "high":     ("high", "high"),
+    "medium":   ("medium", "medium"),
+    "low":      ("low", "low"),
+}
+_FAILURE_RE = re.compile(r"hasFailure\(\?\w+,\s*(\w+)\)")
+_MAINTENANCE_RE = re.compile(r"requiresMaintenance\(\?\w+,\s*(\w+)\)")
+
+
+def _consequent(rule: Dict[str, Any], pattern: "re.Pattern") -> Optional[str]:
+    """The class named by `pattern` in the rule's SWRL consequent (after the arrow)."""
+    head = rule.get("swrl", "").split("→")[-1]
+    match = pattern.search(head)
+    return match.group(1) if match else None
+
+
+class KGFastPath:
+    """Builds an RCA result from the top SWRL match when it is strong enough."""
+
+    def __init__(self, mode: str = "off", min_confidence: float = 0.7):
+        if mode not in FAST_PATH_MODES:
+            raise ValueError(f"fast path mode must be one of {FAST_PATH_MODES}, not {mode!r}")
+        self.mode = mode
+        self.min_confidence = float(min_confidence)
+        self._lock = threading.Lock()
+        self._fast = 0
+        self._llm = 0
+        self._enrich_queued = 0
+        self._enrich_skipped = 0
+        self._enriched = 0
+
+    @classmethod
+    def from_env(cls) -> "KGFastPath":
+        mode = os.getenv("RCA_KG_FAST_PATH", "off").strip().lower()
+        if mode not in FAST_PATH_MODES:
+            logger.warning("Unknown RCA_KG_FAST_PATH %r; the KG fast path is off", mode)
+            mode = "off"
+        return cls(
+            mode=mode,
+            min_confidence=float(os.getenv("RCA_KG_FAST_PATH_MIN_CONFIDENCE", "0.7")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def enrich(self) -> bool:
+        return self.mode == "enrich"
+
+    def build(self, anomaly_data: Dict[str, Any], matched_rules: List[Dict[str, Any]],
+              kg: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Agent outputs for the anomaly built from the top rule in `matched_rules`
+        (as returned by `evaluate_swrl_rules`, best first), or None when there
+        is no match of at least `min_confidence`. `kg` is the workflow's
+        GLOBAL_CONTEXT (`swrl_rules`, `kg_mappings`).
+        """
+        if not self.enabled or not matched_rules:
+            return None
+        top = matched_rules[0]
+        confidence = float(top.get("match_confidence", 0.0))
+        if confidence < self.min_confidence:
+            return None
+
+        rule = next((r for r in kg.get("swrl_rules", []) if r.get("id") == top.get("rule_id")), {})
+        domain_mappings = kg.get("kg_mappings", {}).get("domain_mappings", {})
+        failure_mapping = domain_mappings.get("failure_mapping", {})
+        maintenance_mapping = domain_mappings.get("maintenance_mapping", {})
+
+        severity = anomaly_data.get("severity", "medium")
+        recon_error = float(anomaly_data.get("reconstruction_error", 0))
+        features = [f.get("feature_name", "") for f in anomaly_data.get("top_contributing_features", [])]
+        failure_mode = _consequent(rule, _FAILURE_RE)
+        analogue = failure_mapping.get(failure_mode) if failure_mode else None
+        maintenance = (_consequent(rule, _MAINTENANCE_RE)
+                       or _SEVERITY_MAINTENANCE.get(severity, "PredictiveMaintenance"))
+        first, second = _ACTION_PRIORITIES.get(severity, ("medium", "medium"))
+
+        symptoms = [f"Abnormal {name} readings" for name in features[:3]]
+        symptoms.append(top.get("description") or top.get("rule_name", ""))
+        root_cause = (f"{failure_mode} — {top.get('description', '')}" if failure_mode
+                      else top.get("rule_name", "Unknown failure"))
+        causal_chain = [
+            f"Reconstruction error {recon_error:.3f} on {', '.join(features[:3]) or 'sensor data'} "
+            f"exceeded the KG threshold",
+            f"SWRL rule {top.get('rule_id')} ({top.get('rule_name')}) matched with "
+            f"confidence {confidence}",
+            (f"Ontology failure mode {failure_mode}" + (f" (cross-domain: {analogue})" if analogue else ""))
+            if failure_mode else "Rule implies a maintenance requirement rather than a failure mode",
+            (f"Failure mode confirmed by ontology: {failure_mode}" if failure_mode
+             else f"Maintenance required: {maintenance}"),
+        ]
+        target = failure_mode or top.get("rule_name", "the matched condition")
+        recommended_actions = [
+            {"action": f"{maintenance} ({maintenance_mapping.get(maintenance, maintenance)}) "
+                       f"for {target}",
+             "priority": first, "estimated_time": "30 min"},
+            {"action": f"Inspect {', '.join(features[:3]) or 'affected sensors'}",
+             "priority": second, "estimated_time": "20 min"},
+            {"action": "Run diagnostic checks on affected components",
+             "priority": "medium", "estimated_time": "20 min"},
+        ]
+        return {
+            "symptoms":              symptoms,
+            "affected_entities":     ["Equipment"] + features[:3],
+            "diagnostic_confidence": confidence,
+            "diagnostic_reasoning":  f"KG rule matched: {top.get('rule_name')}",
+            "causal_hypotheses":     matched_rules,
+            "root_cause":            root_cause,
+            "causal_chain":          causal_chain,
+            "reasoning_confidence":  confidence,
+            "reasoning_steps":       f"KG-only trace from SWRL rule {top.get('rule_id')}",
+            "recommended_actions":   recommended_actions,
+            "remediation_plan": {
+                "maintenance_type":        maintenance,
+                "cross_domain_equivalent": maintenance_mapping.get(maintenance),
+                "failure_mode":            failure_mode,
+                "rule_id":                 top.get("rule_id"),
+            },
+            "planning_confidence":   confidence,
+            "planning_rationale":    f"{maintenance} for {target} at {severity} severity, "
+                                     f"from the KG maintenance mapping.",
+            "rca_path":              "kg_fast_path",
+        }
+
+    # ------------------------------------------------------------------
+    # Counters
+    # ------------------------------------------------------------------
+
+    def record(self, rca_path: str) -> None:
+        """Count a finished workflow by the path that produced it."""
+        with self._lock:
+            if rca_path == "kg_fast_path":
+                self._fast += 1
+            elif rca_path == "llm_enriched":
+                self._enriched += 1
+            else:
+                self._llm += 1
+
+    def record_enrichment(self, queued: bool) -> None:
+        with self._lock:
+            if queued:
+                self._enrich_queued += 1
+            else:
+                self._enrich_skipped += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            workflows = self._fast + self._llm
+            return {
+                "mode":                self.mode,
+                "min_confidence":      self.min_confidence,
+                "fast_path":           self._fast,
+                "llm":                 self._llm,
+                "fast_path_ratio":     round(self._fast / workflows, 4) if workflows else None,
+                "enrichments_queued":  self._enrich_queued,
+                "enrichments_skipped": self._enrich_skipped,
+                "enriched":            self._enriched,
+            }
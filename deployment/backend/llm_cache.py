@@ -0,0 +1,236 @@
+"""Content-addressed cache of LLM responses for the RCA agents.
+
+Each of the diagnostic, causal reasoning and planning agents makes one LLM
+call of several seconds, and the prompts come from a small discrete space:
+severity, the names of the top contributing features, the matched SWRL rules
+and the reconstruction error. A machine that keeps failing the same way used
+to pay for the same three calls on every workflow. LLMResponseCache keys each
+response on a canonical form of the agent's inputs instead of the prompt text:
+
+  - `key(agent, inputs)` hashes the inputs as sorted-key JSON, so the order
+    of dict fields does not matter; callers pass lists in a stable order and
+    leave out per-anomaly identifiers such as anomaly_id.
+  - Errors are bucketed with `bucket(value)` (floored to a multiple of
+    `error_bucket`), so 0.412 and 0.437 share an entry at the default 0.05.
+  - Recently used entries are kept in an in-memory LRU of `max_entries`;
+    every entry is also written to a SQLite file, so the cache survives
+    restarts and is shared by API processes on one disk. A memory miss falls
+    through to SQLite and promotes the entry.
+  - Entries expire `ttl_s` after they were written, so a changed prompt or
+    model shows up within one TTL; expired rows are deleted on open.
+
+Callers only `put` responses that parsed, so a malformed reply is retried on
+the next workflow rather than served from the cache. If the SQLite file cannot
+be opened or written, the cache logs a warning and keeps working from memory.
+The cache is used from the RCA queue's worker threads and is thread-safe.
+
+Configuration (environment):
+  - RCA_LLM_CACHE_ENABLED      : "0" calls the LLM for every agent step (default 1)
+  - RCA_LLM_CACHE_PATH         : SQLite cache database (default backend/llm_cache.sqlite3)
+  - RCA_LLM_CACHE_TTL_S        : seconds a response is served after it was cached (default 86400)
+  - RCA_LLM_CACHE_MAX_ENTRIES  : responses kept in memory, least recently used evicted (default 1024)
+  - RCA_LLM_CACHE_ERROR_BUCKET : width of the reconstruction error buckets in keys (default 0.05)
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.sqlite3")
+
+
+class LLMResponseCache:
+    """Agent inputs -> LLM response text, in an LRU over a SQLite table."""
+
+    def __init__(self, path: Optional[str] = DEFAULT_SQLITE_PATH, ttl_s: float = 86400.0,
+                 max_entries: int = 1024, error_bucket: float = 0.05, enabled: bool = True):
+        self.path = path
+        self.ttl = max(0.0, float(ttl_s))
+        self.max_entries = max(1, int(max_entries))
+        self.error_bucket = max(0.0, float(error_bucket))
+        self.enabled = enabled and self.ttl > 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()   # key -> (response, expires at)
+        self._conn: Optional[sqlite3.Connection] = None
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._writes = 0
+        self._evictions = 0
+        self._disk_errors = 0
+        self._hit_ms = 0.0
+
+        if self.enabled and path:
+            self._open(path)
+
+    @classmethod
+    def from_env(cls) -> "LLMResponseCache":
+        return cls(
+            path=os.getenv("RCA_LLM_CACHE_PATH", DEFAULT_SQLITE_PATH),
+            ttl_s=float(os.getenv("RCA_LLM_CACHE_TTL_S", "86400")),
+            max_entries=int(os.getenv("RCA_LLM_CACHE_MAX_ENTRIES", "1024")),
+            error_bucket=float(os.getenv("RCA_LLM_CACHE_ERROR_BUCKET", "0.05")),
+            enabled=os.getenv("RCA_LLM_CACHE_ENABLED", "1") == "1",
+        )
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    def bucket(self, value: Any) -> Optional[float]:
+        """`value` floored to a multiple of `error_bucket` (unchanged if the width is 0)."""
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        if not math.isfinite(value):
+            return None
+        if self.error_bucket <= 0:
+            return value
+        return round(math.floor(value / self.error_bucket) * self.error_bucket, 6)
+
+    @staticmethod
+    def key(agent: str, inputs: Dict[str, Any]) -> str:
+        canonical = json.dumps({"agent": agent, "inputs": inputs}, sort_keys=True,
+                               separators=(",", ":"), default=str)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Reads and writes
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[str]:
+        """The cached response for `key`, or None if missing or expired."""
+        if not self.enabled:
+            return None
+        started = time.perf_counter()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(key)
+                    self._memory_hits += 1
+                    self._hit_ms += (time.perf_counter() - started) * 1000.0
+                    return entry[0]
+                del self._entries[key]
+            row = self._read(key)
+            if row is not None and row[1] > now:
+                self._remember(key, row[0], row[1])
+                self._disk_hits += 1
+                self._hit_ms += (time.perf_counter() - started) * 1000.0
+                return row[0]
+            if entry is not None or row is not None:
+                self._expired += 1
+            self._misses += 1
+            return None
+
+    def put(self, key: str, response: str) -> None:
+        """Cache `response` for `ttl_s`, in memory and on disk."""
+        if not self.enabled:
+            return
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._remember(key, response, expires_at)
+            self._writes += 1
+            if self._conn is not None:
+                try:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO llm_responses (key, response, created_at, expires_at) "
+                        "VALUES (?, ?, ?, ?)", (key, response, now, expires_at),
+                    )
+                except sqlite3.Error as exc:
+                    self._disk_failed("write", exc)
+
+    def clear(self) -> None:
+        """Drop every cached response, in memory and on disk."""
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                try:
+                    self._conn.execute("DELETE FROM llm_responses")
+                except sqlite3.Error as exc:
+                    self._disk_failed("clear", exc)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                "enabled":        self.enabled,
+                "persistent":     self._conn is not None,
+                "ttl_s":          self.ttl,
+                "error_bucket":   self.error_bucket,
+                "entries":        len(self._entries),
+                "max_entries":    self.max_entries,
+                "memory_hits":    self._memory_hits,
+                "disk_hits":      self._disk_hits,
+                "misses":         self._misses,
+                "hit_ratio":      round(hits / lookups, 4) if lookups else None,
+                "avg_hit_ms":     round(self._hit_ms / hits, 3) if hits else None,
+                "expired":        self._expired,
+                "writes":         self._writes,
+                "evictions":      self._evictions,
+                "disk_errors":    self._disk_errors,
+            }
+
+    # ------------------------------------------------------------------
+    # Internals (caller holds self._lock unless noted)
+    # ------------------------------------------------------------------
+
+    def _open(self, path: str) -> None:
+        # Called from __init__ only
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_responses ("
+                " key TEXT PRIMARY KEY, response TEXT NOT NULL,"
+                " created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._conn.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (time.time(),))
+        except sqlite3.Error as exc:
+            logger.warning("LLM cache %s unavailable, caching in memory only: %s", path, exc)
+            self._conn = None
+            self._disk_errors += 1
+
+    def _read(self, key: str) -> Optional[Tuple[str, float]]:
+        if self._conn is None:
+            return None
+        try:
+            row = self._conn.execute(
+                "SELECT response, expires_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as exc:
+            self._disk_failed("read", exc)
+            return None
+        return (row[0], row[1]) if row is not None else None
+
+    def _remember(self, key: str, response: str, expires_at: float) -> None:
+        self._entries[key] = (response, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _disk_failed(self, operation: str, exc: Exception) -> None:
+        self._disk_errors += 1
+        logger.warning("LLM cache %s failed: %s", operation, exc)
@@ -0,0 +1,201 @@
+"""Registry of the LSTM autoencoders in models/, keyed by "<domain>/<version>".
+
+One process serves several model families: the AI4I machining models and the
+MetroPT-3 rail air-compressor models. Each ModelSpec describes one model file
+together with everything needed to feed it — window length, feature names,
+the feature builder for raw input and the reconstruction-error threshold
+used by ensemble scoring. A spec registered with `calibrated=False` has no
+threshold or feature importances of its own: its readings are scored and
+stored, but raise no alerts, RCA workflows or health changes.
+
+Models are loaded lazily on first use and kept in LRU order. When the weights
+of the loaded models exceed the memory budget, the least recently used models
+are unloaded (the one just requested is always kept). Models listed in the
+preload setting are loaded, and warmed, at startup.
+
+Configuration (environment):
+  - RCA_MODEL_PRELOAD          : comma-separated keys to load at startup (default "ai4i/best")
+  - RCA_MODEL_MEMORY_BUDGET_MB : budget for loaded model weights (default 256)
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownModel(LookupError):
+    """Raised when a domain/version pair has no registered model."""
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    """Everything needed to load and feed one autoencoder."""
+
+    domain: str
+    version: str
+    filename: str
+    feature_names: Sequence[str]
+    build_features: Callable[[np.ndarray], np.ndarray]   # raw (N, R) -> (N, F) float32
+    window: int = 10
+    lstm_threshold: float = 0.392                        # 95th-percentile reconstruction error
+    calibrated: bool = True                              # threshold and importances fitted for this model
+
+    @property
+    def key(self) -> str:
+        return f"{self.domain}/{self.version}"
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_names)
+
+
+class _LoadedModel:
+    __slots__ = ("model", "nbytes", "loaded_at", "last_used")
+
+    def __init__(self, model: Any):
+        self.model = model
+        self.nbytes = int(getattr(model, "nbytes", 0))
+        self.loaded_at = time.time()
+        self.last_used = self.loaded_at
+
+
+class ModelRegistry:
+    """Lazily loaded, memory-bounded set of models keyed by "<domain>/<version>".
+
+    `loader(path)` returns an object with `predict(x, batch_size, verbose)`;
+    its `nbytes` attribute (weight bytes) is charged against the budget.
+    """
+
+    def __init__(self, models_dir: str, loader: Callable[[str], Any],
+                 memory_budget_mb: float = 256.0, preload: Sequence[str] = ("ai4i/best",)):
+        self.models_dir = models_dir
+        self.loader = loader
+        self.memory_budget = int(float(memory_budget_mb) * 1024 * 1024)
+        self.preload_keys = [k for k in preload if k]
+        self._specs: Dict[str, ModelSpec] = {}
+        self._defaults: Dict[str, str] = {}
+        self._loaded: "OrderedDict[str, _LoadedModel]" = OrderedDict()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._loads = 0
+        self._evictions = 0
+
+    @classmethod
+    def from_env(cls, models_dir: str, loader: Callable[[str], Any]) -> "ModelRegistry":
+        return cls(
+            models_dir,
+            loader,
+            memory_budget_mb=float(os.getenv("RCA_MODEL_MEMORY_BUDGET_MB", "256")),
+            preload=[k.strip() for k in os.getenv("RCA_MODEL_PRELOAD", "ai4i/best").split(",")],
+        )
+
+    # ------------------------------------------------------------------
+    # Specs
+    # ------------------------------------------------------------------
+
+    def register(self, spec: ModelSpec, default: bool = False) -> None:
+        """Add a model; `default` makes it the version used when none is requested."""
+        self._specs[spec.key] = spec
+        self._load_locks[spec.key] = threading.Lock()
+        if default or spec.domain not in self._defaults:
+            self._defaults[spec.domain] = spec.key
+
+    def spec(self, domain: str, version: Optional[str] = None) -> ModelSpec:
+        """Resolve a domain and optional version to its spec, or raise UnknownModel."""
+        key = f"{domain}/{version}" if version else self._defaults.get(domain, "")
+        if key not in self._specs:
+            raise UnknownModel(
+                f"No model registered for {domain}/{version or '<default>'} "
+                f"(available: {', '.join(sorted(self._specs))})"
+            )
+        return self._specs[key]
+
+    def specs(self) -> List[ModelSpec]:
+        return list(self._specs.values())
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Any:
+        """Return the loaded model for `key`, loading (and evicting) as needed."""
+        with self._lock:
+            entry = self._loaded.get(key)
+            if entry is not None:
+                self._loaded.move_to_end(key)
+                entry.last_used = time.time()
+                self._hits += 1
+                return entry.model
+        if key not in self._specs:
+            raise UnknownModel(f"No model registered for {key}")
+
+        # Per-model lock: loading one model never blocks requests for another
+        with self._load_locks[key]:
+            with self._lock:
+                entry = self._loaded.get(key)
+            if entry is None:
+                path = os.path.join(self.models_dir, self._specs[key].filename)
+                entry = _LoadedModel(self.loader(path))
+                with self._lock:
+                    self._loaded[key] = entry
+                    self._loads += 1
+                    self._evict(keep=key)
+                logger.info("Loaded model %s (%.1f MB)", key, entry.nbytes / 1e6)
+        return entry.model
+
+    def preload(self) -> List[str]:
+        """Load every model listed in the preload setting; returns the keys loaded."""
+        loaded = []
+        for key in self.preload_keys:
+            if key not in self._specs:
+                logger.warning("Skipping preload of unknown model %s", key)
+                continue
+            self.get(key)
+            loaded.append(key)
+        with self._lock:
+            missing = [k for k in loaded if k not in self._loaded]
+        if missing:
+            logger.warning("Preloaded models %s were evicted; raise RCA_MODEL_MEMORY_BUDGET_MB",
+                           ", ".join(missing))
+        return loaded
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            used = sum(e.nbytes for e in self._loaded.values())
+            return {
+                "registered":       sorted(self._specs),
+                "defaults":         dict(self._defaults),
+                "preload":          list(self.preload_keys),
+                "memory_budget_mb": round(self.memory_budget / (1024 * 1024), 1),
+                "memory_used_mb":   round(used / (1024 * 1024), 3),
+                "loaded": [
+                    {"key": key, "memory_mb": round(e.nbytes / (1024 * 1024), 3),
+                     "idle_seconds": round(time.time() - e.last_used, 1)}
+                    for key, e in self._loaded.items()
+                ],
+                "hits":      self._hits,
+                "loads":     self._loads,
+                "evictions": self._evictions,
+            }
+
+    def _evict(self, keep: str) -> None:
+        # Caller holds self._lock. Oldest first; never the model just requested.
+        used = sum(e.nbytes for e in self._loaded.values())
+        for key in list(self._loaded):
+            if used <= self.memory_budget:
+                break
+            if key == keep:
+                continue
+            used -= self._loaded.pop(key).nbytes
+            self._evictions += 1
+            logger.info("Evicted model %s to stay within %.0f MB budget",
+                        key, self.memory_budget / (1024 * 1024))
@@ -0,0 +1,184 @@
+"""Pure-NumPy inference engine for the LSTM autoencoders in models/.
+
+Loading a .keras file pulls in TensorFlow and Keras 3 — seconds of startup and
+hundreds of MB of RSS per worker — just to run a small stacked-LSTM
+autoencoder. This module runs the same network with vectorised NumPy:
+the input projection of every LSTM layer is one matmul over all timesteps,
+and only the recurrent term is evaluated step by step.
+
+Weights are exported once from the .keras file to a sibling .npz (layer specs
+plus float32 arrays). Exporting needs Keras; inference only needs NumPy.
+
+    python numpy_lstm.py export models/ai4i_lstm_ae_best.keras
+
+Supported layers: LSTM, Dropout (identity at inference), RepeatVector and
+TimeDistributed(Dense) — everything the shipped AI4I and MetroPT models use.
+"""
+
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    # tanh form avoids overflow in exp() for large |z|
+    return 0.5 * (np.tanh(0.5 * z) + 1.0)
+
+
+_ACTIVATIONS = {
+    "relu":    lambda z: np.maximum(z, 0.0),
+    "tanh":    np.tanh,
+    "sigmoid": _sigmoid,
+    "linear":  lambda z: z,
+}
+
+
+def npz_path_for(keras_path: str) -> str:
+    """Path of the exported weights that belong to a .keras model file."""
+    return os.path.splitext(keras_path)[0] + ".npz"
+
+
+# ---------------------------------------------------------------------------
+# Export (requires Keras)
+# ---------------------------------------------------------------------------
+
+def export_weights(keras_path: str, npz_path: Optional[str] = None) -> str:
+    """Export a Keras LSTM autoencoder's layer specs and weights to .npz."""
+    import keras  # standalone Keras 3 — only needed for export
+
+    npz_path = npz_path or npz_path_for(keras_path)
+    model = keras.models.load_model(keras_path, compile=False)
+
+    specs: List[Dict[str, Any]] = []
+    arrays: Dict[str, np.ndarray] = {}
+    for layer in model.layers:
+        kind = layer.__class__.__name__
+        cfg = layer.get_config()
+        if kind in ("InputLayer", "Dropout"):
+            continue
+        idx = len(specs)
+        if kind == "LSTM":
+            kernel, recurrent, bias = layer.get_weights()
+            specs.append({
+                "type": "lstm",
+                "name": layer.name,
+                "units": cfg["units"],
+                "activation": cfg["activation"],
+                "recurrent_activation": cfg["recurrent_activation"],
+                "return_sequences": cfg["return_sequences"],
+            })
+            arrays[f"{idx}_kernel"] = kernel
+            arrays[f"{idx}_recurrent_kernel"] = recurrent
+            arrays[f"{idx}_bias"] = bias
+        elif kind == "RepeatVector":
+            specs.append({"type": "repeat", "name": layer.name, "n": cfg["n"]})
+        elif kind == "TimeDistributed" and layer.layer.__class__.__name__ == "Dense":
+            kernel, bias = layer.get_weights()
+            specs.append({
+                "type": "dense",
+                "name": layer.name,
+                "activation": layer.layer.get_config()["activation"],
+            })
+            arrays[f"{idx}_kernel"] = kernel
+            arrays[f"{idx}_bias"] = bias
+        else:
+            raise ValueError(f"Unsupported layer for NumPy export: {kind} ({layer.name})")
+
+    input_shape = list(model.input_shape[1:])
+    meta = {"source": os.path.basename(keras_path), "input_shape": input_shape, "layers": specs}
+    np.savez(npz_path, __meta__=np.array(json.dumps(meta)),
+             **{k: np.asarray(v, dtype=np.float32) for k, v in arrays.items()})
+    return npz_path
+
+
+# ---------------------------------------------------------------------------
+# Inference (NumPy only)
+# ---------------------------------------------------------------------------
+
+class NumpyLSTMAutoencoder:
+    """Drop-in replacement for `keras.Model.predict` on exported LSTM autoencoders."""
+
+    def __init__(self, meta: Dict[str, Any], arrays: Dict[str, np.ndarray]):
+        self.input_shape = tuple(meta["input_shape"])
+        self.source = meta.get("source", "")
+        self.nbytes = sum(a.nbytes for a in arrays.values())
+        self._layers = []
+        for idx, spec in enumerate(meta["layers"]):
+            layer = dict(spec)
+            if spec["type"] == "lstm":
+                layer["kernel"] = arrays[f"{idx}_kernel"]
+                layer["recurrent_kernel"] = arrays[f"{idx}_recurrent_kernel"]
+                layer["bias"] = arrays[f"{idx}_bias"]
+                layer["act"] = _ACTIVATIONS[spec["activation"]]
+                layer["rec_act"] = _ACTIVATIONS[spec["recurrent_activation"]]
+            elif spec["type"] == "dense":
+                layer["kernel"] = arrays[f"{idx}_kernel"]
+                layer["bias"] = arrays[f"{idx}_bias"]
+                layer["act"] = _ACTIVATIONS[spec["activation"]]
+            self._layers.append(layer)
+
+    @classmethod
+    def load(cls, npz_path: str) -> "NumpyLSTMAutoencoder":
+        with np.load(npz_path, allow_pickle=False) as data:
+            meta = json.loads(str(data["__meta__"]))
+            arrays = {k: data[k] for k in data.files if k != "__meta__"}
+        return cls(meta, arrays)
+
+    def predict(self, x: np.ndarray, batch_size: Optional[int] = None, verbose: int = 0) -> np.ndarray:
+        """Reconstruct an (N, T, F) batch; signature mirrors `keras.Model.predict`."""
+        h = np.asarray(x, dtype=np.float32)
+        for layer in self._layers:
+            kind = layer["type"]
+            if kind == "lstm":
+                h = self._lstm(h, layer)
+            elif kind == "repeat":
+                h = np.repeat(h[:, np.newaxis, :], layer["n"], axis=1)
+            else:  # dense, applied to every timestep
+                h = layer["act"](h @ layer["kernel"] + layer["bias"])
+        return h
+
+    def __call__(self, x: np.ndarray) -> np.ndarray:
+        return self.predict(x)
+
+    @staticmethod
+    def _lstm(x: np.ndarray, layer: Dict[str, Any]) -> np.ndarray:
+        n, steps, _ = x.shape
+        units = layer["units"]
+        act, rec_act = layer["act"], layer["rec_act"]
+        # Input projection for all timesteps at once: (N, T, 4u)
+        x_proj = x @ layer["kernel"] + layer["bias"]
+        recurrent = layer["recurrent_kernel"]
+        h = np.zeros((n, units), dtype=np.float32)
+        c = np.zeros((n, units), dtype=np.float32)
+        outputs = np.empty((n, steps, units), dtype=np.float32) if layer["return_sequences"] else None
+        for t in range(steps):
+            z = x_proj[:, t, :] + h @ recurrent
+            # Keras gate order: input, forget, cell candidate, output
+            i = rec_act(z[:, :units])
+            f = rec_act(z[:, units:2 * units])
+            g = act(z[:, 2 * units:3 * units])
+            o = rec_act(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * act(c)
+            if outputs is not None:
+                outputs[:, t, :] = h
+        return outputs if outputs is not None else h
+
+
+def load_model(keras_path: str) -> NumpyLSTMAutoencoder:
+    """Load the NumPy engine for a .keras model, exporting its weights on first use."""
+    npz_path = npz_path_for(keras_path)
+    if not os.path.exists(npz_path):
+        export_weights(keras_path, npz_path)
+    return NumpyLSTMAutoencoder.load(npz_path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "export":
+        print("usage: python numpy_lstm.py export <model.keras> [<out.npz>]")
+        sys.exit(2)
+    out = export_weights(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    print(f"Exported {sys.argv[2]} -> {out}")
@@ -0,0 +1,154 @@
+"""Keyset (cursor) pagination for the list endpoints.
+
+The list endpoints only took a `limit`, so rows beyond the first page could not
+be reached, and skip/offset paging would make every deep page scan everything
+before it. A page is instead the `limit` documents that sort after the last
+document of the previous page, on (sort field, `_id`) — a total order, so no
+row is skipped or repeated when values tie. With a compound index on the same
+keys (see db._create_indexes) a deep page costs one index seek, like the first.
+
+The position is handed to clients as an opaque cursor string; endpoints send
+it in the X-Next-Cursor response header (absent on the last page) and take it
+back as the `cursor` query parameter. Lists served from memory and ordered by
+a unique key (equipment) use the key alone.
+
+Sort fields may hold mixed types — seeded maintenance tasks store `due_date`
+as an ISO string, newer ones as a date, some have none. MongoDB orders such
+values by type bracket (null < numbers < strings < dates), so the filter for
+"after this value" also takes every later bracket whole.
+"""
+
+import base64
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+ASCENDING = 1
+DESCENDING = -1
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# BSON sort order of the value types used by sort fields here
+_BRACKETS = ("null", "number", "string", "date")
+
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor string that was not produced by `encode_cursor`."""
+
+
+def _bracket(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        raise InvalidCursor(f"Unsupported sort value type: {type(value).__name__}")
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, datetime):
+        return "date"
+    raise InvalidCursor(f"Unsupported sort value type: {type(value).__name__}")
+
+
+def encode_cursor(value: Any, oid: ObjectId) -> str:
+    """Opaque cursor for the position just after (value, oid)."""
+    kind = _bracket(value)
+    if kind == "date":
+        if value.tzinfo is None:   # Motor returns naive UTC datetimes
+            value = value.replace(tzinfo=timezone.utc)
+        value = value.isoformat()
+    raw = json.dumps({"t": kind, "v": value, "id": str(oid)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, ObjectId]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        kind, value, oid = data["t"], data["v"], ObjectId(data["id"])
+        if kind == "date":
+            value = datetime.fromisoformat(value)
+        if _bracket(value) != kind:
+            raise ValueError(kind)
+    except Exception as exc:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from exc
+    return value, oid
+
+
+def encode_key_cursor(key: str) -> str:
+    """Opaque cursor for the position just after a unique string key (e.g. equipment_id)."""
+    return base64.urlsafe_b64encode(json.dumps({"k": key}).encode()).decode().rstrip("=")
+
+
+def decode_key_cursor(cursor: str) -> str:
+    """The key from `encode_key_cursor`; raises HTTPException(400) for anything else."""
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["k"]
+        if not isinstance(key, str):
+            raise ValueError(key)
+    except Exception:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {cursor!r}")
+    return key
+
+
+def keyset_filter(field: str, direction: int, value: Any, oid: ObjectId) -> Dict[str, Any]:
+    """MongoDB filter for documents sorting after (value, oid) on [(field, dir), (_id, dir)]."""
+    cmp = "$gt" if direction == ASCENDING else "$lt"
+    clauses: List[Dict[str, Any]] = [{field: value, "_id": {cmp: oid}}]
+    if value is not None:
+        clauses.append({field: {cmp: value}})
+    i = _BRACKETS.index(_bracket(value))
+    later = _BRACKETS[i + 1:] if direction == ASCENDING else _BRACKETS[:i]
+    for kind in later:
+        clauses.append({field: None} if kind == "null" else {field: {"$type": kind}})
+    return {"$or": clauses}
+
+
+def after_cursor(query: Dict[str, Any], field: str, direction: int,
+                 cursor: Optional[str]) -> Dict[str, Any]:
+    """`query` narrowed to documents after `cursor` (unchanged without one).
+
+    Raises HTTPException(400) for a malformed cursor.
+    """
+    if not cursor:
+        return query
+    try:
+        value, oid = decode_cursor(cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    after = keyset_filter(field, direction, value, oid)
+    return {"$and": [query, after]} if query else after
+
+
+async def fetch_page(collection, query: Dict[str, Any], field: str, direction: int,
+                     limit: int, cursor: Optional[str] = None,
+                     projection: Optional[Dict[str, Any]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of `collection` sorted on (field, _id); returns (docs, next cursor or None).
+
+    `_id` is read even when the projection leaves it out (it is the
+    tie-breaker) and dropped again before returning.
+    """
+    query = after_cursor(query, field, direction, cursor)
+    hide_id = projection is not None and projection.get("_id") == 0
+    if hide_id:
+        projection = {k: v for k, v in projection.items() if k != "_id"} or None
+
+    # One extra document tells whether another page exists
+    docs = await (
+        collection.find(query, projection)
+        .sort([(field, direction), ("_id", direction)])
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        last = docs[-1]
+        next_cursor = encode_cursor(last.get(field), last["_id"])
+    if hide_id:
+        for doc in docs:
+            doc.pop("_id", None)
+    return docs, next_cursor
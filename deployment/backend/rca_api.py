@@ -15,19 +15,44 @@ Endpoints:
   Raises F1 from 0.542 to 0.947 and recall from 37.9% to 92.7%
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
+from fastapi import FastAPI, HTTPException, Header, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
-from typing import Dict, List, Any, Optional
+from typing import Callable, Dict, List, Any, Optional
 import uvicorn
 import os
 import json
 import sys
 from datetime import datetime, timezone, timedelta
 import uuid
-import threading
+import asyncio
+import functools
+import time
+from dataclasses import dataclass
 import numpy as np
 
+from dashboard_summary import DashboardCounters
+from deadband import DeadbandFilter
+from downsample import downsample_points
+from equipment_state import EquipmentStateTable
+from export_stream import EXPORT_BATCH_SIZE, export_response, pick_format
+from inference_batcher import InferenceBatcher
+from inference_executor import InferenceExecutor, InferenceSaturated
+from kg_fast_path import KGFastPath
+from model_registry import ModelRegistry, ModelSpec, UnknownModel
+from pagination import (
+    ASCENDING, DESCENDING, NEXT_CURSOR_HEADER, after_cursor, decode_key_cursor,
+    encode_key_cursor, fetch_page,
+)
+from rca_coalescer import WorkflowCoalescer
+from rca_jobs import JobRequest, RCAJobQueue, RCAQueueFull, job_store_from_env
+from read_cache import ReadThroughCache
+from rule_signals import column_signals, signals_for_columns
+from sequence_buffer import SequenceBufferPool
+from timeseries import SensorTimeSeries
+from write_behind import WriteBehindBuffer, WriteBufferFull
+
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -52,6 +77,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "X-Sensor-Resolution", "X-Downsampled-From"],
 )
 
 # ---------------------------------------------------------------------------
@@ -60,13 +86,26 @@ app.add_middleware(
 
 @app.on_event("startup")
 async def startup_event():
+    # Warm the model in the background; /api/ready reports 503 until it is done
+    # (or has failed, see _run_model_warmup)
+    if _WARMUP_BATCH_SIZES:
+        app.state.warmup_task = asyncio.create_task(_run_model_warmup())
+    else:
+        _model_warmup["status"] = "ready"
+    mongo_ready = False
     if _MONGO_AVAILABLE:
         try:
             db = await init_db()
+            mongo_ready = True
+            # Equipment health and dashboard counters are served from memory from here on
+            await equipment_state.load()
+            await dashboard_counters.reconcile()
+            # Replays any ingest writes spooled to disk by a previous run
+            write_buffer.start()
             # Load persisted cost config into memory cache
             try:
-                costs = await seed_cost_config(db)
-                _cost_cache.update(costs)
+                await seed_cost_config(db)
+                await config_cache.get("maintenance_costs")
             except Exception as exc:
                 import logging
                 logging.getLogger(__name__).warning("Cost config load failed: %s", exc)
@@ -74,11 +113,21 @@ async def startup_event():
             # Log but don't crash — API still works without Mongo
             import logging
             logging.getLogger(__name__).warning("MongoDB init failed: %s", exc)
+    # Picks up RCA jobs a previous run left queued (or running, once their lease lapses)
+    await rca_queue.start(job_store_from_env(get_db if mongo_ready else None))
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    for pipeline in _pipelines.values():
+        await pipeline.batcher.close()
+    inference_executor.shutdown()
+    await rca_queue.close()
     if _MONGO_AVAILABLE:
+        # Drain buffered ingest writes and equipment health before the client goes away
+        await dashboard_counters.close()
+        await write_buffer.close()
+        await equipment_state.close()
         await close_db()
 
 
@@ -86,13 +135,40 @@ async def shutdown_event():
 workflow_results = {}
 workflow_status = {}
 
-# In-memory cost cache — loaded from DB at startup, updated via PUT endpoint
-_cost_cache: Dict[str, int] = {
+# Costs used until the settings document has been read
+_DEFAULT_COSTS: Dict[str, int] = {
     "critical": 890,
     "high": 650,
     "medium": 320,
     "low": 180,
 }
+
+# Settings documents are read through a TTL cache (see read_cache.py); it is the
+# only in-process copy of the cost config — loaded at startup, replaced by the PUT endpoint
+config_cache = ReadThroughCache.from_env()
+
+
+def _cost_config_doc(cfg: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The stored cost config (or none) with every severity and the currency filled in."""
+    cfg = cfg or {"config_id": "maintenance_costs"}
+    return {**cfg, "costs": {**_DEFAULT_COSTS, **cfg.get("costs", {})},
+            "currency": cfg.get("currency", "USD")}
+
+
+async def _load_cost_config() -> Dict[str, Any]:
+    cfg = await get_db().settings.find_one({"config_id": "maintenance_costs"}, {"_id": 0})
+    return _cost_config_doc(cfg)
+
+
+config_cache.register("maintenance_costs", _load_cost_config)
+
+
+def _costs() -> Dict[str, int]:
+    """Per-severity costs for callers that cannot await (at most one TTL stale)."""
+    if not _MONGO_AVAILABLE:
+        return _DEFAULT_COSTS
+    return config_cache.get_nowait("maintenance_costs", {"costs": _DEFAULT_COSTS})["costs"]
+
 workflow_ensemble_scores = {}  # stores ensemble scoring results per workflow
 
 
@@ -106,6 +182,72 @@ workflow_ensemble_scores = {}  # stores ensemble scoring results per workflow
 # Result:  F1 0.542 → 0.947 (+40.5 pp), Recall 37.9% → 92.7% (+54.8 pp)
 # =================================================================
 
+def _round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """Vectorised `round(v, ndigits)` that returns exactly what Python's round() would.
+
+    `np.round` scales, rounds and divides, which can land on the other side of
+    a .5 boundary than Python's correctly rounded result. Elements whose scaled
+    value is within float error of a boundary (and non-finite or huge values)
+    are rounded by round() itself.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** ndigits
+    scaled = values * scale
+    out = np.rint(scaled)
+    # arg-reductions, unlike max()/min(), need no reduction scratch
+    largest = max(scaled.item(scaled.argmax()), -scaled.item(scaled.argmin())) if scaled.size else 0.0
+    if largest < 2.0 ** 52:  # finite, with room for `ndigits` decimals
+        # |scaled - out| is at most 0.5; within float error of it lies a boundary
+        slow = np.abs(scaled - out) >= 0.5 - (1e-9 + largest * 1e-12)
+        exact = np.flatnonzero(slow) if np.count_nonzero(slow) else ()
+    else:
+        exact = range(values.size)  # rare: take the exact path throughout
+    out = out / scale
+    for idx in exact:
+        out.flat[idx] = round(float(values.flat[idx]), ndigits)
+    return out
+
+
+def _top_k_features(feature_errors: np.ndarray, k: int = 5):
+    """Column indices and 6-decimal errors of each row's k largest feature errors.
+
+    k `argmax` passes, each masking the column it picked, order every row's
+    top k by descending error with ties by column order, as a stable sort of
+    all F columns would. Unlike a sort or partition they need no scratch
+    space, which outweighs the work itself for a single reading. Returns
+    (N, k) int and float64 arrays.
+    """
+    errors = np.asarray(feature_errors)
+    n, n_features = errors.shape
+    k = min(k, n_features)
+    remaining = np.array(errors, dtype=np.result_type(errors.dtype, np.float32))  # picked columns masked
+    flat = remaining.reshape(-1)
+    row_starts = np.arange(0, n * n_features, n_features)
+    top_idx = np.empty((n, k), dtype=np.intp)
+    top_errors = np.empty((n, k), dtype=remaining.dtype)
+    for j in range(k):
+        picked = remaining.argmax(axis=1)
+        top_idx[:, j] = picked
+        picked = picked + row_starts
+        top_errors[:, j] = flat.take(picked)
+        flat.put(picked, -np.inf)
+    return top_idx, _round_like_python(top_errors, 6)
+
+
+def _top_feature_list(feature_names, columns: List[int], errors: List[float]) -> List[Dict[str, Any]]:
+    """`[{'feature_name', 'error'}]` for one reading's top columns, at the response/persistence boundary."""
+    return [{'feature_name': feature_names[j], 'error': e} for j, e in zip(columns, errors)]
+
+
+def _top_feature_dicts(feature_names, top_idx: np.ndarray, top_errors: np.ndarray) -> List[List[Dict[str, Any]]]:
+    """`_top_feature_list` for every row of `_top_k_features` output."""
+    # Row by row, so only one row's index and error lists exist at a time
+    return [
+        _top_feature_list(feature_names, idx_row.tolist(), err_row.tolist())
+        for idx_row, err_row in zip(top_idx, top_errors)
+    ]
+
+
 class EnsembleScorer:
     """Combines LSTM reconstruction error with RF-derived feature probability."""
 
@@ -133,15 +275,32 @@ class EnsembleScorer:
     ALPHA = 0.6                 # LSTM weight
     BETA  = 0.4                 # RF weight
 
+    # Cap on memoised fuzzy lookups; feature names can come from API callers
+    _MAX_CACHED_NAMES = 4096
+
+    def __init__(self, lstm_threshold: Optional[float] = None):
+        # Per-model override of the reconstruction-error threshold
+        self.lstm_threshold = lstm_threshold or self.LSTM_THRESHOLD_95
+        self._importance_cache: Dict[str, float] = dict(self.FEATURE_IMPORTANCES)
+
     def _get_importance(self, feature_name: str) -> float:
-        """Return importance for a feature, with fuzzy fallback."""
-        if feature_name in self.FEATURE_IMPORTANCES:
-            return self.FEATURE_IMPORTANCES[feature_name]
+        """Return importance for a feature, with fuzzy fallback (memoised per name)."""
+        cached = self._importance_cache.get(feature_name)
+        if cached is not None:
+            return cached
+        importance = 0.05  # default for unknown features
         name_lower = feature_name.lower()
         for key, val in self.FEATURE_IMPORTANCES.items():
             if key.lower() in name_lower or name_lower in key.lower():
-                return val
-        return 0.05  # default for unknown features
+                importance = val
+                break
+        if len(self._importance_cache) < self._MAX_CACHED_NAMES:
+            self._importance_cache[feature_name] = importance
+        return importance
+
+    def importance_vector(self, feature_names: List[str]) -> np.ndarray:
+        """Importances for a model's feature columns, resolved once for `compute_batch`."""
+        return np.array([self._get_importance(name) for name in feature_names], dtype=np.float64)
 
     def compute_rf_probability(self, top_features: List[Dict[str, Any]]) -> float:
         """Derive RF probability from importance-weighted feature errors."""
@@ -164,9 +323,12 @@ class EnsembleScorer:
     def compute(self, reconstruction_error: float,
                 top_features: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Return full ensemble scoring dict."""
-        lstm_norm = round(min(reconstruction_error / self.LSTM_THRESHOLD_95, 1.0), 4)
+        lstm_norm = round(min(reconstruction_error / self.lstm_threshold, 1.0), 4)
         rf_prob   = self.compute_rf_probability(top_features)
         ensemble  = round(self.ALPHA * lstm_norm + self.BETA * rf_prob, 4)
+        return self.scores_dict(lstm_norm, rf_prob, ensemble)
+
+    def scores_dict(self, lstm_norm: float, rf_prob: float, ensemble: float) -> Dict[str, Any]:
         return {
             "lstm_normalized_score": lstm_norm,
             "rf_probability":        rf_prob,
@@ -175,16 +337,58 @@ class EnsembleScorer:
             "formula":               f"{self.ALPHA} × LSTM_norm + {self.BETA} × RF_prob",
         }
 
+    def compute_batch(self, reconstruction_errors: np.ndarray, feature_errors: np.ndarray,
+                      importances: np.ndarray, top_k: int = 5) -> Dict[str, np.ndarray]:
+        """Vectorised `compute` for N readings at once.
+
+        `feature_errors` is the (N, F) per-feature reconstruction MSE and
+        `importances` the (F,) vector from `importance_vector`. Each row is
+        reduced to its top-k features with `_top_k_features`, the same arrays
+        the `top_features` dicts are built from, so every returned value is
+        bit-identical to `compute` on those dicts. Returns (N,) arrays keyed
+        like the `compute` dict.
+        """
+        top_idx, top_errors = _top_k_features(feature_errors, top_k)
+        return self.score_top_k(reconstruction_errors, top_idx, top_errors, importances)
+
+    def score_top_k(self, reconstruction_errors: np.ndarray, top_idx: np.ndarray,
+                    top_errors: np.ndarray, importances: np.ndarray) -> Dict[str, np.ndarray]:
+        """`compute_batch` on rows already reduced by `_top_k_features`."""
+        recon = np.asarray(reconstruction_errors, dtype=np.float64).reshape(-1)
+        top_imps = importances.take(top_idx)
+        if top_imps.shape[1] < 8:
+            # numpy sums fewer than 8 contiguous values left to right, in
+            # compute()'s accumulation order
+            total_weight = top_imps.sum(axis=1)
+            weighted_sum = (top_errors * top_imps).sum(axis=1)
+        else:
+            total_weight = np.zeros(len(recon))
+            weighted_sum = np.zeros(len(recon))
+            for j in range(top_imps.shape[1]):  # same accumulation order as compute()
+                weighted_sum += top_errors[:, j] * top_imps[:, j]
+                total_weight += top_imps[:, j]
+        unweighted = total_weight == 0   # scored 0.0, as compute() does
+        if np.count_nonzero(unweighted):
+            total_weight = np.where(unweighted, 1.0, total_weight)
+        rf_prob = _round_like_python(np.minimum((weighted_sum / total_weight) / 0.08, 1.0), 4)
+        if np.count_nonzero(unweighted):
+            rf_prob[unweighted] = 0.0
+
+        lstm_norm = _round_like_python(np.minimum(recon / self.lstm_threshold, 1.0), 4)
+        ensemble = _round_like_python(self.ALPHA * lstm_norm + self.BETA * rf_prob, 4)
+        return {
+            "lstm_normalized_score": lstm_norm,
+            "rf_probability":        rf_prob,
+            "ensemble_score":        ensemble,
+        }
+
 
 ensemble_scorer = EnsembleScorer()
 
 # =================================================================
-# LSTM MODEL LAZY LOADER  (for /api/sensor/ingest)
+# LSTM MODEL REGISTRY  (for /api/sensor/ingest)
 # =================================================================
 
-_lstm_model = None
-_lstm_model_lock = threading.Lock()
-
 # Dataset statistics computed from ai4i_engineered.csv (used for z-score normalization)
 _FEATURE_STATS = {
     'air_temp':     {'mean': 300.0049, 'std': 2.0003},
@@ -217,32 +421,81 @@ _FEATURE_NAMES = [
 _MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
 
 
-def _load_lstm_model():
-    """Lazy-load the LSTM Autoencoder model once and cache it globally.
+class _TracedKerasModel:
+    """Keras model served through a traced, fixed-signature forward pass.
 
-    Uses standalone `keras` (>=3.0) directly rather than `tf.keras` to ensure
-    compatibility with models saved under Keras 3's serialization format
-    (`keras.src.models.functional`). TF 2.15's bundled Keras 2 cannot load them.
+    `model.predict` builds a data pipeline and callback stack on every call,
+    which dominates the cost of the small batches served by ingest. Tracing
+    `model(x, training=False)` once with the model's input signature, e.g.
+    (None, 10, 13), gives a single reusable graph for every batch size.
     """
-    global _lstm_model
-    if _lstm_model is not None:
-        return _lstm_model
-    with _lstm_model_lock:
-        if _lstm_model is not None:  # double-checked locking
-            return _lstm_model
+
+    def __init__(self, model):
+        self.model = model
+        self.input_shape = model.input_shape
+        self.nbytes = sum(w.nbytes for w in model.get_weights())
         try:
-            import keras  # standalone Keras 3 — required for .keras format
-            model_path = os.path.join(_MODELS_DIR, 'ai4i_lstm_ae_best.keras')
-            _lstm_model = keras.models.load_model(model_path, compile=False)
-        except Exception as e:
-            raise RuntimeError(f"Failed to load LSTM model: {e}")
-    return _lstm_model
+            import tensorflow as tf
+            signature = [tf.TensorSpec((None,) + tuple(model.input_shape[1:]), tf.float32)]
+            self._forward = tf.function(lambda x: self.model(x, training=False),
+                                        input_signature=signature)
+        except ImportError:  # non-TF Keras backend — keep the generic path
+            self._forward = None
+
+    def predict(self, x: np.ndarray, batch_size: Optional[int] = None, verbose: int = 0) -> np.ndarray:
+        if self._forward is None:
+            return self.model.predict(x, batch_size=batch_size, verbose=verbose)
+        return self._forward(np.asarray(x, dtype=np.float32)).numpy()
+
+
+def _load_model_file(model_path: str):
+    """Load one .keras LSTM Autoencoder with the engine chosen by RCA_INFERENCE_BACKEND.
+
+    Called by the model registry on first use of each model:
+      - "keras" (default): standalone `keras` (>=3.0) directly rather than
+        `tf.keras`, to stay compatible with models saved under Keras 3's
+        serialization format (`keras.src.models.functional`). TF 2.15's
+        bundled Keras 2 cannot load them.
+      - "numpy": numpy_lstm.NumpyLSTMAutoencoder on the exported .npz weights —
+        same outputs within float32 tolerance, without importing TensorFlow.
+    """
+    backend = os.getenv('RCA_INFERENCE_BACKEND', 'keras').lower()
+    try:
+        if backend == 'numpy':
+            import numpy_lstm
+            return numpy_lstm.load_model(model_path)
+        import keras  # standalone Keras 3 — required for .keras format
+        return _TracedKerasModel(keras.models.load_model(model_path, compile=False))
+    except Exception as e:
+        raise RuntimeError(
+            f"Failed to load LSTM model {os.path.basename(model_path)} ({backend} backend): {e}"
+        )
+
+
+# Raw SensorReading fields in model column order, with the dataset mean used
+# when a piece of equipment does not report that sensor.
+_SENSOR_FIELDS = (
+    ('air_temperature',     'air_temp'),
+    ('process_temperature', 'proc_temp'),
+    ('rotational_speed',    'rpm'),
+    ('torque',              'torque'),
+    ('tool_wear',           'tool_wear'),
+)
 
 
-def _build_feature_vector(air_temp: float, proc_temp: float, rpm: float,
-                          torque: float, tool_wear: float) -> np.ndarray:
-    """Convert 5 raw sensor readings into the 13-feature vector the LSTM expects.
+def _resolve_sensor_values(reading) -> List[float]:
+    """Return the 5 raw sensor values of a reading, filling absent fields with dataset means."""
+    values = []
+    for field, stat_key in _SENSOR_FIELDS:
+        value = getattr(reading, field)
+        values.append(value if value is not None else _FEATURE_STATS[stat_key]['mean'])
+    return values
 
+
+def _build_feature_matrix(raw: np.ndarray) -> np.ndarray:
+    """Convert an (N, 5) matrix of raw readings into the (N, 13) features the LSTM expects.
+
+    Columns of `raw` are air temp, process temp, RPM, torque and tool wear.
     The LSTM autoencoder was trained by passing all 13 columns through
     sklearn StandardScaler before windowing.  That means every column —
     including the raw sensor columns at positions 0-4 — must be z-scored
@@ -250,6 +503,8 @@ def _build_feature_vector(air_temp: float, proc_temp: float, rpm: float,
     MSE ≈ 1551² ≈ 2.4M, making every reading appear critical.
     """
     s = _FEATURE_STATS
+    raw = np.asarray(raw, dtype=np.float64).reshape(-1, 5)
+    air_temp, proc_temp, rpm, torque, tool_wear = raw.T
     air_norm    = (air_temp  - s['air_temp']['mean'])  / s['air_temp']['std']
     proc_norm   = (proc_temp - s['proc_temp']['mean']) / s['proc_temp']['std']
     rpm_norm    = (rpm       - s['rpm']['mean'])       / s['rpm']['std']
@@ -258,42 +513,247 @@ def _build_feature_vector(air_temp: float, proc_temp: float, rpm: float,
     temp_diff   = proc_temp - air_temp
     power_est   = (torque * rpm) / 9549.3   # mechanical power estimate (kW)
     thermal     = proc_temp / air_temp      # thermal stress ratio
-    # Normalize engineered features using training-set stats
     temp_diff_norm = (temp_diff - s['temp_diff']['mean']) / s['temp_diff']['std']
     power_norm     = (power_est - s['power']['mean'])     / s['power']['std']
     thermal_norm   = (thermal   - s['thermal']['mean'])   / s['thermal']['std']
-    # All 13 values are now z-scored, matching the training distribution
-    return np.array([
+    return np.column_stack([
         air_norm, proc_norm, rpm_norm, torque_norm, wear_norm,
         air_norm, proc_norm, rpm_norm, torque_norm, wear_norm,
         temp_diff_norm, power_norm, thermal_norm,
-    ], dtype=np.float32)
+    ]).astype(np.float32)
+
+
+# MetroPT-3 autoencoders take 43 engineered features per timestep. Gateways
+# apply the training scaler before upload, so ingest passes them through as-is.
+_METROPT_N_FEATURES = 43
+_METROPT_FEATURE_NAMES = [f'metropt_feature_{i:02d}' for i in range(_METROPT_N_FEATURES)]
+
 
+def _metropt_feature_matrix(raw: np.ndarray) -> np.ndarray:
+    """(N, 43) pre-scaled MetroPT feature rows as the float32 model input."""
+    return np.asarray(raw, dtype=np.float32).reshape(-1, _METROPT_N_FEATURES)
 
-def _run_lstm_inference(feature_vec: np.ndarray):
+
+# One entry per model file, keyed "<domain>/<version>"; models load on first
+# use and are unloaded LRU-first past RCA_MODEL_MEMORY_BUDGET_MB.
+model_registry = ModelRegistry.from_env(_MODELS_DIR, _load_model_file)
+model_registry.register(ModelSpec(
+    'ai4i', 'best', 'ai4i_lstm_ae_best.keras', _FEATURE_NAMES, _build_feature_matrix,
+), default=True)
+model_registry.register(ModelSpec(
+    'ai4i', 'final', 'ai4i_lstm_ae_final.keras', _FEATURE_NAMES, _build_feature_matrix,
+))
+# No MetroPT calibration (threshold, scaler statistics, feature importances)
+# ships yet, so its ensemble scores mean nothing: readings are scored and
+# stored, but never raise alerts, RCA workflows or health changes.
+model_registry.register(ModelSpec(
+    'metropt', 'best', 'metropt_lstm_ae_best.keras', _METROPT_FEATURE_NAMES, _metropt_feature_matrix,
+    calibrated=False,
+), default=True)
+model_registry.register(ModelSpec(
+    'metropt', 'final', 'metropt_lstm_autoencoder.keras', _METROPT_FEATURE_NAMES, _metropt_feature_matrix,
+    calibrated=False,
+))
+
+
+def _load_lstm_model(model_key: Optional[str] = None):
+    """Return a loaded LSTM Autoencoder from the registry (default: the AI4I model)."""
+    return model_registry.get(model_key or model_registry.spec('ai4i').key)
+
+
+def _preload_models() -> List[str]:
+    """Load the RCA_MODEL_PRELOAD models (every inference worker does so on start)."""
+    return model_registry.preload()
+
+
+# Per-model scorer and its importance vector, resolved once per process
+_model_scorers: Dict[str, Any] = {}
+_SCORE_COLUMNS = ('lstm_normalized_score', 'rf_probability', 'ensemble_score')
+
+
+def _get_scorer(spec: ModelSpec):
+    """(EnsembleScorer, importance vector) for a model's feature columns."""
+    cached = _model_scorers.get(spec.key)
+    if cached is None:
+        scorer = EnsembleScorer(lstm_threshold=spec.lstm_threshold)
+        cached = _model_scorers[spec.key] = (scorer, scorer.importance_vector(spec.feature_names))
+    return cached
+
+
+def _run_lstm_inference_batch(windows: np.ndarray, model_key: Optional[str] = None):
     """
-    Run LSTM autoencoder inference on a single feature vector.
-    Returns (reconstruction_error, top_features) where top_features is
-    a list of dicts sorted by per-feature MSE descending.
+    Run LSTM autoencoder inference on an (N, 10, F) window tensor in one forward pass
+    and score every window with the ensemble scorer.
+    Returns (reconstruction_errors, top_columns, top_errors, scores), row-aligned
+    arrays in input order — see `_score_reconstruction`.
     """
-    model = _load_lstm_model()
-    window_size = 10  # model input shape: (None, 10, 13)
-    # Repeat the single reading to create a pseudo-sequence window
-    window = np.tile(feature_vec, (window_size, 1))   # (10, 13)
-    x = window[np.newaxis, ...]                        # (1, 10, 13)
-    x_hat = model.predict(x, verbose=0)               # (1, 10, 13)
-    per_step_error = np.mean((x - x_hat) ** 2, axis=1)  # (1, 13)
-    per_feature_error = per_step_error[0]                # (13,)
-    reconstruction_error = float(np.mean(per_feature_error))
-    top_features = sorted(
-        [
-            {'feature_name': _FEATURE_NAMES[i], 'error': round(float(per_feature_error[i]), 6)}
-            for i in range(len(_FEATURE_NAMES))
-        ],
-        key=lambda x: x['error'],
-        reverse=True,
-    )[:5]  # top 5 contributing features
-    return reconstruction_error, top_features
+    spec = model_registry.spec(*(model_key or 'ai4i').split('/', 1))
+    model = model_registry.get(spec.key)
+    x_hat = model.predict(windows, batch_size=max(32, len(windows)), verbose=0)  # (N, 10, F)
+    return _score_reconstruction(spec, windows, x_hat)
+
+
+def _score_reconstruction(spec: ModelSpec, windows: np.ndarray, x_hat: np.ndarray):
+    """
+    Reduce a batch of reconstructions to per-reading results, row-aligned arrays:
+      - reconstruction_errors: (N,) window MSE per reading
+      - top_columns:           (N, 5) column indices of the top 5 features by
+                               descending MSE
+      - top_errors:            (N, 5) their MSE (6 decimals)
+      - scores:                (N, 3) lstm_normalized_score, rf_probability and
+                               ensemble_score, as EnsembleScorer.compute returns
+                               them for the matching `{'feature_name', 'error'}` dicts
+    One array path for every batch size, a single reading included: no dicts
+    or Python sorts here. Ingest builds the feature dicts from the columns
+    only where they are written into a response or document.
+    `x_hat` is overwritten when it is a writable array of the result dtype
+    (a fresh `predict` output always is).
+    """
+    if x_hat.flags.writeable and x_hat.dtype == np.result_type(windows, x_hat):
+        squared = np.subtract(windows, x_hat, out=x_hat)   # no (N, 10, F) temporary
+    else:
+        squared = windows - x_hat
+    np.square(squared, out=squared)
+    per_feature_error = np.mean(squared, axis=1)                              # (N, F)
+    reconstruction_errors = np.mean(per_feature_error, axis=1)                # (N,)
+    scorer, importances = _get_scorer(spec)
+    top_idx, top_errors = _top_k_features(per_feature_error, 5)              # top 5 contributing features
+    del per_feature_error
+    # One vectorised scoring pass for the whole (possibly coalesced) batch
+    batch_scores = scorer.score_top_k(reconstruction_errors, top_idx, top_errors, importances)
+    scores = np.empty((len(reconstruction_errors), len(_SCORE_COLUMNS)))
+    for j, column in enumerate(_SCORE_COLUMNS):
+        scores[:, j] = batch_scores[column]
+    return reconstruction_errors, top_idx, top_errors, scores
+
+
+# Warm-up state reported by /api/ready; batch sizes traced at startup
+# (RCA_WARMUP_BATCH_SIZES, comma separated; empty disables warm-up) and the
+# delay before a failed warm-up is retried, doubling up to 10 minutes
+# (RCA_WARMUP_RETRY_S).
+_WARMUP_BATCH_SIZES = [
+    int(n) for n in os.getenv('RCA_WARMUP_BATCH_SIZES', '1,8,32,64').split(',') if n.strip()
+]
+_WARMUP_RETRY_S = max(1.0, float(os.getenv('RCA_WARMUP_RETRY_S', '30')))
+_WARMUP_RETRY_MAX_S = 600.0
+_model_warmup: Dict[str, Any] = {"status": "pending"}
+
+# Models warmed up in this process (the API process or an inference worker process)
+_warmed_models: Optional[List[str]] = None
+
+
+def _warm_up_model() -> List[str]:
+    """Load the preloaded models and run dummy batches so the first real ingest is fast.
+
+    Runs once per process; later calls return the models already warmed.
+    """
+    global _warmed_models
+    if _warmed_models is None:
+        keys = _preload_models()
+        for key in keys:
+            spec = model_registry.spec(*key.split('/', 1))
+            model = model_registry.get(key)
+            for n in _WARMUP_BATCH_SIZES:
+                dummy = np.zeros((n, spec.window, spec.n_features), dtype=np.float32)
+                model.predict(dummy, batch_size=max(32, n), verbose=0)
+        _warmed_models = keys
+    return _warmed_models
+
+
+def _init_inference_worker() -> None:
+    """Initializer of every inference worker: warm it up before its first task."""
+    try:
+        if _WARMUP_BATCH_SIZES:
+            _warm_up_model()
+        else:
+            _preload_models()
+    except Exception as exc:
+        # Raising here would break the pool; _run_model_warmup reports and retries
+        import logging
+        logging.getLogger(__name__).warning("Inference worker warm-up failed: %s", exc)
+
+
+# Runs forward passes off the event loop with a bounded backlog
+# (RCA_INFERENCE_EXECUTOR / RCA_INFERENCE_WORKERS / RCA_INFERENCE_MAX_PENDING).
+inference_executor = InferenceExecutor.from_env(initializer=_init_inference_worker)
+
+
+async def _run_model_warmup() -> None:
+    """Start the inference workers and wait until they are warm.
+
+    Each worker warms itself in the executor's initializer before it takes a
+    task, so it does not matter which worker these calls land on; a call
+    that reaches a worker whose warm-up failed retries it. On failure
+    /api/ready reports "degraded" (200, with the error) rather than keeping
+    the instance out of rotation, and warm-up is retried with backoff.
+    """
+    import logging
+    _model_warmup.update(status="warming", started_at=datetime.now(timezone.utc).isoformat())
+    start = time.perf_counter()
+    delay = _WARMUP_RETRY_S
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            warmed = await asyncio.gather(*[
+                inference_executor.call(_warm_up_model) for _ in range(inference_executor.workers)
+            ])
+            break
+        except Exception as exc:
+            _model_warmup.update(status="degraded", error=str(exc), attempts=attempts,
+                                 retry_in_s=delay)
+            logging.getLogger(__name__).warning(
+                "Model warm-up failed (attempt %d), retrying in %.0f s: %s", attempts, delay, exc)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _WARMUP_RETRY_MAX_S)
+    _model_warmup.pop("error", None)
+    _model_warmup.pop("retry_in_s", None)
+    _model_warmup.update(
+        status="ready",
+        finished_at=datetime.now(timezone.utc).isoformat(),
+        duration_ms=round((time.perf_counter() - start) * 1000.0, 1),
+        attempts=attempts,
+        batch_sizes=_WARMUP_BATCH_SIZES,
+        models=warmed[0],
+    )
+
+
+@dataclass
+class _ModelPipeline:
+    """Per-model serving state, created on the first ingest for that model."""
+    spec: ModelSpec
+    # Last 10 feature vectors per machine, so the LSTM sees each machine's real
+    # sequence (RCA_WINDOW_MAX_MACHINES / RCA_WINDOW_IDLE_SECONDS bound memory).
+    sequence_buffers: SequenceBufferPool
+    # Coalesces concurrent ingest calls into shared forward passes
+    # (RCA_BATCH_WINDOW_MS / RCA_BATCH_MAX_SIZE / RCA_BATCHING_ENABLED).
+    batcher: InferenceBatcher
+    # SWRL rule signals of each feature column, sent with RCA payloads (rule_signals.py)
+    feature_signals: List[Any]
+    # Skips inference for readings that barely moved since the machine's last one
+    # (RCA_DEADBAND_ENABLED / RCA_DEADBAND_TOLERANCES / RCA_DEADBAND_MAX_COALESCE).
+    deadband: Optional[DeadbandFilter] = None
+
+
+_pipelines: Dict[str, _ModelPipeline] = {}
+
+
+def _get_pipeline(spec: ModelSpec) -> _ModelPipeline:
+    pipeline = _pipelines.get(spec.key)
+    if pipeline is None:
+        pipeline = _pipelines[spec.key] = _ModelPipeline(
+            spec=spec,
+            sequence_buffers=SequenceBufferPool.from_env(spec.window, spec.n_features),
+            batcher=InferenceBatcher.from_env(
+                functools.partial(_run_lstm_inference_batch, model_key=spec.key),
+                inference_executor,
+            ),
+            feature_signals=column_signals(spec.feature_names),
+            # The deadband compares raw AI4I sensor fields
+            deadband=(DeadbandFilter.from_env([f for f, _ in _SENSOR_FIELDS])
+                      if spec.domain == 'ai4i' else None),
+        )
+    return pipeline
 
 
 # =================================================================
@@ -363,6 +823,10 @@ class RCAResult(BaseModel):
     final_explanation: Optional[str] = None
     explanation_file: Optional[str] = None
 
+    # Which path produced the result: "llm", "kg_fast_path" or "llm_enriched"
+    rca_path: str = "llm"
+    enrichment_status: Optional[str] = None  # "queued", "skipped", "completed", "failed", "shed"
+
     # Ensemble detection score (2026 SOIC research enhancement)
     lstm_normalized_score: Optional[float] = None
     rf_probability: Optional[float] = None
@@ -434,6 +898,45 @@ class SensorIngestResponse(BaseModel):
     workflow_id: Optional[str] = None
     message: str
     top_contributing_features: Optional[List[Dict[str, Any]]] = None
+    result_reused: bool = Field(False, description="True if the reading was inside the machine's deadband and the previous result was reused without inference")
+    model: Optional[str] = Field(None, description="Registry key of the model that scored the reading, e.g. 'ai4i/best'")
+
+
+class SensorBatchInput(BaseModel):
+    """Batch of raw sensor readings, e.g. one PLC gateway upload."""
+    readings: List[SensorReading] = Field(
+        ..., min_length=1, max_length=1000,
+        description="Sensor readings to score; results are returned in the same order",
+    )
+
+
+class MetroPTReading(BaseModel):
+    """One timestep from a MetroPT-3 air-compressor unit.
+
+    The MetroPT autoencoders take 43 engineered features per timestep, z-scored
+    with the training scaler; the gateway applies that scaler before upload.
+    """
+    features: List[float] = Field(
+        ..., min_length=_METROPT_N_FEATURES, max_length=_METROPT_N_FEATURES,
+        description=f"{_METROPT_N_FEATURES} pre-scaled MetroPT features, in training column order",
+    )
+    machine_id: Optional[str] = Field(None, description="Optional compressor unit identifier")
+    timestamp: Optional[str] = Field(None, description="Optional ISO timestamp")
+
+
+class MetroPTBatchInput(BaseModel):
+    """Batch of MetroPT timesteps, e.g. one gateway upload."""
+    readings: List[MetroPTReading] = Field(
+        ..., min_length=1, max_length=1000,
+        description="MetroPT readings to score; results are returned in the same order",
+    )
+
+
+class SensorBatchIngestResponse(BaseModel):
+    """Response from batch sensor ingestion — one result per submitted reading"""
+    count: int
+    anomalies: int
+    results: List[SensorIngestResponse]
 
 
 class LearningUpdate(BaseModel):
@@ -484,107 +987,203 @@ def _human_alert_message(severity: str, top_features: list) -> str:
     return _SEVERITY_LABELS.get(severity, 'Anomaly detected')
 
 
-def run_rca_workflow_background(workflow_id: str, anomaly_data: Dict[str, Any]):
-    """Run RCA workflow in background"""
+def _run_rca_workflow(workflow_id: str, anomaly_data: Dict[str, Any],
+                      allow_fast_path: bool = True) -> Optional[Dict[str, Any]]:
+    """Run the RCA workflow to completion (blocking); returns its final state.
+
+    With the KG fast path on, a strong SWRL match is answered from the KG
+    without the LLM agents (see kg_fast_path.py); `rca_path` records which ran.
+    """
+    # Import workflow components
+    from workflow_loader import (
+        app as workflow_app,
+        run_kg_fast_path,
+    )
+    
+    # Initialize state
+    initial_state = {
+        'anomaly_id': anomaly_data.get('anomaly_id', workflow_id),
+        'anomaly_data': anomaly_data,
+        'symptoms': [],
+        'severity': anomaly_data.get('severity', ''),
+        'affected_entities': [],
+        'diagnostic_confidence': 0.0,
+        'diagnostic_reasoning': '',
+        'causal_hypotheses': [],
+        'root_cause': '',
+        'causal_chain': [],
+        'reasoning_evidence': [],
+        'reasoning_confidence': 0.0,
+        'reasoning_steps': '',
+        'remediation_plan': {},
+        'recommended_actions': [],
+        'planning_rationale': '',
+        'planning_confidence': 0.0,
+        'feedback_summary': None,
+        'learning_updates': None,
+        'messages': [],
+        'workflow_id': workflow_id,
+        'current_agent': 'start',
+        'iteration_count': 0,
+        'final_explanation': None
+    }
+    
+    if allow_fast_path and kg_fast_path.enabled:
+        final_state = run_kg_fast_path(initial_state, kg_fast_path)
+        if final_state is not None:
+            return final_state
+
+    # Run workflow
+    config = {"configurable": {"thread_id": workflow_id}}
+    
+    final_state = None
+    for output in workflow_app.stream(initial_state, config):
+        for node_name, node_output in output.items():
+            final_state = node_output
+    if final_state is not None:
+        final_state = {**final_state, "rca_path": "llm"}
+    return final_state
+
+
+async def _persist_rca_result(workflow_id: str, final_state: Dict[str, Any]) -> None:
+    """Store all 4 agent outputs on the workflow's rca_results document."""
     try:
-        workflow_status[workflow_id] = "processing"
-        
-        # Import workflow components
-        from workflow_loader import (
-            app as workflow_app,
-            AgentState
+        db = get_db()
+        await db.rca_results.update_one(
+            {"workflow_id": workflow_id},
+            {"$set": {
+                "status": "completed",
+                "completed_at": datetime.now(timezone.utc).isoformat(),
+                # Diagnostic agent outputs
+                "symptoms":              final_state.get("symptoms", []),
+                "affected_entities":     final_state.get("affected_entities", []),
+                "diagnostic_confidence": final_state.get("diagnostic_confidence", 0.0),
+                "diagnostic_reasoning":  final_state.get("diagnostic_reasoning", ""),
+                # Reasoning agent outputs
+                "root_cause":            final_state.get("root_cause", ""),
+                "causal_chain":          final_state.get("causal_chain", []),
+                "causal_hypotheses":     final_state.get("causal_hypotheses", []),
+                "reasoning_confidence":  final_state.get("reasoning_confidence", 0.0),
+                "reasoning_steps":       final_state.get("reasoning_steps", ""),
+                # Planning agent outputs
+                "recommended_actions":   final_state.get("recommended_actions", []),
+                "remediation_plan":      final_state.get("remediation_plan", {}),
+                "planning_confidence":   final_state.get("planning_confidence", 0.0),
+                "planning_rationale":    final_state.get("planning_rationale", ""),
+                # Learning agent outputs
+                "learning_updates":      final_state.get("learning_updates") or [],
+                # Final explanation
+                "final_explanation":     final_state.get("final_explanation"),
+                "anomaly_id":            final_state.get("anomaly_id", ""),
+                # Which path produced the result (llm, kg_fast_path, llm_enriched)
+                "rca_path":              final_state.get("rca_path", "llm"),
+                "enrichment_status":     final_state.get("enrichment_status"),
+            }},
+            upsert=True,
         )
-        
-        # Initialize state
-        initial_state = {
-            'anomaly_id': anomaly_data.get('anomaly_id', workflow_id),
-            'anomaly_data': anomaly_data,
-            'symptoms': [],
-            'severity': anomaly_data.get('severity', ''),
-            'affected_entities': [],
-            'diagnostic_confidence': 0.0,
-            'diagnostic_reasoning': '',
-            'causal_hypotheses': [],
-            'root_cause': '',
-            'causal_chain': [],
-            'reasoning_evidence': [],
-            'reasoning_confidence': 0.0,
-            'reasoning_steps': '',
-            'remediation_plan': {},
-            'recommended_actions': [],
-            'planning_rationale': '',
-            'planning_confidence': 0.0,
-            'feedback_summary': None,
-            'learning_updates': None,
-            'messages': [],
-            'workflow_id': workflow_id,
-            'current_agent': 'start',
-            'iteration_count': 0,
-            'final_explanation': None
-        }
-        
-        # Run workflow
-        config = {"configurable": {"thread_id": workflow_id}}
-        
-        final_state = None
-        for output in workflow_app.stream(initial_state, config):
-            for node_name, node_output in output.items():
-                final_state = node_output
-        
-        # Store result in memory
-        workflow_results[workflow_id] = final_state
-        workflow_status[workflow_id] = "completed"
-
-        # Persist all 4 agent outputs to MongoDB rca_results
-        if _MONGO_AVAILABLE and final_state:
-            import asyncio
-            async def _persist():
-                try:
-                    db = get_db()
-                    await db.rca_results.update_one(
-                        {"workflow_id": workflow_id},
-                        {"$set": {
-                            "status": "completed",
-                            "completed_at": datetime.now(timezone.utc).isoformat(),
-                            # Diagnostic agent outputs
-                            "symptoms":              final_state.get("symptoms", []),
-                            "affected_entities":     final_state.get("affected_entities", []),
-                            "diagnostic_confidence": final_state.get("diagnostic_confidence", 0.0),
-                            "diagnostic_reasoning":  final_state.get("diagnostic_reasoning", ""),
-                            # Reasoning agent outputs
-                            "root_cause":            final_state.get("root_cause", ""),
-                            "causal_chain":          final_state.get("causal_chain", []),
-                            "causal_hypotheses":     final_state.get("causal_hypotheses", []),
-                            "reasoning_confidence":  final_state.get("reasoning_confidence", 0.0),
-                            "reasoning_steps":       final_state.get("reasoning_steps", ""),
-                            # Planning agent outputs
-                            "recommended_actions":   final_state.get("recommended_actions", []),
-                            "remediation_plan":      final_state.get("remediation_plan", {}),
-                            "planning_confidence":   final_state.get("planning_confidence", 0.0),
-                            "planning_rationale":    final_state.get("planning_rationale", ""),
-                            # Learning agent outputs
-                            "learning_updates":      final_state.get("learning_updates") or [],
-                            # Final explanation
-                            "final_explanation":     final_state.get("final_explanation"),
-                            "anomaly_id":            final_state.get("anomaly_id", ""),
-                        }},
-                        upsert=True,
-                    )
-                except Exception as _db_err:
-                    import logging
-                    logging.getLogger(__name__).warning("rca_results persist failed: %s", _db_err)
-            try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    asyncio.run_coroutine_threadsafe(_persist(), loop)
-                else:
-                    asyncio.run(_persist())
-            except Exception:
-                pass
-        
-    except Exception as e:
-        workflow_status[workflow_id] = "failed"
-        workflow_results[workflow_id] = {"error": str(e)}
+    except Exception as _db_err:
+        import logging
+        logging.getLogger(__name__).warning("rca_results persist failed: %s", _db_err)
+
+
+# Job id suffix of the LLM pass that upgrades a KG fast-path result
+_ENRICH_SUFFIX = ":enrich"
+
+
+async def _run_rca_job(workflow_id: str, anomaly_data: Dict[str, Any]) -> None:
+    """RCA queue handler: run one workflow on the queue's threads and store the result."""
+    if workflow_id.endswith(_ENRICH_SUFFIX):
+        await _enrich_rca_result(workflow_id[:-len(_ENRICH_SUFFIX)], anomaly_data)
+        return
+    workflow_status[workflow_id] = "processing"
+    final_state = await rca_queue.run_blocking(_run_rca_workflow, workflow_id, anomaly_data)
+    if final_state and final_state.get("rca_path") == "kg_fast_path" and kg_fast_path.enrich:
+        final_state["enrichment_status"] = await _queue_enrichment(workflow_id, anomaly_data)
+    workflow_results[workflow_id] = final_state
+    workflow_status[workflow_id] = "completed"
+    if final_state:
+        kg_fast_path.record(final_state.get("rca_path", "llm"))
+    if _MONGO_AVAILABLE and final_state:
+        await _persist_rca_result(workflow_id, final_state)
+
+
+async def _queue_enrichment(workflow_id: str, anomaly_data: Dict[str, Any]) -> str:
+    """Queue the LLM pass for a fast-path result as a low-severity job; returns its status."""
+    try:
+        queued = rca_queue.admit(["low"])[0]
+        if queued:
+            await rca_queue.enqueue(workflow_id + _ENRICH_SUFFIX, anomaly_data, "low")
+    except RCAQueueFull:
+        queued = False
+    except Exception as exc:
+        import logging
+        logging.getLogger(__name__).warning("Could not queue LLM enrichment for %s: %s", workflow_id, exc)
+        queued = False
+    kg_fast_path.record_enrichment(queued)
+    return "queued" if queued else "skipped"
+
+
+async def _enrich_rca_result(workflow_id: str, anomaly_data: Dict[str, Any]) -> None:
+    """Run the LLM agents for a workflow answered by the KG fast path and upgrade its result."""
+    final_state = await rca_queue.run_blocking(_run_rca_workflow, workflow_id, anomaly_data, False)
+    if not final_state:
+        return
+    final_state = {**final_state, "rca_path": "llm_enriched", "enrichment_status": "completed"}
+    workflow_results[workflow_id] = final_state
+    workflow_status[workflow_id] = "completed"
+    kg_fast_path.record("llm_enriched")
+    if _MONGO_AVAILABLE:
+        await _persist_rca_result(workflow_id, final_state)
+
+
+async def _set_enrichment_status(workflow_id: str, status: str) -> None:
+    # The KG fast-path result stands; only its enrichment_status changes
+    result = workflow_results.get(workflow_id)
+    if isinstance(result, dict):
+        result["enrichment_status"] = status
+    if _MONGO_AVAILABLE:
+        await get_db().rca_results.update_one(
+            {"workflow_id": workflow_id}, {"$set": {"enrichment_status": status}},
+        )
+
+
+async def _rca_job_failed(workflow_id: str, error: BaseException, retrying: bool) -> None:
+    if workflow_id.endswith(_ENRICH_SUFFIX):
+        if not retrying:
+            await _set_enrichment_status(workflow_id[:-len(_ENRICH_SUFFIX)], "failed")
+        return
+    workflow_status[workflow_id] = "queued" if retrying else "failed"
+    if not retrying:
+        workflow_results[workflow_id] = {"error": str(error)}
+        rca_coalescer.forget(workflow_id)
+        if _MONGO_AVAILABLE:
+            await get_db().rca_results.update_one(
+                {"workflow_id": workflow_id, "status": "queued"},
+                {"$set": {"status": "failed", "error": str(error)}},
+            )
+
+
+async def _rca_job_shed(workflow_id: str) -> None:
+    """A queued workflow passed its deadline under a large backlog and will not run."""
+    if workflow_id.endswith(_ENRICH_SUFFIX):
+        await _set_enrichment_status(workflow_id[:-len(_ENRICH_SUFFIX)], "shed")
+        return
+    workflow_status[workflow_id] = "shed"
+    rca_coalescer.forget(workflow_id)
+    if _MONGO_AVAILABLE:
+        await get_db().rca_results.update_one(
+            {"workflow_id": workflow_id, "status": "queued"}, {"$set": {"status": "shed"}},
+        )
+
+
+# Repeated anomalies with one failure signature share a workflow (see rca_coalescer.py)
+rca_coalescer = WorkflowCoalescer.from_env()
+
+# Strong SWRL matches answered from the KG without the LLM agents (see kg_fast_path.py)
+kg_fast_path = KGFastPath.from_env()
+
+# RCA workflows run from a durable, bounded job queue, most urgent first (see rca_jobs.py)
+rca_queue = RCAJobQueue.from_env(_run_rca_job, on_failure=_rca_job_failed, on_shed=_rca_job_shed)
 
 
 # =================================================================
@@ -601,19 +1200,424 @@ async def root():
         "status": "operational",
         "endpoints": {
             "sensor_ingest": "/api/sensor/ingest",
+            "sensor_ingest_batch": "/api/sensor/ingest/batch",
+            "sensor_ingest_metropt": "/api/sensor/ingest/metropt",
+            "sensor_ingest_metropt_batch": "/api/sensor/ingest/metropt/batch",
             "analyze": "/api/rca/analyze",
             "status": "/api/rca/status/{workflow_id}",
             "result": "/api/rca/result/{workflow_id}",
             "feedback": "/api/rca/feedback",
-            "health": "/api/agents/health"
+            "health": "/api/agents/health",
+            "ready": "/api/ready",
+            "metrics": "/api/metrics",
+            "models": "/api/models"
         }
     }
 
 
+def _classify_severity(ensemble_score: float) -> str:
+    """Map an ensemble score (0–1) onto the alert severity bands."""
+    if ensemble_score >= 0.8:
+        return "critical"
+    if ensemble_score >= 0.6:
+        return "high"
+    if ensemble_score >= 0.4:
+        return "medium"
+    return "low"
+
+
+def _reading_inputs(spec: ModelSpec, readings: List[Any]):
+    """Raw input matrix for the spec's feature builder plus the values stored per reading."""
+    if spec.domain == 'metropt':
+        raw = np.array([r.features for r in readings], dtype=np.float64)
+        return raw, [{"features": r.features} for r in readings]
+    # Fill any absent sensor fields with dataset means so the LSTM feature
+    # vector is always fully populated (e.g. a filter has no torque/RPM).
+    raw = np.array([_resolve_sensor_values(r) for r in readings], dtype=np.float64)
+    fields = [f for f, _ in _SENSOR_FIELDS]
+    return raw, [dict(zip(fields, row)) for row in raw.tolist()]
+
+
+# How far a reading's own timestamp may lie behind (RCA_READING_MAX_AGE_S) or
+# ahead of (RCA_READING_MAX_AHEAD_S) server time. A gateway with a wrong clock
+# would otherwise write readings into buckets that expire at once or never;
+# its readings are stamped with the server time instead and counted.
+_READING_MAX_AGE = timedelta(seconds=float(os.getenv('RCA_READING_MAX_AGE_S', '86400')))
+_READING_MAX_AHEAD = timedelta(seconds=float(os.getenv('RCA_READING_MAX_AHEAD_S', '300')))
+_reading_timestamp_counts = {"invalid": 0, "out_of_window": 0}
+
+
+def _reading_timestamp(value: Optional[str], default: datetime) -> datetime:
+    """A reading's own ISO timestamp as an aware UTC datetime.
+
+    `default` (the server time) is used when the timestamp is absent, invalid,
+    or outside the accepted window around `default`.
+    """
+    if not value:
+        return default
+    try:
+        ts = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        _reading_timestamp_counts["invalid"] += 1
+        return default
+    if ts.tzinfo is None:   # gateways without an offset report UTC
+        ts = ts.replace(tzinfo=timezone.utc)
+    else:
+        ts = ts.astimezone(timezone.utc)
+    if not default - _READING_MAX_AGE <= ts <= default + _READING_MAX_AHEAD:
+        _reading_timestamp_counts["out_of_window"] += 1
+        return default
+    return ts
+
+
+async def _ingest_readings(
+    readings: List[Any],
+    spec: Optional[ModelSpec] = None,
+) -> List[SensorIngestResponse]:
+    """Score a list of sensor readings and persist the results.
+
+    Shared by the AI4I and MetroPT ingest endpoints; `spec` selects the model
+    (default: the AI4I model).
+    1. Reuses the previous result for readings inside their machine's deadband,
+       then builds one (N, F) feature matrix for the remaining readings and
+       copies the windows they would see (each machine's last 10 readings)
+    2. Runs the LSTM Autoencoder on the (N, 10, F) window tensor, sharing the
+       forward pass with concurrent callers via the model's inference batcher
+    3. Computes the ensemble score (0.6×LSTM + 0.4×RF) for every reading
+    4. Once the RCA backlog and the write buffer have room, appends the
+       readings to their windows and deadbands, queues readings, alerts and
+       RCA stubs on the write buffer, which bulk-writes them to MongoDB in the
+       background, and decays equipment health in the in-memory equipment
+       state table
+    5. Queues one RCA workflow per new failure signature on the RCA job
+       queue; repeats of a recent signature join its workflow
+
+    A request refused with a 503 (InferenceSaturated, RCAQueueFull,
+    WriteBufferFull) has not changed any window or deadband, so its retry
+    is scored as the same readings.
+
+    Returns one SensorIngestResponse per reading, in input order.
+    """
+    spec = spec or model_registry.spec('ai4i')
+    pipeline = _get_pipeline(spec)
+    raw, values_list = _reading_inputs(spec, readings)
+    equipment_ids = [r.machine_id or "eq-001" for r in readings]
+
+    # Readings inside their machine's deadband reuse the previous result and
+    # skip inference entirely; only the rest go through the model.
+    if pipeline.deadband is not None:
+        reused = pipeline.deadband.check(equipment_ids, raw)
+    else:
+        reused = [None] * len(readings)
+    live = [i for i, prev in enumerate(reused) if prev is None]
+
+    live_results = {}
+    if live:
+        feature_matrix = spec.build_features(raw[live])
+        live_ids = [equipment_ids[i] for i in live]
+        # A copy: the ring buffers are only extended once the request is accepted
+        windows = pipeline.sequence_buffers.windows(live_ids, feature_matrix)
+        reconstruction_errors, top_columns, top_errors, scores = await pipeline.batcher.submit(windows)
+        scorer, _ = _get_scorer(spec)
+
+        # One tolist() per array for the whole batch; feature dicts are built per
+        # reading below, where they go into its response and documents
+        for i, recon_err, columns, errors, (lstm_norm, rf_prob, ensemble_score) in zip(
+            live, reconstruction_errors.tolist(), top_columns.tolist(), top_errors.tolist(),
+            scores.tolist(),
+        ):
+            ensemble_scores = scorer.scores_dict(lstm_norm, rf_prob, ensemble_score)
+            result = {
+                "reconstruction_error": recon_err,
+                "top_columns":          columns,
+                "top_errors":           errors,
+                "ensemble_scores":      ensemble_scores,
+                "ensemble_score":       ensemble_score,
+                "severity":             _classify_severity(ensemble_score),
+                # An uncalibrated model's score cannot decide anything
+                "anomaly_detected":     spec.calibrated and ensemble_score > 0.5,
+            }
+            live_results[i] = result
+
+    ts_now = datetime.now(timezone.utc)
+    scored = []
+    for i, (reading, equipment_id, values) in enumerate(zip(readings, equipment_ids, values_list)):
+        result = live_results[i] if i in live_results else reused[i]
+        anomaly_detected = result["anomaly_detected"]
+        scored.append({
+            **result,
+            "reading":              reading,
+            "values":               values,
+            "top_features":         _top_feature_list(spec.feature_names, result["top_columns"],
+                                                      result["top_errors"]),
+            "equipment_id":         equipment_id,
+            # Buffered gateway uploads carry each sample's own time
+            "timestamp":            _reading_timestamp(reading.timestamp, ts_now),
+            "model":                spec.key,
+            "result_reused":        i not in live_results,
+            "coalesced_readings":   0,   # set when the deadband reference is replaced
+            # Generate workflow_id early so it can be stored in the alert
+            "workflow_id":          str(uuid.uuid4()) if anomaly_detected else None,
+        })
+
+    # One RCA job per failure signature: an anomaly matching a recent
+    # workflow (same machine, severity and top features) attaches to it
+    # and its alert links to the shared workflow_id (see rca_coalescer.py)
+    anomalous = [item for item in scored if item["anomaly_detected"]]
+    leaders: Dict[Any, Dict[str, Any]] = {}
+    for item in anomalous:
+        item["rca_signature"] = rca_coalescer.signature(
+            item["equipment_id"], item["severity"], item["top_features"])
+        shared = rca_coalescer.lookup(item["rca_signature"])
+        leader = leaders.get(item["rca_signature"]) if rca_coalescer.enabled else None
+        item["rca_shared"] = bool(shared or leader)
+        if shared:
+            item["workflow_id"] = shared
+        elif leader:
+            item["workflow_id"] = leader["workflow_id"]
+        else:
+            leaders[item["rca_signature"]] = item
+    fresh = list(leaders.values()) if rca_coalescer.enabled else anomalous
+
+    # New workflows are queued most urgent first. Under a large backlog
+    # low-severity ones are shed (not queued); the rest are refused
+    # (RCAQueueFull) before anything is written when the backlog is
+    # already at its limit.
+    for item, kept in zip(fresh, rca_queue.admit([item["severity"] for item in fresh])):
+        item["rca_shed"] = not kept
+    for item in anomalous:
+        if item["rca_shared"]:
+            leader = leaders.get(item["rca_signature"])
+            item["rca_shed"] = leader["rca_shed"] if leader else False
+    rca_jobs = [
+        JobRequest(item["workflow_id"], {
+            'anomaly_id': item["equipment_id"] + f"_{item['workflow_id'][:8]}",
+            'timestamp': item["timestamp"].isoformat(),
+            'reconstruction_error': item["reconstruction_error"],
+            'top_contributing_features': item["top_features"],
+            # Matched by the SWRL rule checks without parsing feature names
+            'feature_signals': signals_for_columns(pipeline.feature_signals, item["top_columns"]),
+            'severity': item["severity"],
+            'metadata': {
+                'source': 'sensor_ingest',
+                'model': item["model"],
+                'equipment_id': item["equipment_id"],
+                **item["values"],
+            },
+        }, item["severity"], item["ensemble_score"])
+        for item in fresh if not item["rca_shed"]
+    ]
+
+    # ----------------------------------------------------------------
+    # Wait for write-buffer space; raises WriteBufferFull (before any RCA
+    # is queued) when writes fall behind. Past this point the request is
+    # accepted, so the machines' windows and deadband references advance
+    # — with no await before the put, which therefore does not wait again.
+    # ----------------------------------------------------------------
+    if _MONGO_AVAILABLE:
+        await write_buffer.reserve(_ingest_document_count(scored))
+    if live:
+        pipeline.sequence_buffers.extend(live_ids, feature_matrix)
+    if pipeline.deadband is not None:
+        for i, item in enumerate(scored):
+            if item["result_reused"]:
+                pipeline.deadband.reuse(item["equipment_id"])
+            else:
+                item["coalesced_readings"] = pipeline.deadband.record(
+                    item["equipment_id"], raw[i], live_results[i])
+
+    # Hand the documents to the write buffer; they are flushed to MongoDB
+    # in the background, so the response does not wait for Atlas.
+    if _MONGO_AVAILABLE:
+        documents = _ingest_documents(scored, ts_now)
+        await write_buffer.put(documents)
+        if spec.calibrated:
+            for item in scored:
+                # A reading that reused its machine's previous result decays health
+                # now, with that reused score, even though it is not written
+                equipment_state.record(item["equipment_id"], item["ensemble_score"], item["timestamp"])
+        dashboard_counters.alerts_created(alert["severity"] for alert in documents["alerts"])
+        for alert in documents["alerts"]:
+            dashboard_counters.anomalies_detected(1, alert["timestamp"])
+
+    for item in fresh:
+        workflow_ensemble_scores[item["workflow_id"]] = item["ensemble_scores"]
+        workflow_status[item["workflow_id"]] = "shed" if item["rca_shed"] else "queued"
+    await rca_queue.enqueue_many(rca_jobs)
+    for item in anomalous:
+        if item["rca_shared"]:
+            rca_coalescer.attach(item["workflow_id"])
+        elif not item["rca_shed"]:
+            rca_coalescer.register(item["rca_signature"], item["workflow_id"])
+
+    responses = []
+    for item in scored:
+        ensemble_score = item["ensemble_score"]
+        severity = item["severity"]
+        workflow_id = item["workflow_id"]
+        if item["anomaly_detected"] and item["rca_shared"] and not item["rca_shed"]:
+            message = (
+                f"Anomaly detected (score={ensemble_score:.3f}, severity={severity}). "
+                f"Same failure signature as RCA workflow {workflow_id}, which this anomaly "
+                f"joined — poll /api/rca/status/{workflow_id} for progress."
+            )
+        elif item["anomaly_detected"] and item["rca_shed"]:
+            message = (
+                f"Anomaly detected (score={ensemble_score:.3f}, severity={severity}). "
+                f"RCA skipped — the RCA backlog is too large for {severity}-severity anomalies."
+            )
+        elif item["anomaly_detected"]:
+            message = (
+                f"Anomaly detected (score={ensemble_score:.3f}, severity={severity}). "
+                f"RCA workflow queued — poll /api/rca/status/{workflow_id} for progress."
+            )
+        elif not spec.calibrated:
+            message = (
+                f"Scored by {spec.key}, which is not calibrated yet (no threshold, scaler "
+                f"statistics or feature importances) — no anomaly decision, alert or RCA."
+            )
+        elif item["result_reused"]:
+            message = (
+                f"No anomaly detected (score={ensemble_score:.3f}). "
+                f"Reading within deadband of the previous one — previous result reused."
+            )
+        else:
+            message = (
+                f"No anomaly detected (score={ensemble_score:.3f}). "
+                f"Equipment operating within normal parameters."
+            )
+
+        responses.append(SensorIngestResponse(
+            anomaly_detected=item["anomaly_detected"],
+            ensemble_score=ensemble_score,
+            lstm_normalized_score=item["ensemble_scores"]['lstm_normalized_score'],
+            rf_probability=item["ensemble_scores"]['rf_probability'],
+            reconstruction_error=round(item["reconstruction_error"], 6),
+            severity=severity,
+            workflow_id=workflow_id,
+            message=message,
+            top_contributing_features=item["top_features"],
+            result_reused=item["result_reused"],
+            model=item["model"],
+        ))
+
+    return responses
+
+
+def _ingest_document_count(scored: List[Dict[str, Any]]) -> int:
+    """How many documents `_ingest_documents` returns for `scored`."""
+    written = [item for item in scored if not item["result_reused"]]
+    return (len(written)
+            + sum(1 for item in written if item["anomaly_detected"])
+            + sum(1 for item in scored if item["anomaly_detected"] and not item["rca_shared"]))
+
+
+def _ingest_documents(scored: List[Dict[str, Any]], ts_now: datetime) -> Dict[str, List[Dict[str, Any]]]:
+    """MongoDB documents for one ingest call, keyed by collection.
+
+    Readings that reused a deadband result are not written; their count is
+    carried by the next written reading of the machine as `coalesced_readings`.
+    Readings and alerts are stamped with the reading's own timestamp (ingest
+    time when it has none); RCA stubs with `ts_now`.
+    `sensor_readings` documents are stored by sensor_series, not inserted as-is.
+    """
+    written = [item for item in scored if not item["result_reused"]]
+    return {
+        "sensor_readings": [
+            {
+                "equipment_id": item["equipment_id"],
+                "timestamp": item["timestamp"],
+                "model": item["model"],
+                **item["values"],
+                "reconstruction_error": round(item["reconstruction_error"], 6),
+                "ensemble_score": item["ensemble_score"],
+                "severity": item["severity"],
+                "anomaly_detected": item["anomaly_detected"],
+                **({"coalesced_readings": item["coalesced_readings"]}
+                   if item["coalesced_readings"] else {}),
+            }
+            for item in written
+        ],
+        "alerts": [
+            {
+                "equipment_id": item["equipment_id"],
+                "timestamp": item["timestamp"],
+                "severity": item["severity"],
+                "ensemble_score": item["ensemble_score"],
+                "reconstruction_error": round(item["reconstruction_error"], 6),
+                "top_features": item["top_features"],
+                "acknowledged": False,
+                "cost": _costs().get(item["severity"], 320),
+                "message": _human_alert_message(item["severity"], item["top_features"]),
+                "workflow_id": item["workflow_id"],  # links alert to RCA result
+            }
+            for item in written if item["anomaly_detected"]
+        ],
+        # RCA result stubs so the dashboard can poll queued workflows
+        "rca_results": [
+            {
+                "workflow_id": item["workflow_id"],
+                "equipment_id": item["equipment_id"],
+                "status": "shed" if item["rca_shed"] else "queued",
+                "created_at": ts_now,
+                "ensemble_score": item["ensemble_score"],
+                "severity": item["severity"],
+            }
+            for item in scored if item["anomaly_detected"] and not item["rca_shared"]
+        ],
+    }
+
+
+# Readings are stored as hourly buckets plus 1-minute / 1-hour rollups (see timeseries.py)
+sensor_series = SensorTimeSeries.from_env()
+
+# Ingest writes are buffered and bulk-written in the background, falling back to a
+# disk spool while MongoDB is unavailable (see write_behind.py, write_spool.py)
+write_buffer = WriteBehindBuffer.from_env(
+    lambda: get_db(),
+    handlers={"sensor_readings": sensor_series.write},
+)
+
+# Equipment health lives in memory and is bulk-flushed (see equipment_state.py)
+equipment_state = EquipmentStateTable.from_env(
+    lambda: get_db(),
+    lambda ensemble_score, health: compute_health_score(ensemble_score, health),
+)
+
+
+async def _dashboard_counts(fence: Callable[[], None]) -> Dict[str, Any]:
+    """The dashboard summary's count queries, run on reconcile or ?refresh=true."""
+    db = get_db()
+    await write_buffer.flush()   # count what ingest has already reported
+    fence()                      # ...and replay only what it reports from here on
+    since = datetime.now(timezone.utc) - timedelta(hours=24)
+    return {
+        "active_alerts": await db.alerts.count_documents({"acknowledged": False}),
+        "critical_alerts": await db.alerts.count_documents(
+            {"acknowledged": False, "severity": "critical"}
+        ),
+        "open_tasks": await db.maintenance_tasks.count_documents(
+            {"status": {"$in": ["open", "in_progress"]}}
+        ),
+        "anomaly_minutes": await sensor_series.anomaly_minutes(db, since),
+    }
+
+
+# Summary counters are maintained per event and reconciled (see dashboard_summary.py)
+dashboard_counters = DashboardCounters.from_env(_dashboard_counts)
+
+
+def _resolve_model(domain: str, model_version: Optional[str]) -> ModelSpec:
+    try:
+        return model_registry.spec(domain, model_version)
+    except UnknownModel as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
 @app.post("/api/sensor/ingest", response_model=SensorIngestResponse, tags=["Sensor Ingestion"])
 async def ingest_sensor_reading(
     reading: SensorReading,
-    background_tasks: BackgroundTasks
+    model_version: Optional[str] = Query(None, description="AI4I model version (default: best)"),
 ):
     """
     Submit raw sensor readings directly from industrial equipment.
@@ -627,178 +1631,98 @@ async def ingest_sensor_reading(
 
     No pre-processing of LSTM outputs required — just send raw sensor data.
     """
+    spec = _resolve_model('ai4i', model_version)
     try:
-        # Fill any absent sensor fields with dataset means so the LSTM feature
-        # vector is always fully populated (e.g. a filter has no torque/RPM).
-        air_temp_val  = reading.air_temperature    if reading.air_temperature    is not None else _FEATURE_STATS['air_temp']['mean']
-        proc_temp_val = reading.process_temperature if reading.process_temperature is not None else _FEATURE_STATS['proc_temp']['mean']
-        rpm_val       = reading.rotational_speed   if reading.rotational_speed   is not None else _FEATURE_STATS['rpm']['mean']
-        torque_val    = reading.torque             if reading.torque             is not None else _FEATURE_STATS['torque']['mean']
-        tool_wear_val = reading.tool_wear          if reading.tool_wear          is not None else _FEATURE_STATS['tool_wear']['mean']
-
-        # Build 13-feature vector and run LSTM inference
-        feat_vec = _build_feature_vector(
-            air_temp=air_temp_val,
-            proc_temp=proc_temp_val,
-            rpm=rpm_val,
-            torque=torque_val,
-            tool_wear=tool_wear_val,
-        )
-        reconstruction_error, top_features = _run_lstm_inference(feat_vec)
+        results = await _ingest_readings([reading], spec)
+        return results[0]
+    except (InferenceSaturated, WriteBufferFull, RCAQueueFull) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Sensor ingestion failed: {str(e)}")
 
-        # Compute ensemble score
-        ensemble_scores = ensemble_scorer.compute(
-            reconstruction_error=reconstruction_error,
-            top_features=top_features,
+
+@app.post("/api/sensor/ingest/batch", response_model=SensorBatchIngestResponse, tags=["Sensor Ingestion"])
+async def ingest_sensor_batch(
+    batch: SensorBatchInput,
+    model_version: Optional[str] = Query(None, description="AI4I model version (default: best)"),
+):
+    """
+    Submit many sensor readings in one call (e.g. from a PLC gateway).
+
+    All readings are scored with a single LSTM forward pass and written with
+    bulk MongoDB operations. Results are returned in input order; each
+    anomalous reading gets its own RCA workflow, as with /api/sensor/ingest.
+    """
+    spec = _resolve_model('ai4i', model_version)
+    try:
+        results = await _ingest_readings(batch.readings, spec)
+        return SensorBatchIngestResponse(
+            count=len(results),
+            anomalies=sum(1 for r in results if r.anomaly_detected),
+            results=results,
         )
-        ensemble_score = ensemble_scores['ensemble_score']
-
-        # Determine severity
-        if ensemble_score >= 0.8:
-            severity = "critical"
-        elif ensemble_score >= 0.6:
-            severity = "high"
-        elif ensemble_score >= 0.4:
-            severity = "medium"
-        else:
-            severity = "low"
+    except (InferenceSaturated, WriteBufferFull, RCAQueueFull) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Batch sensor ingestion failed: {str(e)}")
 
-        anomaly_detected = ensemble_score > 0.5
-        # Generate workflow_id early so it can be stored in the alert
-        workflow_id = str(uuid.uuid4()) if anomaly_detected else None
 
-        equipment_id = reading.machine_id or "eq-001"
-        ts_now = datetime.now(timezone.utc)
+@app.post("/api/sensor/ingest/metropt", response_model=SensorIngestResponse, tags=["Sensor Ingestion"])
+async def ingest_metropt_reading(
+    reading: MetroPTReading,
+    model_version: Optional[str] = Query(None, description="MetroPT model version (default: best)"),
+):
+    """
+    Submit one MetroPT-3 air-compressor timestep (43 pre-scaled features).
 
-        # ----------------------------------------------------------------
-        # Persist to MongoDB (non-blocking best-effort)
-        # ----------------------------------------------------------------
-        if _MONGO_AVAILABLE:
-            try:
-                db = get_db()
-
-                # 1. Write sensor reading
-                await db.sensor_readings.insert_one({
-                    "equipment_id": equipment_id,
-                    "timestamp": ts_now,
-                    "air_temperature": air_temp_val,
-                    "process_temperature": proc_temp_val,
-                    "rotational_speed": rpm_val,
-                    "torque": torque_val,
-                    "tool_wear": tool_wear_val,
-                    "reconstruction_error": round(reconstruction_error, 6),
-                    "ensemble_score": ensemble_score,
-                    "severity": severity,
-                    "anomaly_detected": anomaly_detected,
-                })
-
-                # 2. Upsert equipment health score
-                eq_doc = await db.equipment.find_one({"equipment_id": equipment_id})
-                current_health = eq_doc["health_score"] if eq_doc else 100.0
-                new_health = compute_health_score(ensemble_score, current_health)
-                new_status = (
-                    "critical" if new_health < 40
-                    else "warning" if new_health < 70
-                    else "operational"
-                )
-                await db.equipment.update_one(
-                    {"equipment_id": equipment_id},
-                    {"$set": {
-                        "health_score": new_health,
-                        "status": new_status,
-                        "last_reading_at": ts_now,
-                    }},
-                    upsert=True,
-                )
-
-                # 3. Insert alert if anomaly
-                if anomaly_detected:
-                    await db.alerts.insert_one({
-                        "equipment_id": equipment_id,
-                        "timestamp": ts_now,
-                        "severity": severity,
-                        "ensemble_score": ensemble_score,
-                        "reconstruction_error": round(reconstruction_error, 6),
-                        "top_features": top_features,
-                        "acknowledged": False,
-                        "cost": _cost_cache.get(severity, 320),
-                        "message": _human_alert_message(severity, top_features),
-                        "workflow_id": workflow_id,  # links alert to RCA result
-                    })
-            except Exception as _db_err:
-                import logging
-                logging.getLogger(__name__).warning("MongoDB write failed: %s", _db_err)
-
-        if anomaly_detected:
-            # Build AnomalyInput-compatible payload and trigger RCA workflow
-            # workflow_id was already generated above
-            anomaly_data = {
-                'anomaly_id': equipment_id + f"_{workflow_id[:8]}",
-                'timestamp': reading.timestamp or ts_now.isoformat(),
-                'reconstruction_error': reconstruction_error,
-                'top_contributing_features': top_features,
-                'severity': severity,
-                'metadata': {
-                    'source': 'sensor_ingest',
-                    'equipment_id': equipment_id,
-                    'air_temperature': air_temp_val,
-                    'process_temperature': proc_temp_val,
-                    'rotational_speed': rpm_val,
-                    'torque': torque_val,
-                    'tool_wear': tool_wear_val,
-                },
-            }
-            workflow_ensemble_scores[workflow_id] = ensemble_scores
-            background_tasks.add_task(run_rca_workflow_background, workflow_id, anomaly_data)
-            workflow_status[workflow_id] = "queued"
-
-            # Persist RCA result stub so dashboard can poll it
-            if _MONGO_AVAILABLE:
-                try:
-                    db = get_db()
-                    await db.rca_results.insert_one({
-                        "workflow_id": workflow_id,
-                        "equipment_id": equipment_id,
-                        "status": "queued",
-                        "created_at": ts_now,
-                        "ensemble_score": ensemble_score,
-                        "severity": severity,
-                    })
-                except Exception:
-                    pass
+    Scored by the MetroPT LSTM Autoencoder over the unit's last 10 timesteps
+    and stored like /api/sensor/ingest readings. Until the MetroPT models are
+    calibrated, no reading is reported as an anomaly, so none raises an
+    alert or RCA workflow.
+    """
+    spec = _resolve_model('metropt', model_version)
+    try:
+        results = await _ingest_readings([reading], spec)
+        return results[0]
+    except (InferenceSaturated, WriteBufferFull, RCAQueueFull) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"MetroPT ingestion failed: {str(e)}")
 
-            message = (
-                f"Anomaly detected (score={ensemble_score:.3f}, severity={severity}). "
-                f"RCA workflow queued — poll /api/rca/status/{workflow_id} for progress."
-            )
-        else:
-            message = (
-                f"No anomaly detected (score={ensemble_score:.3f}). "
-                f"Equipment operating within normal parameters."
-            )
 
-        return SensorIngestResponse(
-            anomaly_detected=anomaly_detected,
-            ensemble_score=ensemble_score,
-            lstm_normalized_score=ensemble_scores['lstm_normalized_score'],
-            rf_probability=ensemble_scores['rf_probability'],
-            reconstruction_error=round(reconstruction_error, 6),
-            severity=severity,
-            workflow_id=workflow_id,
-            message=message,
-            top_contributing_features=top_features,
+@app.post("/api/sensor/ingest/metropt/batch", response_model=SensorBatchIngestResponse, tags=["Sensor Ingestion"])
+async def ingest_metropt_batch(
+    batch: MetroPTBatchInput,
+    model_version: Optional[str] = Query(None, description="MetroPT model version (default: best)"),
+):
+    """
+    Submit many MetroPT-3 timesteps in one call; results are returned in input order.
+    """
+    spec = _resolve_model('metropt', model_version)
+    try:
+        results = await _ingest_readings(batch.readings, spec)
+        return SensorBatchIngestResponse(
+            count=len(results),
+            anomalies=sum(1 for r in results if r.anomaly_detected),
+            results=results,
         )
-
+    except (InferenceSaturated, WriteBufferFull, RCAQueueFull) as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except RuntimeError as e:
         raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Sensor ingestion failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"MetroPT batch ingestion failed: {str(e)}")
 
 
 @app.post("/api/rca/analyze", response_model=RCAResponse, tags=["RCA Analysis"])
 async def analyze_anomaly(
     anomaly: AnomalyInput,
-    background_tasks: BackgroundTasks
 ):
     """
     Submit an anomaly for Root Cause Analysis.
@@ -825,10 +1749,11 @@ async def analyze_anomaly(
         )
         workflow_ensemble_scores[workflow_id] = ensemble_scores
 
-        # Add to background tasks
-        background_tasks.add_task(run_rca_workflow_background, workflow_id, anomaly_data)
-        
+        # Requested explicitly, so never shed; queued by severity and score
+        severity = str(anomaly_data.get('severity') or 'medium').lower()
+        rca_queue.admit([severity], allow_shed=False)
         workflow_status[workflow_id] = "queued"
+        await rca_queue.enqueue(workflow_id, anomaly_data, severity, ensemble_scores['ensemble_score'])
         
         return RCAResponse(
             workflow_id=workflow_id,
@@ -837,6 +1762,8 @@ async def analyze_anomaly(
             estimated_time="2-4 minutes"
         )
         
+    except RCAQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to start RCA: {str(e)}")
 
@@ -846,11 +1773,24 @@ async def get_workflow_status(workflow_id: str):
     """
     Check the status of an RCA workflow.
     
-    Returns: queued, processing, completed, or failed
+    Returns: queued, processing, completed, failed, or shed (skipped under
+    a large RCA backlog)
     """
     if workflow_id not in workflow_status:
-        raise HTTPException(status_code=404, detail="Workflow ID not found")
-    
+        # Not started by this process (e.g. queued before a restart): ask the job queue
+        job = await rca_queue.get(workflow_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Workflow ID not found")
+        response = {
+            "workflow_id": workflow_id,
+            "status": _JOB_WORKFLOW_STATUS[job["status"]],
+            "attempts": job["attempts"],
+            "timestamp": datetime.now().isoformat()
+        }
+        if job["status"] == "dead":
+            response["error"] = job["last_error"]
+        return response
+
     status = workflow_status[workflow_id]
     
     response = {
@@ -864,23 +1804,81 @@ async def get_workflow_status(workflow_id: str):
         response["result_available"] = True
         response["anomaly_id"] = result.get("anomaly_id", "unknown")
         response["root_cause"] = result.get("root_cause", "unknown")
+        response["rca_path"] = result.get("rca_path", "llm")
     elif status == "failed" and workflow_id in workflow_results:
         response["error"] = workflow_results[workflow_id].get("error", "Unknown error")
     
     return response
 
 
+# RCA job statuses (rca_jobs.py) as reported by the workflow status endpoint
+_JOB_WORKFLOW_STATUS = {
+    "queued": "queued",
+    "running": "processing",
+    "completed": "completed",
+    "dead": "failed",
+    "shed": "shed",
+}
+
+
+@app.get("/api/rca/queue", tags=["RCA Analysis"])
+async def get_rca_queue():
+    """RCA job queue depth, worker utilisation and job counts per status."""
+    return await rca_queue.stats()
+
+
+@app.post("/api/rca/jobs/{workflow_id}/retry", tags=["RCA Analysis"])
+async def retry_rca_job(workflow_id: str):
+    """Requeue a dead-lettered RCA workflow with a fresh set of attempts."""
+    try:
+        rca_queue.admit()
+    except RCAQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    if not await rca_queue.requeue(workflow_id):
+        raise HTTPException(status_code=404, detail="No dead-lettered job for this workflow")
+    workflow_status[workflow_id] = "queued"
+    if _MONGO_AVAILABLE:
+        await get_db().rca_results.update_one(
+            {"workflow_id": workflow_id, "status": "failed"},
+            {"$set": {"status": "queued"}, "$unset": {"error": ""}},
+        )
+    return {"workflow_id": workflow_id, "status": "queued"}
+
+
 @app.get("/api/rca/results", tags=["RCA Analysis"])
 async def list_rca_results(
-    limit: int = Query(100, ge=1, le=500),
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, description="default 100, at most 500 as JSON; "
+                                                         "unlimited for ndjson / csv exports"),
     equipment_id: Optional[str] = Query(None),
+    format: Optional[str] = Query(None, pattern="^(json|ndjson|csv)$"),
+    accept: Optional[str] = Header(None),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
 ):
-    """Return all completed RCA results from MongoDB (for dashboard cross-linking)."""
+    """Return all completed RCA results from MongoDB (for dashboard cross-linking).
+
+    JSON answers are pages, newest first; follow X-Next-Cursor for the next.
+    `format=ndjson|csv` (or an Accept header asking for either) streams every
+    matching result from `cursor` on instead of returning a JSON array.
+    """
     db = _require_db()
     query: Dict[str, Any] = {"status": "completed"}
     if equipment_id:
         query["equipment_id"] = equipment_id
-    docs = await db.rca_results.find(query).sort("completed_at", -1).to_list(length=limit)
+    fmt = pick_format(format, accept)
+    if fmt != "json":
+        rows = db.rca_results.find(after_cursor(query, "completed_at", DESCENDING, cursor))
+        rows = rows.sort([("completed_at", -1), ("_id", -1)])
+        if limit:
+            rows = rows.limit(limit)
+        return export_response(rows.batch_size(EXPORT_BATCH_SIZE), fmt, "rca_results")
+    if limit is not None and limit > 500:
+        raise HTTPException(status_code=422, detail="limit must be at most 500 for JSON; "
+                                                    "use format=ndjson or csv to export more")
+    docs, next_cursor = await fetch_page(db.rca_results, query, "completed_at", DESCENDING,
+                                         limit or 100, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     for doc in docs:
         doc["_id"] = str(doc["_id"])
     return docs
@@ -893,20 +1891,37 @@ async def get_rca_result(workflow_id: str):
     
     Only available when status is "completed".
     """
-    if workflow_id not in workflow_status:
-        raise HTTPException(status_code=404, detail="Workflow ID not found")
+    status = workflow_status.get(workflow_id)
+    result = workflow_results.get(workflow_id)
+    ensemble = workflow_ensemble_scores.get(workflow_id, {})
+    if status is None:
+        # Not run by this process (e.g. completed before a restart): read the
+        # stored result, or ask the job queue how far the workflow got
+        doc = None
+        if _MONGO_AVAILABLE:
+            doc = await get_db().rca_results.find_one({"workflow_id": workflow_id}, {"_id": 0})
+        if doc is not None and doc.get("status") == "completed":
+            status, result = "completed", doc
+            if doc.get("ensemble_score") is not None:
+                ensemble = {"ensemble_score": doc["ensemble_score"]}
+        else:
+            job = await rca_queue.get(workflow_id)
+            if job is not None:
+                status = _JOB_WORKFLOW_STATUS[job["status"]]
+            elif doc is not None:
+                status = doc.get("status", "unknown")
+            else:
+                raise HTTPException(status_code=404, detail="Workflow ID not found")
     
-    if workflow_status[workflow_id] != "completed":
+    if status != "completed":
         raise HTTPException(
             status_code=400,
-            detail=f"Workflow is {workflow_status[workflow_id]}, not completed"
+            detail=f"Workflow is {status}, not completed"
         )
     
-    if workflow_id not in workflow_results:
+    if result is None:
         raise HTTPException(status_code=404, detail="Result not found")
     
-    result = workflow_results[workflow_id]
-    
     # Build response
     return RCAResult(
         workflow_id=workflow_id,
@@ -926,7 +1941,9 @@ async def get_rca_result(workflow_id: str):
         planning_confidence=result.get("planning_confidence", 0.0),
         final_explanation=result.get("final_explanation"),
         explanation_file=f"phase5_agentic_reasoning/explanations/explanation_{result.get('anomaly_id')}.txt",
-        **workflow_ensemble_scores.get(workflow_id, {})
+        rca_path=result.get("rca_path", "llm"),
+        enrichment_status=result.get("enrichment_status"),
+        **ensemble
     )
 
 
@@ -1038,6 +2055,79 @@ async def check_health():
     )
 
 
+@app.get("/api/ready", tags=["Monitoring"])
+async def readiness():
+    """
+    Readiness probe for load balancers: 200 once the LSTM model is loaded and
+    warmed up on this worker, 503 while warm-up is pending or running. A failed
+    warm-up answers 200 with status "degraded" and the error while it is
+    retried, so the instance is not kept out of rotation for good.
+    """
+    body = {"ready": _model_warmup["status"] in ("ready", "degraded"), **_model_warmup}
+    if not body["ready"]:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+
+@app.get("/api/metrics", tags=["Monitoring"])
+async def get_metrics():
+    """
+    In-process performance metrics (model registry, inference executor, write-behind
+    buffer, equipment state, RCA job queue and coalescing, the KG fast path, the agents' LLM response cache, and per
+    model: inference batching, per-machine sequence windows, deadband suppression).
+    """
+    # The agents (and their cache) load with the first RCA workflow; don't import them here
+    workflow_module = sys.modules.get("workflow_loader")
+    llm_cache = getattr(workflow_module, "llm_cache", None)
+    return {
+        "inference_executor": inference_executor.metrics(),
+        "model_registry":    model_registry.metrics(),
+        "write_buffer":      write_buffer.metrics(),
+        "equipment_state":   equipment_state.metrics(),
+        "dashboard_summary": dashboard_counters.metrics(),
+        "sensor_series":     sensor_series.metrics(),
+        "reading_timestamps": {
+            "max_age_s":   _READING_MAX_AGE.total_seconds(),
+            "max_ahead_s": _READING_MAX_AHEAD.total_seconds(),
+            # readings stamped with the server time instead of their own
+            **_reading_timestamp_counts,
+        },
+        "config_cache":      config_cache.metrics(),
+        "rca_queue":         rca_queue.metrics(),
+        "rca_coalescer":     rca_coalescer.metrics(),
+        "kg_fast_path":      kg_fast_path.metrics(),
+        "llm_cache":         llm_cache.metrics() if llm_cache else None,
+        "models": {
+            key: {
+                "inference_batcher": pipeline.batcher.metrics(),
+                "sequence_buffers":  pipeline.sequence_buffers.metrics(),
+                "deadband":          pipeline.deadband.metrics() if pipeline.deadband else None,
+            }
+            for key, pipeline in _pipelines.items()
+        },
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+@app.get("/api/models", tags=["Monitoring"])
+async def list_models():
+    """Registered LSTM Autoencoders, their input shapes and which are loaded."""
+    loaded = {m["key"] for m in model_registry.metrics()["loaded"]}
+    return [
+        {
+            "key":        spec.key,
+            "domain":     spec.domain,
+            "version":    spec.version,
+            "file":       spec.filename,
+            "input_shape": [spec.window, spec.n_features],
+            "default":    model_registry.spec(spec.domain).key == spec.key,
+            "calibrated": spec.calibrated,
+            "loaded":     spec.key in loaded,
+        }
+        for spec in model_registry.specs()
+    ]
+
+
 # =================================================================
 # DASHBOARD SUPPORTING MODELS
 # =================================================================
@@ -1087,16 +2177,96 @@ def _require_db():
 # =================================================================
 
 @app.get("/api/equipment", tags=["Equipment"])
-async def list_equipment():
-    db = _require_db()
-    docs = await db.equipment.find({}, {"_id": 0}).to_list(length=100)
+async def list_equipment(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    status: Optional[str] = Query(None),
+    equipment_type: Optional[str] = Query(None, alias="type"),
+    location: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="comma-separated fields to return, "
+                                                    "e.g. equipment_id,status,health_score"),
+):
+    """Equipment ordered by equipment_id; follow X-Next-Cursor for the next page."""
+    _require_db()
+    await equipment_state.ensure_loaded()
+    where = {k: v for k, v in (("status", status), ("type", equipment_type),
+                               ("location", location)) if v}
+    projection = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    docs = equipment_state.list(
+        limit=limit + 1,
+        after=decode_key_cursor(cursor) if cursor else None,
+        where=where,
+        fields=projection and ["equipment_id", *projection],
+    )
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_key_cursor(docs[-1]["equipment_id"])
+    if projection and "equipment_id" not in projection:
+        for doc in docs:
+            doc.pop("equipment_id", None)
     return docs
 
 
+def _fleet_group(key: Optional[str]) -> List[Dict[str, Any]]:
+    return [
+        {"$group": {
+            "_id": key,
+            "count": {"$sum": 1},
+            "avg_health_score": {"$avg": "$health_score"},
+            "critical": {"$sum": {"$cond": [{"$eq": ["$status", "critical"]}, 1, 0]}},
+            "warning": {"$sum": {"$cond": [{"$eq": ["$status", "warning"]}, 1, 0]}},
+        }},
+        {"$sort": {"_id": 1}},
+    ]
+
+
+# One pass over the equipment collection, grouped four ways
+_FLEET_STATS_PIPELINE = [{"$facet": {
+    "totals":      _fleet_group(None),
+    "by_status":   _fleet_group("$status"),
+    "by_type":     _fleet_group("$type"),
+    "by_location": _fleet_group("$location"),
+}}]
+
+
+@app.get("/api/equipment/stats", tags=["Equipment"])
+async def get_fleet_stats():
+    """
+    Fleet totals and average health, broken down by status, type and location.
+
+    Computed by MongoDB in a single $facet aggregation (after flushing pending
+    health updates), so the response size depends on the number of distinct
+    statuses, types and locations, not on the number of machines.
+    """
+    db = _require_db()
+    await equipment_state.flush()
+    result = (await db.equipment.aggregate(_FLEET_STATS_PIPELINE).to_list(length=1))[0]
+
+    def _stats(row: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "count": row["count"],
+            "avg_health_score": round(row["avg_health_score"] or 0, 1),
+            "critical": row["critical"],
+            "warning": row["warning"],
+        }
+
+    totals = result["totals"][0] if result["totals"] else {
+        "count": 0, "avg_health_score": 0, "critical": 0, "warning": 0}
+    return {
+        **_stats(totals),
+        **{
+            facet: {str(row["_id"] or "unknown"): _stats(row) for row in result[facet]}
+            for facet in ("by_status", "by_type", "by_location")
+        },
+    }
+
+
 @app.get("/api/equipment/{equipment_id}", tags=["Equipment"])
 async def get_equipment(equipment_id: str):
-    db = _require_db()
-    doc = await db.equipment.find_one({"equipment_id": equipment_id}, {"_id": 0})
+    _require_db()
+    await equipment_state.ensure_loaded()
+    doc = equipment_state.get(equipment_id)
     if not doc:
         raise HTTPException(status_code=404, detail="Equipment not found")
     return doc
@@ -1116,6 +2286,8 @@ async def create_equipment(payload: EquipmentCreate):
         "created_at": datetime.now(timezone.utc),
     }
     await db.equipment.insert_one(doc)
+    doc.pop("_id", None)
+    equipment_state.apply(payload.equipment_id, doc, create=True)
     return {"equipment_id": payload.equipment_id, "created": True}
 
 
@@ -1125,12 +2297,12 @@ async def update_equipment(equipment_id: str, payload: EquipmentUpdate):
     updates = {k: v for k, v in payload.model_dump().items() if v is not None}
     if not updates:
         raise HTTPException(status_code=400, detail="No fields to update")
-    result = await db.equipment.update_one(
-        {"equipment_id": equipment_id},
-        {"$set": {**updates, "updated_at": datetime.now(timezone.utc)}},
-    )
+    updates["updated_at"] = datetime.now(timezone.utc)
+    result = await db.equipment.update_one({"equipment_id": equipment_id}, {"$set": updates})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Equipment not found")
+    if not equipment_state.apply(equipment_id, updates):
+        await equipment_state.load()   # created outside this process
     return {"equipment_id": equipment_id, "updated": True}
 
 
@@ -1140,21 +2312,22 @@ async def update_equipment(equipment_id: str, payload: EquipmentUpdate):
 
 @app.get("/api/alerts", tags=["Alerts"])
 async def list_alerts(
+    response: Response,
     equipment_id: Optional[str] = Query(None),
     unacknowledged_only: bool = Query(False),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
 ):
+    """Alerts, newest first; follow X-Next-Cursor to page through all of them."""
     db = _require_db()
     query: Dict[str, Any] = {}
     if equipment_id:
         query["equipment_id"] = equipment_id
     if unacknowledged_only:
         query["acknowledged"] = False
-    docs = (
-        await db.alerts.find(query)
-        .sort("timestamp", -1)
-        .to_list(length=limit)
-    )
+    docs, next_cursor = await fetch_page(db.alerts, query, "timestamp", DESCENDING, limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     # Serialise
     for doc in docs:
         doc["_id"] = str(doc["_id"])  # expose so frontend can use as alert_id
@@ -1168,11 +2341,15 @@ async def delete_alert(alert_id: str):
     from bson import ObjectId
     db = _require_db()
     try:
-        result = await db.alerts.delete_one({"_id": ObjectId(alert_id)})
+        deleted = await db.alerts.find_one_and_delete(
+            {"_id": ObjectId(alert_id)}, {"acknowledged": 1, "severity": 1},
+        )
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid alert ID format")
-    if result.deleted_count == 0:
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Alert not found")
+    if not deleted.get("acknowledged"):
+        dashboard_counters.alert_closed(deleted.get("severity"))
     return {"deleted": True}
 
 
@@ -1181,14 +2358,18 @@ async def acknowledge_alert(alert_id: str):
     from bson import ObjectId
     db = _require_db()
     try:
-        result = await db.alerts.update_one(
+        # Returns the alert as it was before, so only a real transition is counted
+        previous = await db.alerts.find_one_and_update(
             {"_id": ObjectId(alert_id)},
             {"$set": {"acknowledged": True, "acknowledged_at": datetime.now(timezone.utc)}},
+            {"acknowledged": 1, "severity": 1},
         )
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid alert ID format")
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Alert not found")
+    if not previous.get("acknowledged"):
+        dashboard_counters.alert_closed(previous.get("severity"))
     return {"acknowledged": True}
 
 
@@ -1202,14 +2383,7 @@ async def get_latest_readings(
     limit: int = Query(20, ge=1, le=100),
 ):
     db = _require_db()
-    query: Dict[str, Any] = {}
-    if equipment_id:
-        query["equipment_id"] = equipment_id
-    docs = (
-        await db.sensor_readings.find(query, {"_id": 0})
-        .sort("timestamp", -1)
-        .to_list(length=limit)
-    )
+    docs = await sensor_series.latest(db, equipment_id, limit)
     for doc in docs:
         if isinstance(doc.get("timestamp"), datetime):
             doc["timestamp"] = doc["timestamp"].isoformat()
@@ -1218,19 +2392,45 @@ async def get_latest_readings(
 
 @app.get("/api/sensors/history", tags=["Sensor History"])
 async def get_sensor_history(
+    response: Response,
     equipment_id: str = Query(...),
     hours: int = Query(24, ge=1, le=168),
+    resolution: str = Query("auto", pattern="^(auto|raw|1m|1h)$",
+                            description="raw readings, 1m / 1h rollups, or auto (by span)"),
+    max_points: Optional[int] = Query(None, ge=10, le=10_000,
+                                      description="downsample to about this many points (LTTB)"),
+    format: Optional[str] = Query(None, pattern="^(json|ndjson|csv)$"),
+    accept: Optional[str] = Header(None),
 ):
+    """
+    Sensor history for one machine, oldest first.
+
+    Short spans return raw readings; longer spans return 1-minute or 1-hour
+    rollup points, each with the mean of every sensor field under its usual
+    name plus `count`, `anomalies`, `min` and `max`. The tier used is returned
+    in the X-Sensor-Resolution header.
+
+    `max_points` downsamples the JSON array for charting (see downsample.py):
+    the shape of every sensor series is kept, as is every anomalous point. The
+    point count before downsampling is returned in X-Downsampled-From.
+
+    `format=ndjson|csv` (or an Accept header asking for either) streams the
+    points as they are read, without the 10,000-point cap of the JSON array
+    and without downsampling.
+    """
     db = _require_db()
     since = datetime.now(timezone.utc) - timedelta(hours=hours)
-    docs = (
-        await db.sensor_readings.find(
-            {"equipment_id": equipment_id, "timestamp": {"$gte": since}},
-            {"_id": 0},
-        )
-        .sort("timestamp", 1)
-        .to_list(length=10_000)
-    )
+    tier = sensor_series.pick_tier(timedelta(hours=hours)) if resolution == "auto" else resolution
+    fmt = pick_format(format, accept)
+    if fmt != "json":
+        points = sensor_series.iter_history(db, equipment_id, since, tier, EXPORT_BATCH_SIZE)
+        return export_response(points, fmt, f"sensor_history_{equipment_id}_{hours}h",
+                               headers={"X-Sensor-Resolution": tier})
+    docs = await sensor_series.history(db, equipment_id, since, tier)
+    response.headers["X-Sensor-Resolution"] = tier
+    if max_points and len(docs) > max_points:
+        response.headers["X-Downsampled-From"] = str(len(docs))
+        docs = downsample_points(docs, max_points)
     for doc in docs:
         if isinstance(doc.get("timestamp"), datetime):
             doc["timestamp"] = doc["timestamp"].isoformat()
@@ -1243,20 +2443,23 @@ async def get_sensor_history(
 
 @app.get("/api/maintenance/tasks", tags=["Maintenance"])
 async def list_maintenance_tasks(
+    response: Response,
     equipment_id: Optional[str] = Query(None),
     status: Optional[str] = Query(None),
+    limit: int = Query(200, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
 ):
+    """Maintenance tasks, soonest due first; follow X-Next-Cursor for the next page."""
     db = _require_db()
     query: Dict[str, Any] = {}
     if equipment_id:
         query["equipment_id"] = equipment_id
     if status:
         query["status"] = status
-    docs = (
-        await db.maintenance_tasks.find(query)
-        .sort("due_date", 1)
-        .to_list(length=200)
-    )
+    docs, next_cursor = await fetch_page(db.maintenance_tasks, query, "due_date", ASCENDING,
+                                         limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     for doc in docs:
         doc["_id"] = str(doc["_id"])
         for field in ("due_date", "created_at"):
@@ -1282,6 +2485,8 @@ async def update_maintenance_task(task_id: str, payload: MaintenanceTaskPatch):
         raise HTTPException(status_code=400, detail="Invalid task ID format")
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Task not found")
+    if payload.status and task_doc:
+        dashboard_counters.task_status_changed(task_doc.get("status"), payload.status)
 
     # When task is marked done, write resolved_by_task_id back to the linked alert
     if payload.status == "done" and task_doc and task_doc.get("alert_id"):
@@ -1302,10 +2507,8 @@ async def update_maintenance_task(task_id: str, payload: MaintenanceTaskPatch):
 @app.post("/api/maintenance/tasks", status_code=201, tags=["Maintenance"])
 async def create_maintenance_task(payload: MaintenanceTaskCreate):
     db = _require_db()
-    # Fetch live cost config from DB
-    cfg = await db.settings.find_one({"config_id": "maintenance_costs"})
-    costs = cfg["costs"] if cfg else _cost_cache
-    estimated_cost = costs.get(payload.priority, 320)
+    cfg = await config_cache.get("maintenance_costs")
+    estimated_cost = cfg["costs"].get(payload.priority, 320)
 
     due_date = None
     if payload.due_date:
@@ -1327,6 +2530,7 @@ async def create_maintenance_task(payload: MaintenanceTaskCreate):
     }
     result = await db.maintenance_tasks.insert_one(doc)
     task_id_str = str(result.inserted_id)
+    dashboard_counters.task_status_changed(None, "open")
 
     # Write task_id back to the originating alert so History can cross-link
     if payload.alert_id:
@@ -1344,18 +2548,20 @@ async def create_maintenance_task(payload: MaintenanceTaskCreate):
 
 @app.get("/api/maintenance/history", tags=["Maintenance"])
 async def get_maintenance_history(
+    response: Response,
     equipment_id: Optional[str] = Query(None),
     limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
 ):
+    """Completed maintenance, newest first; follow X-Next-Cursor for the next page."""
     db = _require_db()
     query: Dict[str, Any] = {}
     if equipment_id:
         query["equipment_id"] = equipment_id
-    docs = (
-        await db.maintenance_history.find(query, {"_id": 0})
-        .sort("completed_at", -1)
-        .to_list(length=limit)
-    )
+    docs, next_cursor = await fetch_page(db.maintenance_history, query, "completed_at", DESCENDING,
+                                         limit, cursor, projection={"_id": 0})
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     for doc in docs:
         if isinstance(doc.get("completed_at"), datetime):
             doc["completed_at"] = doc["completed_at"].isoformat()
@@ -1383,6 +2589,7 @@ async def create_maintenance_history(payload: MaintenanceHistoryCreate):
         {"equipment_id": payload.equipment_id},
         {"$set": {"last_maintenance": completed_at}},
     )
+    equipment_state.apply(payload.equipment_id, {"last_maintenance": completed_at})
     return {"inserted_id": str(result.inserted_id), "created": True}
 
 
@@ -1393,11 +2600,8 @@ async def create_maintenance_history(payload: MaintenanceHistoryCreate):
 @app.get("/api/maintenance/cost-config", tags=["Maintenance"])
 async def get_cost_config():
     """Return the per-severity maintenance cost configuration stored in MongoDB."""
-    db = _require_db()
-    cfg = await db.settings.find_one({"config_id": "maintenance_costs"}, {"_id": 0})
-    if not cfg:
-        return {"costs": _cost_cache, "currency": "USD"}
-    return cfg
+    _require_db()
+    return await config_cache.get("maintenance_costs")
 
 
 class CostConfigUpdate(BaseModel):
@@ -1414,13 +2618,18 @@ async def update_cost_config(payload: CostConfigUpdate):
     updates = {k: v for k, v in payload.model_dump().items() if v is not None}
     if not updates:
         raise HTTPException(status_code=400, detail="No fields to update")
-    _cost_cache.update(updates)
-    await db.settings.update_one(
+    from pymongo import ReturnDocument
+    cfg = await db.settings.find_one_and_update(
         {"config_id": "maintenance_costs"},
-        {"$set": {"costs": _cost_cache, "updated_at": datetime.now(timezone.utc)}},
+        {"$set": {**{f"costs.{k}": v for k, v in updates.items()},
+                  "updated_at": datetime.now(timezone.utc)}},
+        {"_id": 0},
         upsert=True,
+        return_document=ReturnDocument.AFTER,
     )
-    return {"updated": True, "costs": _cost_cache}
+    cfg = _cost_config_doc(cfg)
+    config_cache.set("maintenance_costs", cfg)
+    return {"updated": True, "costs": cfg["costs"]}
 
 
 # =================================================================
@@ -1428,52 +2637,34 @@ async def update_cost_config(payload: CostConfigUpdate):
 # =================================================================
 
 @app.get("/api/dashboard/summary", tags=["Dashboard"])
-async def get_dashboard_summary():
-    db = _require_db()
-
-    # Equipment stats
-    equipment_cursor = db.equipment.find({}, {"_id": 0, "status": 1, "health_score": 1})
-    equipment_docs = await equipment_cursor.to_list(length=100)
-    total_equipment = len(equipment_docs)
-    operational = sum(1 for e in equipment_docs if e.get("status") == "operational")
-    warning = sum(1 for e in equipment_docs if e.get("status") == "warning")
-    critical = sum(1 for e in equipment_docs if e.get("status") == "critical")
-    avg_health = (
-        round(sum(e.get("health_score", 100) for e in equipment_docs) / total_equipment, 1)
-        if total_equipment else 0
-    )
-
-    # Unacknowledged alerts
-    active_alerts = await db.alerts.count_documents({"acknowledged": False})
-    critical_alerts = await db.alerts.count_documents(
-        {"acknowledged": False, "severity": "critical"}
-    )
-
-    # Recent anomaly count (last 24 h)
-    since = datetime.now(timezone.utc) - timedelta(hours=24)
-    recent_anomalies = await db.sensor_readings.count_documents(
-        {"anomaly_detected": True, "timestamp": {"$gte": since}}
-    )
+async def get_dashboard_summary(
+    refresh: bool = Query(False, description="recount from MongoDB before answering"),
+):
+    """
+    Fleet summary for the dashboard, served from in-memory counters.
 
-    # Open maintenance tasks
-    open_tasks = await db.maintenance_tasks.count_documents(
-        {"status": {"$in": ["open", "in_progress"]}}
-    )
+    Equipment totals come from the equipment state table; alert, anomaly and
+    task counts are maintained as they change and reconciled against MongoDB
+    every RCA_SUMMARY_RECONCILE_S. `refresh=true` reloads equipment and
+    reconciles first (the old per-request query fan-out).
+    """
+    _require_db()
+    if refresh:
+        await equipment_state.load()
+        await dashboard_counters.reconcile()
+    else:
+        await equipment_state.ensure_loaded()
+        await dashboard_counters.ensure_reconciled()
+    counts = dashboard_counters.snapshot()
 
     return {
-        "equipment": {
-            "total": total_equipment,
-            "operational": operational,
-            "warning": warning,
-            "critical": critical,
-            "avg_health_score": avg_health,
-        },
+        "equipment": equipment_state.summary(),
         "alerts": {
-            "active": active_alerts,
-            "critical": critical_alerts,
+            "active": counts["active_alerts"],
+            "critical": counts["critical_alerts"],
         },
-        "anomalies_last_24h": recent_anomalies,
-        "open_maintenance_tasks": open_tasks,
+        "anomalies_last_24h": counts["anomalies"],
+        "open_maintenance_tasks": counts["open_tasks"],
         "generated_at": datetime.now(timezone.utc).isoformat(),
     }
 
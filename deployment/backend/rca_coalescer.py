@@ -0,0 +1,112 @@
+"""Coalescing of duplicate RCA workflows for one machine and failure signature.
+
+A machine that stays anomalous used to start a new RCA workflow — three LLM
+calls — for every anomalous reading, so one bad spindle produced hundreds of
+identical diagnoses an hour. The WorkflowCoalescer remembers, per failure
+signature (equipment_id, severity and the set of its top contributing
+features), the workflow started for it. An anomaly with the same signature
+within `window_s` of that start attaches to the existing workflow — queued,
+running or finished — instead of starting another; its alert links to the
+shared workflow_id. Once the window has passed the next anomaly starts a
+fresh diagnosis, so a long incident is re-analysed every `window_s`.
+
+Workflows that are dead-lettered or shed are forgotten, so the next matching
+anomaly starts a new one. The signatures live in memory: after a restart, or
+in another API process, the first matching anomaly starts its own workflow.
+
+Configuration (environment):
+  - RCA_COALESCE_WINDOW_S     : seconds anomalies attach to a workflow after it starts; 0 disables (default 900)
+  - RCA_COALESCE_TOP_FEATURES : top contributing features in the signature (default 3)
+"""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+Signature = Tuple[str, str, FrozenSet[str]]
+
+
+class WorkflowCoalescer:
+    """Failure signature -> the workflow started for it, kept for `window_s`.
+
+    Used from the event loop only.
+    """
+
+    def __init__(self, window_s: float = 900.0, top_features: int = 3):
+        self.window = max(0.0, float(window_s))
+        self.top_features = max(1, int(top_features))
+        # Oldest first, so expired signatures are pruned from the front
+        self._workflows: "OrderedDict[Signature, Tuple[str, float]]" = OrderedDict()
+        self._signatures: Dict[str, Signature] = {}
+        self._attached: Dict[str, int] = {}
+        self._started = 0
+        self._attached_total = 0
+
+    @classmethod
+    def from_env(cls) -> "WorkflowCoalescer":
+        return cls(
+            window_s=float(os.getenv("RCA_COALESCE_WINDOW_S", "900")),
+            top_features=int(os.getenv("RCA_COALESCE_TOP_FEATURES", "3")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.window > 0
+
+    def signature(self, equipment_id: str, severity: str,
+                  top_features: List[Dict[str, Any]]) -> Signature:
+        names = frozenset(f.get("feature_name", "") for f in top_features[:self.top_features])
+        return equipment_id, severity, names
+
+    def lookup(self, signature: Signature) -> Optional[str]:
+        """The workflow_id an anomaly with this signature should attach to, if any."""
+        self._prune()
+        entry = self._workflows.get(signature)
+        return entry[0] if entry is not None else None
+
+    def register(self, signature: Signature, workflow_id: str) -> None:
+        """Record a workflow just started for `signature`."""
+        if not self.enabled:
+            return
+        self._forget_signature(signature)
+        self._workflows[signature] = (workflow_id, time.monotonic())
+        self._signatures[workflow_id] = signature
+        self._attached[workflow_id] = 0
+        self._started += 1
+
+    def attach(self, workflow_id: str) -> None:
+        """Count an anomaly that joined `workflow_id` instead of starting a workflow."""
+        if workflow_id in self._attached:
+            self._attached[workflow_id] += 1
+        self._attached_total += 1
+
+    def forget(self, workflow_id: str) -> None:
+        """Stop attaching to `workflow_id` (it failed or was shed)."""
+        signature = self._signatures.get(workflow_id)
+        if signature is not None:
+            self._forget_signature(signature)
+
+    def metrics(self) -> Dict[str, Any]:
+        anomalies = self._started + self._attached_total
+        return {
+            "window_s":           self.window,
+            "signatures":         len(self._workflows),
+            "workflows_started":  self._started,
+            "anomalies_attached": self._attached_total,
+            "coalesce_ratio":     round(self._attached_total / anomalies, 4) if anomalies else None,
+        }
+
+    def _forget_signature(self, signature: Signature) -> None:
+        entry = self._workflows.pop(signature, None)
+        if entry is not None:
+            self._signatures.pop(entry[0], None)
+            self._attached.pop(entry[0], None)
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.window
+        while self._workflows:
+            signature, (_, started) = next(iter(self._workflows.items()))
+            if started > cutoff:
+                break
+            self._forget_signature(signature)
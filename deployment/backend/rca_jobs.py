@@ -0,0 +1,811 @@
+"""Durable, bounded RCA job queue served by a pool of async workers.
+
+RCA workflows used to be handed to FastAPI BackgroundTasks: every anomaly
+started a multi-minute workflow on the shared request thread pool with no
+bound, no retry, and nothing left of it after a restart. RCAJobQueue stores
+each workflow as a job and runs at most `workers` of them at a time:
+
+  - Jobs live in a job store — SQLite on local disk by default, or the MongoDB
+    `rca_jobs` collection when several API processes should share one queue.
+    The SQLite store does not depend on MongoDB, so anomalies keep being
+    queued while Atlas is unavailable (see write_spool.py).
+  - A worker claims the most urgent due job — by severity, then by ensemble
+    score, then oldest first (`job_priority`) — by setting a lease
+    (`lease_expires_at`, the visibility timeout), and renews it while the
+    workflow runs. A job whose worker died — crash, restart, killed pod —
+    becomes claimable again once its lease lapses.
+  - A running workflow cannot be interrupted (it blocks a thread), so urgent
+    work pre-empts at claim time instead: a critical job overtakes every
+    queued medium one, and `reserved_workers` only ever take critical and
+    high jobs, so those do not wait for a long low-severity run to finish.
+  - Every job gets a deadline from its severity. While `shed_backlog` or more
+    jobs are waiting, low-severity jobs are shed: new ones are not queued,
+    and queued ones past their deadline are dropped (status "shed") rather
+    than run late. Time to root cause and missed deadlines are reported per
+    severity.
+  - A failed attempt is retried after `retry_backoff_s`, doubled per attempt;
+    after `max_attempts` the job is dead-lettered (status "dead") and kept,
+    with its last error, until it is requeued.
+  - `admit` refuses work with RCAQueueFull once `max_pending` jobs are
+    waiting, so a burst of anomalies cannot grow the backlog without limit.
+    The count is this process's view, re-read from the store whenever a
+    worker finds nothing due.
+
+The workflow itself is blocking; handlers run it with `run_blocking`, on the
+queue's own thread pool, so RCA never occupies the request thread pool.
+
+Configuration (environment):
+  - RCA_JOB_STORE           : "sqlite" (default) or "mongo"
+  - RCA_JOB_SQLITE_PATH     : SQLite job database (default backend/rca_jobs.sqlite3)
+  - RCA_JOB_WORKERS         : workflows run concurrently (default 2)
+  - RCA_JOB_MAX_PENDING     : waiting jobs before new ones are refused (default 1000)
+  - RCA_JOB_VISIBILITY_S    : lease on a claimed job, renewed while it runs (default 300)
+  - RCA_JOB_MAX_ATTEMPTS    : attempts before a job is dead-lettered (default 3)
+  - RCA_JOB_RETRY_BACKOFF_S : delay before the first retry, doubled per attempt (default 30)
+  - RCA_JOB_POLL_S          : how often idle workers look for due jobs (default 1)
+  - RCA_JOB_DEADLINES_S     : per-severity deadlines, e.g. "critical=120,low=7200"
+                              (default critical=300, high=900, medium=3600, low=14400)
+  - RCA_JOB_SHED_BACKLOG    : waiting jobs at which shed severities are shed (default 100)
+  - RCA_JOB_SHED_SEVERITIES : severities that may be shed (default "low")
+  - RCA_JOB_RESERVED_WORKERS: workers kept for critical and high jobs (default 1)
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rca_jobs.sqlite3")
+
+# Completed jobs are kept this long (the MongoDB store uses a TTL index on finished_at)
+COMPLETED_RETENTION_S = 7 * 86_400
+
+JOB_STATUSES = ("queued", "running", "completed", "dead", "shed")
+
+# Claim order and default deadlines (seconds from enqueue to root cause) per severity
+SEVERITY_RANK = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+DEFAULT_DEADLINES_S = {"critical": 300.0, "high": 900.0, "medium": 3600.0, "low": 14400.0}
+_URGENT_BELOW = float(SEVERITY_RANK["medium"])   # priorities of critical and high jobs
+
+Handler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+FailureHook = Callable[[str, BaseException, bool], None]
+
+
+class RCAQueueFull(RuntimeError):
+    """Raised by `admit` when the queue already holds `max_pending` waiting jobs."""
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ----------------------------------------------------------------------
+# Stores
+# ----------------------------------------------------------------------
+
+class MongoJobStore:
+    """Jobs as documents in the `rca_jobs` collection; claims are find_one_and_update."""
+
+    def __init__(self, get_db: Callable[[], Any]):
+        self.get_db = get_db
+
+    @property
+    def _jobs(self):
+        return self.get_db().rca_jobs
+
+    async def insert(self, jobs: List[Dict[str, Any]]) -> None:
+        await self._jobs.insert_many([dict(job) for job in jobs], ordered=False)
+
+    async def claim(self, worker: str, now: datetime, lease_until: datetime,
+                    below_priority: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        from pymongo import ASCENDING, ReturnDocument
+        query: Dict[str, Any] = {"$or": [
+            {"status": "queued", "available_at": {"$lte": now}},
+            {"status": "running", "lease_expires_at": {"$lte": now}},
+        ]}
+        if below_priority is not None:
+            query["priority"] = {"$lt": below_priority}
+        job = await self._jobs.find_one_and_update(
+            query,
+            {"$set": {"status": "running", "worker": worker,
+                      "lease_expires_at": lease_until, "updated_at": now},
+             "$inc": {"attempts": 1}},
+            sort=[("priority", ASCENDING), ("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if job is not None:
+            job.pop("_id", None)
+        return job
+
+    async def update(self, job_id: str, worker: str, fields: Dict[str, Any]) -> bool:
+        """Set `fields` on a job `worker` still holds; False if its lease was lost."""
+        result = await self._jobs.update_one(
+            {"job_id": job_id, "worker": worker, "status": "running"}, {"$set": fields},
+        )
+        return result.matched_count == 1
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._jobs.find_one({"job_id": job_id}, {"_id": 0})
+
+    async def requeue(self, job_id: str, now: datetime) -> bool:
+        result = await self._jobs.update_one(
+            {"job_id": job_id, "status": "dead"},
+            {"$set": {"status": "queued", "attempts": 0, "available_at": now, "updated_at": now}},
+        )
+        return result.matched_count == 1
+
+    async def shed_expired(self, severities: Sequence[str], now: datetime) -> List[Tuple[str, str]]:
+        """Shed queued jobs of `severities` past their deadline; returns (job_id, severity) pairs."""
+        query = {"status": "queued", "severity": {"$in": list(severities)}, "deadline_at": {"$lte": now}}
+        shed = [(doc["job_id"], doc["severity"])
+                async for doc in self._jobs.find(query, {"_id": 0, "job_id": 1, "severity": 1})]
+        if shed:
+            await self._jobs.update_many(
+                {"job_id": {"$in": [job_id for job_id, _ in shed]}, "status": "queued"},
+                {"$set": {"status": "shed", "finished_at": now, "updated_at": now}},
+            )
+        return shed
+
+    async def counts(self) -> Dict[str, int]:
+        rows = await self._jobs.aggregate(
+            [{"$group": {"_id": "$status", "n": {"$sum": 1}}}]
+        ).to_list(length=None)
+        return {row["_id"]: row["n"] for row in rows}
+
+    async def purge(self, before: datetime) -> int:
+        return 0   # the TTL index on finished_at removes completed and shed jobs
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteJobStore:
+    """Jobs in a local SQLite table; one connection, used from worker threads under a lock."""
+
+    _COLUMNS = ("job_id", "status", "payload", "severity", "priority", "attempts",
+                "max_attempts", "worker", "available_at", "lease_expires_at", "deadline_at",
+                "created_at", "updated_at", "finished_at", "last_error")
+    _TIMES = ("available_at", "lease_expires_at", "deadline_at", "created_at", "updated_at",
+              "finished_at")
+    # Columns added after the table was first shipped, created on open if missing
+    _ADDED_COLUMNS = {"severity": "TEXT", "priority": "REAL NOT NULL DEFAULT 2.5",
+                      "deadline_at": "REAL"}
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rca_jobs ("
+            " job_id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL,"
+            " worker TEXT, available_at REAL NOT NULL, lease_expires_at REAL,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL, finished_at REAL,"
+            " last_error TEXT)"
+        )
+        present = {row["name"] for row in self._conn.execute("PRAGMA table_info(rca_jobs)")}
+        for column, decl in self._ADDED_COLUMNS.items():
+            if column not in present:
+                self._conn.execute(f"ALTER TABLE rca_jobs ADD COLUMN {column} {decl}")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_next ON rca_jobs (status, priority, available_at)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_lease ON rca_jobs (status, lease_expires_at)"
+        )
+
+    @classmethod
+    def from_env(cls) -> "SQLiteJobStore":
+        return cls(os.getenv("RCA_JOB_SQLITE_PATH", DEFAULT_SQLITE_PATH))
+
+    async def insert(self, jobs: List[Dict[str, Any]]) -> None:
+        rows = [tuple(self._encode(col, job.get(col)) for col in self._COLUMNS) for job in jobs]
+        sql = (f"INSERT INTO rca_jobs ({', '.join(self._COLUMNS)}) "
+               f"VALUES ({', '.join('?' * len(self._COLUMNS))})")
+        await asyncio.to_thread(self._executemany, sql, rows)
+
+    async def claim(self, worker: str, now: datetime, lease_until: datetime,
+                    below_priority: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._claim, worker, now.timestamp(),
+                                       lease_until.timestamp(), below_priority)
+
+    async def update(self, job_id: str, worker: str, fields: Dict[str, Any]) -> bool:
+        assignments = ", ".join(f"{col} = ?" for col in fields)
+        params = [self._encode(col, value) for col, value in fields.items()] + [job_id, worker]
+        changed = await asyncio.to_thread(
+            self._execute,
+            f"UPDATE rca_jobs SET {assignments} "
+            f"WHERE job_id = ? AND worker = ? AND status = 'running'", params,
+        )
+        return changed == 1
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def requeue(self, job_id: str, now: datetime) -> bool:
+        changed = await asyncio.to_thread(
+            self._execute,
+            "UPDATE rca_jobs SET status = 'queued', attempts = 0, available_at = ?, updated_at = ? "
+            "WHERE job_id = ? AND status = 'dead'", (now.timestamp(), now.timestamp(), job_id),
+        )
+        return changed == 1
+
+    async def shed_expired(self, severities: Sequence[str], now: datetime) -> List[Tuple[str, str]]:
+        return await asyncio.to_thread(self._shed_expired, list(severities), now.timestamp())
+
+    async def counts(self) -> Dict[str, int]:
+        rows = await asyncio.to_thread(
+            self._query, "SELECT status, COUNT(*) AS n FROM rca_jobs GROUP BY status", ()
+        )
+        return {row["status"]: row["n"] for row in rows}
+
+    async def purge(self, before: datetime) -> int:
+        return await asyncio.to_thread(
+            self._execute,
+            "DELETE FROM rca_jobs WHERE status IN ('completed', 'shed') AND finished_at < ?",
+            (before.timestamp(),),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    # -- blocking helpers, run on a worker thread ----------------------
+
+    def _claim(self, worker: str, now: float, lease_until: float,
+               below_priority: Optional[float]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT job_id FROM rca_jobs"
+                    " WHERE ((status = 'queued' AND available_at <= ?)"
+                    "     OR (status = 'running' AND lease_expires_at <= ?))"
+                    "   AND priority < ?"
+                    " ORDER BY priority, available_at LIMIT 1",
+                    (now, now, float("inf") if below_priority is None else below_priority),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE rca_jobs SET status = 'running', worker = ?, lease_expires_at = ?,"
+                    " updated_at = ?, attempts = attempts + 1 WHERE job_id = ?",
+                    (worker, lease_until, now, row["job_id"]),
+                )
+                job = self._conn.execute(
+                    "SELECT * FROM rca_jobs WHERE job_id = ?", (row["job_id"],)
+                ).fetchone()
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._decode(job)
+
+    def _shed_expired(self, severities: List[str], now: float) -> List[Tuple[str, str]]:
+        marks = ", ".join("?" * len(severities))
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                shed = [(row["job_id"], row["severity"]) for row in self._conn.execute(
+                    f"SELECT job_id, severity FROM rca_jobs WHERE status = 'queued'"
+                    f" AND severity IN ({marks}) AND deadline_at <= ?", (*severities, now),
+                )]
+                self._conn.executemany(
+                    "UPDATE rca_jobs SET status = 'shed', finished_at = ?, updated_at = ?"
+                    " WHERE job_id = ?", [(now, now, job_id) for job_id, _ in shed],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return shed
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM rca_jobs WHERE job_id = ?", (job_id,))
+        return self._decode(rows[0]) if rows else None
+
+    def _execute(self, sql: str, params) -> int:
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def _executemany(self, sql: str, rows) -> None:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(sql, rows)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _query(self, sql: str, params) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _encode(self, column: str, value: Any) -> Any:
+        if column == "payload":
+            return json.dumps(value, default=str)
+        if isinstance(value, datetime):
+            return value.timestamp()
+        return value
+
+    def _decode(self, row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        for column in self._TIMES:
+            if job[column] is not None:
+                job[column] = datetime.fromtimestamp(job[column], timezone.utc)
+        return job
+
+
+def job_store_from_env(get_db: Optional[Callable[[], Any]] = None):
+    """The store named by RCA_JOB_STORE; "mongo" needs `get_db` (MongoDB initialised)."""
+    if os.getenv("RCA_JOB_STORE", "sqlite") == "mongo":
+        if get_db is not None:
+            return MongoJobStore(get_db)
+        logger.warning("RCA_JOB_STORE=mongo but MongoDB is unavailable; using SQLite")
+    return SQLiteJobStore.from_env()
+
+
+# ----------------------------------------------------------------------
+# Queue
+# ----------------------------------------------------------------------
+
+class JobRequest(NamedTuple):
+    """A job to enqueue; `severity` and `score` (the ensemble score) set its priority."""
+    job_id: str
+    payload: Dict[str, Any]
+    severity: str = "medium"
+    score: float = 0.0
+
+
+def job_priority(severity: str, score: float) -> float:
+    """Claim order, lowest first: severity class, then the higher ensemble score."""
+    rank = SEVERITY_RANK.get(severity, SEVERITY_RANK["medium"])
+    return rank + (1.0 - min(max(float(score), 0.0), 1.0)) / 2
+
+
+def _parse_deadlines(spec: str) -> Dict[str, float]:
+    deadlines = dict(DEFAULT_DEADLINES_S)
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in deadlines:
+            raise ValueError(f"Unknown severity: {name!r}")
+        deadlines[name] = float(value)
+    return deadlines
+
+
+def _aware(value: datetime) -> datetime:
+    # MongoDB hands dates back naive (UTC)
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+async def _call_hook(hook: Optional[Callable[..., Any]], *args: Any) -> None:
+    if hook is None:
+        return
+    try:
+        result = hook(*args)
+        if inspect.isawaitable(result):
+            await result
+    except Exception as exc:
+        logger.warning("RCA job hook %s failed: %s", getattr(hook, "__name__", hook), exc)
+
+
+class RCAJobQueue:
+    """Stored jobs, each run by `await handler(job_id, payload)` on one of `workers` workers.
+
+    `on_failure(job_id, error, retrying)` is called after every failed
+    attempt and `on_shed(job_id)` for every queued job that is shed; either
+    may be a coroutine function.
+    """
+
+    def __init__(self, handler: Handler, workers: int = 2, max_pending: int = 1000,
+                 visibility_timeout_s: float = 300.0, max_attempts: int = 3,
+                 retry_backoff_s: float = 30.0, poll_interval_s: float = 1.0,
+                 deadlines_s: Optional[Dict[str, float]] = None, shed_backlog: int = 100,
+                 shed_severities: Sequence[str] = ("low",), reserved_workers: int = 1,
+                 on_failure: Optional[FailureHook] = None,
+                 on_shed: Optional[Callable[[str], Any]] = None):
+        self.handler = handler
+        self.on_failure = on_failure
+        self.on_shed = on_shed
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.visibility_timeout = max(1.0, float(visibility_timeout_s))
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_backoff = max(0.0, float(retry_backoff_s))
+        self.poll_interval = max(0.01, float(poll_interval_s))
+        self.deadlines = {**DEFAULT_DEADLINES_S, **(deadlines_s or {})}
+        self.shed_backlog = max(0, int(shed_backlog))
+        self.shed_severities = tuple(shed_severities)
+        # At least one worker always takes any job
+        self.reserved_workers = min(max(0, int(reserved_workers)), self.workers - 1)
+
+        self._owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._store = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Future] = None
+
+        self._pending = 0
+        self._running: Dict[str, float] = {}   # job_id -> monotonic start
+        self._started_at: Optional[float] = None
+        self._busy_s = 0.0
+        self._enqueued = 0
+        self._rejected = 0
+        self._completed = 0
+        self._retried = 0
+        self._dead_lettered = 0
+        self._lost_leases = 0
+        self._by_severity = {sev: {"completed": 0, "shed": 0, "deadline_missed": 0,
+                                   "latency_s": deque(maxlen=1000)}
+                             for sev in SEVERITY_RANK}
+
+    @classmethod
+    def from_env(cls, handler: Handler, on_failure: Optional[FailureHook] = None,
+                 on_shed: Optional[Callable[[str], Any]] = None) -> "RCAJobQueue":
+        return cls(
+            handler,
+            workers=int(os.getenv("RCA_JOB_WORKERS", "2")),
+            max_pending=int(os.getenv("RCA_JOB_MAX_PENDING", "1000")),
+            visibility_timeout_s=float(os.getenv("RCA_JOB_VISIBILITY_S", "300")),
+            max_attempts=int(os.getenv("RCA_JOB_MAX_ATTEMPTS", "3")),
+            retry_backoff_s=float(os.getenv("RCA_JOB_RETRY_BACKOFF_S", "30")),
+            poll_interval_s=float(os.getenv("RCA_JOB_POLL_S", "1")),
+            deadlines_s=_parse_deadlines(os.getenv("RCA_JOB_DEADLINES_S", "")),
+            shed_backlog=int(os.getenv("RCA_JOB_SHED_BACKLOG", "100")),
+            shed_severities=[s.strip() for s in os.getenv("RCA_JOB_SHED_SEVERITIES", "low").split(",")
+                             if s.strip()],
+            reserved_workers=int(os.getenv("RCA_JOB_RESERVED_WORKERS", "1")),
+            on_failure=on_failure,
+            on_shed=on_shed,
+        )
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self, store=None) -> None:
+        """Open `store` (default: the SQLite store) and start the workers.
+
+        Jobs a previous run left queued are picked up at once; jobs it left
+        running, once their lease lapses.
+        """
+        if store is not None and store is not self._store:
+            if self._store is not None:
+                self._store.close()
+            self._store = store
+        if self._store is None:
+            self._store = SQLiteJobStore.from_env()
+        try:
+            await self._store.purge(_utcnow() - timedelta(seconds=COMPLETED_RETENTION_S))
+            self._pending = (await self._store.counts()).get("queued", 0)
+        except Exception as exc:
+            logger.warning("RCA job store unavailable at start: %s", exc)
+        self._ensure_workers()
+
+    async def close(self) -> None:
+        """Stop the workers and close the store; jobs they were running go back to the queue."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+        self._loop = None
+
+    # ------------------------------------------------------------------
+    # Producing
+    # ------------------------------------------------------------------
+
+    def admit(self, severities: Sequence[str] = ("medium",), allow_shed: bool = True) -> List[bool]:
+        """Which of these new jobs to enqueue.
+
+        While `shed_backlog` or more jobs are waiting, jobs of a shed severity
+        are turned away (False). Raises RCAQueueFull unless the rest fit
+        under `max_pending`.
+        """
+        pending = self._pending
+        keep = []
+        for severity in severities:
+            shed = (allow_shed and severity in self.shed_severities
+                    and pending >= self.shed_backlog)
+            keep.append(not shed)
+            pending += not shed
+        if pending > self.max_pending:
+            self._rejected += len(severities)
+            raise RCAQueueFull(
+                f"RCA job queue is full ({self._pending} jobs waiting, limit {self.max_pending})"
+            )
+        for severity, kept in zip(severities, keep):
+            if not kept:
+                self._count(severity)["shed"] += 1
+        return keep
+
+    async def enqueue_many(self, jobs: Sequence[JobRequest]) -> None:
+        """Store jobs; call `admit` first to respect the bound and shed low severities."""
+        if not jobs:
+            return
+        self._ensure_workers()
+        now = _utcnow()
+        docs = []
+        for job in jobs:
+            severity = job.severity if job.severity in SEVERITY_RANK else "medium"
+            docs.append({
+                "job_id": job.job_id, "status": "queued", "payload": job.payload,
+                "severity": severity, "priority": job_priority(severity, job.score),
+                "attempts": 0, "max_attempts": self.max_attempts, "worker": None,
+                "available_at": now, "lease_expires_at": None,
+                "deadline_at": now + timedelta(seconds=self.deadlines[severity]),
+                "created_at": now, "updated_at": now, "finished_at": None, "last_error": None,
+            })
+        await self._store.insert(docs)
+        self._pending += len(jobs)
+        self._enqueued += len(jobs)
+        self._notify()
+
+    async def enqueue(self, job_id: str, payload: Dict[str, Any],
+                      severity: str = "medium", score: float = 0.0) -> None:
+        await self.enqueue_many([JobRequest(job_id, payload, severity, score)])
+
+    async def requeue(self, job_id: str) -> bool:
+        """Put a dead-lettered job back in the queue with fresh attempts; False if it is not dead."""
+        self._ensure_workers()
+        if not await self._store.requeue(job_id, _utcnow()):
+            return False
+        self._pending += 1
+        self._notify()
+        return True
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._ensure_workers()
+        return await self._store.get(job_id)
+
+    async def run_blocking(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking call on the queue's worker threads."""
+        self._ensure_workers()
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def stats(self) -> Dict[str, Any]:
+        """`metrics()` plus job counts per status, read from the store."""
+        self._ensure_workers()
+        counts = await self._store.counts()
+        self._pending = counts.get("queued", 0)
+        return {**self.metrics(), "jobs": {status: counts.get(status, 0) for status in JOB_STATUSES}}
+
+    def metrics(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        busy_s = self._busy_s + sum(now - started for started in self._running.values())
+        uptime = now - self._started_at if self._started_at else 0.0
+        return {
+            "store":             type(self._store).__name__ if self._store else None,
+            "workers":           self.workers,
+            "reserved_workers":  self.reserved_workers,
+            "busy_workers":      len(self._running),
+            "utilisation":       round(busy_s / (uptime * self.workers), 4) if uptime else None,
+            "depth":             self._pending,
+            "max_pending":       self.max_pending,
+            "shed_backlog":      self.shed_backlog,
+            "enqueued":          self._enqueued,
+            "rejected":          self._rejected,
+            "completed":         self._completed,
+            "retried":           self._retried,
+            "dead_lettered":     self._dead_lettered,
+            "lost_leases":       self._lost_leases,
+            "by_severity": {
+                severity: {
+                    "completed":                counts["completed"],
+                    "shed":                     counts["shed"],
+                    "deadline_s":               self.deadlines[severity],
+                    "deadline_missed":          counts["deadline_missed"],
+                    "time_to_root_cause_p50_s": _percentile(counts["latency_s"], 0.50),
+                    "time_to_root_cause_p95_s": _percentile(counts["latency_s"], 0.95),
+                }
+                for severity, counts in self._by_severity.items()
+            },
+        }
+
+    def _count(self, severity: Optional[str]) -> Dict[str, Any]:
+        return self._by_severity.get(severity) or self._by_severity["medium"]
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+
+    def _ensure_workers(self) -> None:
+        if self._store is None:
+            self._store = SQLiteJobStore.from_env()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="rca-job")
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return   # outside the event loop; workers start on first use inside it
+        if self._loop is loop and self._tasks and not all(t.done() for t in self._tasks):
+            return
+        # First use, or the previous loop went away (e.g. test clients)
+        self._loop = loop
+        self._wake = None
+        self._started_at = time.monotonic()
+        self._busy_s = 0.0
+        self._tasks = [
+            loop.create_task(self._work(f"{self._owner}-{n}",
+                                        _URGENT_BELOW if n < self.reserved_workers else None))
+            for n in range(self.workers)
+        ]
+        if self.shed_severities:
+            self._tasks.append(loop.create_task(self._shed_loop()))
+
+    def _notify(self) -> None:
+        if self._wake is not None and not self._wake.done():
+            self._wake.set_result(None)
+
+    async def _idle(self) -> None:
+        if self._wake is None or self._wake.done():
+            self._wake = asyncio.get_running_loop().create_future()
+        await asyncio.wait({self._wake}, timeout=self.poll_interval)
+
+    async def _work(self, worker: str, below_priority: Optional[float]) -> None:
+        # Reserved workers (below_priority set) only take critical and high jobs,
+        # so those never wait for a long low-severity workflow to finish
+        while True:
+            now = _utcnow()
+            try:
+                job = await self._store.claim(
+                    worker, now, now + timedelta(seconds=self.visibility_timeout), below_priority
+                )
+            except Exception as exc:
+                logger.warning("RCA job claim failed: %s", exc)
+                job = None
+            if job is None:
+                try:
+                    self._pending = (await self._store.counts()).get("queued", 0)
+                except Exception:
+                    pass
+                await self._idle()
+                continue
+            self._pending = max(0, self._pending - 1)
+            try:
+                await self._run(job, worker)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:   # never let a worker die
+                logger.warning("RCA job %s bookkeeping failed: %s", job["job_id"], exc)
+
+    async def _shed_loop(self) -> None:
+        # Runs beside the workers: the backlog is largest when they are all busy
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self._pending < self.shed_backlog:
+                continue
+            try:
+                shed = await self._store.shed_expired(self.shed_severities, _utcnow())
+            except Exception as exc:
+                logger.warning("Shedding expired RCA jobs failed: %s", exc)
+                continue
+            if shed:
+                logger.warning("Shed %d RCA jobs past their deadline (backlog %d)",
+                               len(shed), self._pending)
+            self._pending = max(0, self._pending - len(shed))
+            for job_id, severity in shed:
+                self._count(severity)["shed"] += 1
+                await _call_hook(self.on_shed, job_id)
+
+    async def _run(self, job: Dict[str, Any], worker: str) -> None:
+        job_id, attempt = job["job_id"], job["attempts"]
+        if attempt > job["max_attempts"]:
+            # Every earlier attempt lost its lease: the workflow keeps killing its worker
+            await self._fail(job, worker, RuntimeError(
+                f"lease expired on {attempt - 1} attempts"), retrying=False)
+            return
+
+        self._running[job_id] = time.monotonic()
+        heartbeat = asyncio.get_running_loop().create_task(self._heartbeat(job_id, worker))
+        try:
+            await self.handler(job_id, job["payload"])
+        except asyncio.CancelledError:
+            # Shutting down: hand the job back, keeping its place, rather than wait out its lease
+            try:
+                await self._store.update(job_id, worker, {
+                    "status": "queued", "worker": None, "lease_expires_at": None,
+                    "updated_at": _utcnow(),
+                })
+            except Exception:
+                pass
+            raise
+        except Exception as exc:
+            await self._fail(job, worker, exc, retrying=attempt < job["max_attempts"])
+        else:
+            now = _utcnow()
+            if not await self._store.update(job_id, worker, {
+                "status": "completed", "lease_expires_at": None,
+                "finished_at": now, "updated_at": now,
+            }):
+                self._lost_leases += 1
+            self._completed += 1
+            counts = self._count(job.get("severity"))
+            counts["completed"] += 1
+            counts["latency_s"].append((now - _aware(job["created_at"])).total_seconds())
+            if job.get("deadline_at") is not None and now > _aware(job["deadline_at"]):
+                counts["deadline_missed"] += 1
+        finally:
+            heartbeat.cancel()
+            self._busy_s += time.monotonic() - self._running.pop(job_id)
+
+    async def _fail(self, job: Dict[str, Any], worker: str, error: BaseException,
+                    retrying: bool) -> None:
+        job_id, now = job["job_id"], _utcnow()
+        fields: Dict[str, Any] = {"last_error": f"{type(error).__name__}: {error}",
+                                  "lease_expires_at": None, "updated_at": now}
+        if retrying:
+            delay = self.retry_backoff * 2 ** (job["attempts"] - 1)
+            fields.update(status="queued", worker=None,
+                          available_at=now + timedelta(seconds=delay))
+            self._retried += 1
+            self._pending += 1
+            logger.warning("RCA job %s failed (attempt %d of %d), retrying in %.0fs: %s",
+                           job_id, job["attempts"], job["max_attempts"], delay, error)
+        else:
+            fields.update(status="dead")
+            self._dead_lettered += 1
+            logger.warning("RCA job %s dead-lettered after %d attempts: %s",
+                           job_id, job["attempts"], error)
+        if not await self._store.update(job_id, worker, fields):
+            self._lost_leases += 1
+        await _call_hook(self.on_failure, job_id, error, retrying)
+
+    async def _heartbeat(self, job_id: str, worker: str) -> None:
+        while True:
+            await asyncio.sleep(self.visibility_timeout / 3)
+            now = _utcnow()
+            try:
+                held = await self._store.update(job_id, worker, {
+                    "lease_expires_at": now + timedelta(seconds=self.visibility_timeout),
+                    "updated_at": now,
+                })
+            except Exception as exc:
+                logger.warning("RCA job %s lease renewal failed: %s", job_id, exc)
+                continue
+            if not held:
+                self._lost_leases += 1
+                logger.warning("RCA job %s lost its lease to another worker", job_id)
+                return
+
+
+def _percentile(samples: Sequence[float], q: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 3)
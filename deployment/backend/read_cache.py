@@ -0,0 +1,145 @@
+"""TTL read-through cache for small, rarely changing MongoDB documents.
+
+Settings such as the maintenance cost table change a few times a year but were
+read from MongoDB on every task creation and config page load. A
+ReadThroughCache holds one value per registered key: `get` serves it while it
+is younger than `ttl_s` and otherwise calls the key's loader (concurrent
+misses share one load). Endpoints that change a document call `set` with the
+new value, or `invalidate`, so this process reads its own writes at once;
+edits made by other processes show up within one TTL.
+
+Hot paths that cannot await (e.g. pricing alerts during ingest) use
+`get_nowait`, which returns the last loaded value — stale or not — and starts
+a background reload when it has expired.
+
+Configuration (environment):
+  - RCA_CONFIG_CACHE_TTL_S : seconds a cached document is served before reloading (default 30)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Loader = Callable[[], Awaitable[Any]]
+
+
+class ReadThroughCache:
+    """Named values, each loaded by its own `async loader()` and kept for `ttl_s`."""
+
+    def __init__(self, ttl_s: float = 30.0):
+        self.ttl = max(0.0, float(ttl_s))
+        self._loaders: Dict[str, Loader] = {}
+        self._entries: Dict[str, Tuple[Any, float]] = {}   # key -> (value, loaded at)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._hits = 0
+        self._misses = 0
+        self._stale_reads = 0
+        self._load_errors = 0
+        self._invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> "ReadThroughCache":
+        return cls(ttl_s=float(os.getenv("RCA_CONFIG_CACHE_TTL_S", "30")))
+
+    def register(self, key: str, loader: Loader) -> None:
+        self._loaders[key] = loader
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    async def get(self, key: str) -> Any:
+        """The cached value, loading it first if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            self._hits += 1
+            return entry[0]
+        self._misses += 1
+        return await self._load(key)
+
+    def get_nowait(self, key: str, default: Any = None) -> Any:
+        """The last loaded value (or `default`) without waiting; reloads in the background once expired."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[1] >= self.ttl:
+            self._stale_reads += 1
+            self._reload_soon(key)
+        else:
+            self._hits += 1
+        return entry[0] if entry is not None else default
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def set(self, key: str, value: Any) -> None:
+        """Replace the cached value, e.g. with a document just written."""
+        self._entries[key] = (value, time.monotonic())
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop one key (or all); the next `get` reloads it."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+        self._invalidations += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self._hits + self._misses
+        now = time.monotonic()
+        return {
+            "ttl_s":         self.ttl,
+            "hits":          self._hits,
+            "misses":        self._misses,
+            "hit_ratio":     round(self._hits / lookups, 4) if lookups else None,
+            "stale_reads":   self._stale_reads,
+            "load_errors":   self._load_errors,
+            "invalidations": self._invalidations,
+            "age_s":         {key: round(now - loaded, 1) for key, (_, loaded) in self._entries.items()},
+        }
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    async def _load(self, key: str) -> Any:
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight.get_loop() is asyncio.get_running_loop():
+            return await asyncio.shield(inflight)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._loaders[key]()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            self._load_errors += 1
+            future.set_exception(exc)
+            future.exception()   # retrieved: waiters re-raise it, nobody else needs to
+            raise
+        else:
+            self._entries[key] = (value, time.monotonic())
+            future.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def _reload_soon(self, key: str) -> None:
+        if key in self._inflight or key not in self._loaders:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return   # outside the event loop; the next `get` reloads
+        loop.create_task(self._safe_load(key))
+
+    async def _safe_load(self, key: str) -> None:
+        try:
+            await self._load(key)
+        except Exception as exc:   # keep serving the stale value
+            logger.warning("Background reload of %s failed: %s", key, exc)
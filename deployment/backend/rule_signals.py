@@ -0,0 +1,45 @@
+"""Feature signals the SWRL rule checks match on.
+
+The diagnostic agent matches KG rules by what kind of feature drove an
+anomaly — tool wear, temperature, torque, speed, power. It used to find out
+by lowercasing and substring-searching every `top_contributing_features`
+name of every anomaly. A model's feature columns never change, so ingest
+resolves each column's signals once per model (`column_signals`) and sends
+an anomaly's signals with its RCA payload, read off its top column indices
+(`signals_for_columns`). Payloads that only carry feature names —
+/api/rca/analyze callers, jobs queued before the field existed — are
+matched by name (`signals_for_names`), with the same result.
+"""
+
+from typing import FrozenSet, Iterable, List, Sequence
+
+# Signal -> lowercase substrings of a feature name that raise it
+SIGNALS = {
+    "tool":   ("tool",),
+    "temp":   ("temp",),
+    "torque": ("torque",),
+    "speed":  ("speed", "rpm"),
+    "power":  ("power",),
+}
+
+
+def name_signals(feature_name: str) -> FrozenSet[str]:
+    """Signals raised by one feature name."""
+    name = feature_name.lower()
+    return frozenset(signal for signal, needles in SIGNALS.items()
+                     if any(needle in name for needle in needles))
+
+
+def column_signals(feature_names: Sequence[str]) -> List[FrozenSet[str]]:
+    """Signals of each feature column of a model, resolved once per model."""
+    return [name_signals(name) for name in feature_names]
+
+
+def signals_for_columns(col_signals: Sequence[FrozenSet[str]], columns: Iterable[int]) -> List[str]:
+    """Sorted signals of an anomaly's top feature columns (JSON-friendly)."""
+    return sorted(frozenset().union(*(col_signals[j] for j in columns)))
+
+
+def signals_for_names(feature_names: Iterable[str]) -> List[str]:
+    """`signals_for_columns` for a payload that only carries feature names."""
+    return sorted(frozenset().union(*(name_signals(name) for name in feature_names)))
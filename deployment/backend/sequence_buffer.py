@@ -0,0 +1,148 @@
+"""Per-machine sliding windows of feature vectors for LSTM inference.
+
+The autoencoder expects a (10, 13) sequence per reading. Each machine keeps a
+preallocated ring buffer of its last `window` feature vectors so the model sees
+the machine's real recent history rather than one reading repeated.
+
+Every vector is written twice — at `pos` and `pos + window` — into a buffer of
+length `2 * window`, so the current window (oldest → newest) is always the
+contiguous slice `data[pos:pos + window]`, read without rebuilding it.
+
+Ingest does not push a reading until it has been accepted: `windows` copies
+the windows the readings would see into a fresh tensor for the model, and
+`extend` appends them once the request has passed every admission check. A
+request refused with a 503 therefore leaves each machine's history as it was
+(a retry is not pushed twice), and the model never reads a ring buffer that a
+concurrent push for the same machine could overwrite.
+
+Configuration (environment):
+  - RCA_WINDOW_MAX_MACHINES : max machines with a live buffer (LRU evicted, default 5000)
+  - RCA_WINDOW_IDLE_SECONDS : buffers idle longer than this are dropped (default 3600)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Sequence
+
+import numpy as np
+
+
+class MachineWindow:
+    """Fixed-size ring buffer holding one machine's most recent feature vectors."""
+
+    __slots__ = ("data", "window", "pos", "count", "last_seen")
+
+    def __init__(self, window: int, n_features: int):
+        self.data = np.zeros((2 * window, n_features), dtype=np.float32)
+        self.window = window
+        self.pos = 0
+        self.count = 0
+        self.last_seen = time.monotonic()
+
+    def push(self, vec: np.ndarray) -> np.ndarray:
+        """Append a feature vector and return a view of the current window."""
+        if self.count == 0:
+            # No history yet — pad the window with the first reading
+            self.data[:] = vec
+        else:
+            self.data[self.pos] = vec
+            self.data[self.pos + self.window] = vec
+        self.pos = (self.pos + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+        self.last_seen = time.monotonic()
+        return self.view()
+
+    def view(self) -> np.ndarray:
+        """(window, n_features) view ordered oldest → newest; valid until the next push."""
+        return self.data[self.pos:self.pos + self.window]
+
+
+class SequenceBufferPool:
+    """Bounded map of machine_id → MachineWindow with idle and LRU eviction."""
+
+    def __init__(self, window: int = 10, n_features: int = 13,
+                 max_machines: int = 5000, idle_seconds: float = 3600.0):
+        self.window = window
+        self.n_features = n_features
+        self.max_machines = max(1, int(max_machines))
+        self.idle_seconds = float(idle_seconds)
+        self._buffers: "OrderedDict[str, MachineWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evictions = 0
+
+    @classmethod
+    def from_env(cls, window: int, n_features: int) -> "SequenceBufferPool":
+        return cls(
+            window=window,
+            n_features=n_features,
+            max_machines=int(os.getenv("RCA_WINDOW_MAX_MACHINES", "5000")),
+            idle_seconds=float(os.getenv("RCA_WINDOW_IDLE_SECONDS", "3600")),
+        )
+
+    def push(self, machine_id: str, vec: np.ndarray) -> np.ndarray:
+        """Append `vec` to the machine's buffer and return a view of its window."""
+        with self._lock:
+            buf = self._buffers.get(machine_id)
+            if buf is None:
+                self._evict(reserve=1)
+                buf = self._buffers[machine_id] = MachineWindow(self.window, self.n_features)
+            else:
+                self._buffers.move_to_end(machine_id)
+            return buf.push(vec)
+
+    def windows(self, machine_ids: Sequence[str], feature_matrix: np.ndarray) -> np.ndarray:
+        """(N, window, n_features) windows the rows would see if pushed in order.
+
+        Nothing is pushed. Rows for the same machine each get the window as of
+        that row, earlier rows of the call included. The result is a new tensor
+        that does not share memory with the ring buffers.
+        """
+        out = np.empty((len(feature_matrix), self.window, self.n_features), dtype=np.float32)
+        previous: Dict[str, int] = {}   # machine_id -> row of its latest window in `out`
+        with self._lock:
+            for i, (machine_id, vec) in enumerate(zip(machine_ids, feature_matrix)):
+                j = previous.get(machine_id)
+                if j is not None:
+                    out[i, :-1] = out[j, 1:]
+                else:
+                    buf = self._buffers.get(machine_id)
+                    if buf is None or buf.count == 0:
+                        # No history yet — pad the window with the first reading
+                        out[i, :-1] = vec
+                    else:
+                        out[i, :-1] = buf.view()[1:]
+                out[i, -1] = vec
+                previous[machine_id] = i
+        return out
+
+    def extend(self, machine_ids: Sequence[str], feature_matrix: np.ndarray) -> None:
+        """Push rows in order, e.g. once the readings `windows` was called for are accepted."""
+        for machine_id, vec in zip(machine_ids, feature_matrix):
+            self.push(machine_id, vec)
+
+    def drop(self, machine_id: str) -> None:
+        with self._lock:
+            self._buffers.pop(machine_id, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            warm = sum(1 for b in self._buffers.values() if b.count >= self.window)
+            return {
+                "machines":      len(self._buffers),
+                "warm_machines": warm,
+                "max_machines":  self.max_machines,
+                "evictions":     self._evictions,
+                "bytes":         len(self._buffers) * 2 * self.window * self.n_features * 4,
+            }
+
+    def _evict(self, reserve: int = 0) -> None:
+        """Drop idle buffers, then least-recently-used ones until there is room."""
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._buffers:
+            oldest_id, oldest = next(iter(self._buffers.items()))
+            if oldest.last_seen >= cutoff and len(self._buffers) + reserve <= self.max_machines:
+                break
+            del self._buffers[oldest_id]
+            self._evictions += 1
@@ -340,6 +340,51 @@ class APITester:
             self.test_results['failed'] += 1
             return False
     
+    def test_batch_sensor_ingest(self) -> bool:
+        """Test 6: Batch sensor ingestion"""
+        print_header("Test 6: Batch Sensor Ingestion")
+        
+        readings = [
+            {
+                "machine_id": "eq-001",
+                "air_temperature": 298.1,
+                "process_temperature": 308.6,
+                "rotational_speed": 1551.0 + i * 10,
+                "torque": 42.8,
+                "tool_wear": float(i),
+            }
+            for i in range(25)
+        ]
+        
+        try:
+            response = requests.post(
+                f"{self.base_url}/api/sensor/ingest/batch",
+                json={"readings": readings}
+            )
+            
+            if response.status_code != 200:
+                print_error(f"Batch ingest failed: {response.status_code}")
+                self.test_results['failed'] += 1
+                return False
+            
+            data = response.json()
+            if data.get('count') == len(readings) and len(data.get('results', [])) == len(readings):
+                print_success("Batch ingest returned one result per reading")
+                print(f"   Readings: {data['count']}")
+                print(f"   Anomalies: {data['anomalies']}")
+                self.test_results['passed'] += 1
+                return True
+            else:
+                print_error(f"Expected {len(readings)} results, got {data.get('count')}")
+                self.test_results['failed'] += 1
+                return False
+                
+        except Exception as e:
+            print_error(f"Batch ingest error: {e}")
+            self.test_results['failed'] += 1
+            self.test_results['errors'].append(str(e))
+            return False
+    
     def print_summary(self):
         """Print test summary"""
         print_header("Test Summary")
@@ -395,6 +440,7 @@ def main():
         tester.test_feedback_submission(workflow_id, anomaly_id)
     
     tester.test_error_handling()
+    tester.test_batch_sensor_ingest()
     
     # Print summary
     tester.print_summary()
@@ -0,0 +1,116 @@
+"""
+Dashboard Summary Test
+======================
+
+Checks the dashboard counters across a reconcile that races ingest and
+acknowledgements: alerts put and acknowledged before the count queries start
+(while the reconcile flushes the write buffer) are counted once, by the
+queries, and events recorded after the queries started are applied again on
+top of the fresh counts, so the counters match the collection exactly.
+Uses an in-memory stand-in for the alert collection; needs no database or
+server.
+
+    python test_dashboard_summary.py
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timezone
+
+from dashboard_summary import DashboardCounters
+
+
+class _Alerts:
+    """Alert documents as MongoDB holds them, reported to the counters as the API does."""
+
+    def __init__(self, counters: DashboardCounters):
+        self.counters = counters
+        self.docs = {}
+
+    def put(self, alert_id: str, severity: str, written: bool = True) -> None:
+        # Ingest reports an alert once the write buffer has it; `written` is
+        # whether a flush has reached MongoDB yet
+        if written:
+            self.docs[alert_id] = {"severity": severity, "acknowledged": False}
+        self.counters.alerts_created([severity])
+        self.counters.anomalies_detected(1, datetime.now(timezone.utc))
+
+    def acknowledge(self, alert_id: str) -> None:
+        doc = self.docs[alert_id]
+        if not doc["acknowledged"]:
+            doc["acknowledged"] = True
+            self.counters.alert_closed(doc["severity"])
+
+    def counts(self) -> dict:
+        active = [doc for doc in self.docs.values() if not doc["acknowledged"]]
+        return {
+            "active_alerts": len(active),
+            "critical_alerts": sum(doc["severity"] == "critical" for doc in active),
+        }
+
+
+async def _reconcile_racing_events() -> None:
+    during_flush = during_queries = None
+    minute = datetime.now(timezone.utc).replace(second=0, microsecond=0, tzinfo=None)
+
+    async def reconcile_fn(fence):
+        if during_flush is not None:
+            during_flush()
+        fence()
+        counts = dict(alerts.counts(), open_tasks=0,
+                      anomaly_minutes=[(minute, len(alerts.docs))])
+        if during_queries is not None:
+            during_queries()
+        return counts
+
+    counters = DashboardCounters(reconcile_fn, reconcile_interval_s=3600)
+    alerts = _Alerts(counters)
+    alerts.put("a1", "critical")
+    alerts.put("a2", "high")
+    await counters.reconcile()
+    assert counters.snapshot()["active_alerts"] == 2
+
+    def flush_racing():
+        # Reported before the queries start, so the queries count them
+        alerts.put("a3", "critical")
+        alerts.put("a5", "high")
+        alerts.acknowledge("a1")
+
+    def queries_racing():
+        # Reported after the queries ran: a buffered alert not yet written,
+        # and an acknowledgement the queries did not see
+        alerts.put("a4", "critical", written=False)
+        alerts.acknowledge("a3")
+
+    during_flush, during_queries = flush_racing, queries_racing
+    await counters.reconcile()
+    snapshot = counters.snapshot()
+    # a2, a3 and a5 unacknowledged in the queries; a4 created and a3 closed since
+    assert snapshot["active_alerts"] == 3, snapshot
+    assert snapshot["critical_alerts"] == 1, snapshot
+    assert snapshot["anomalies"] == 5, snapshot
+    assert counters.metrics()["last_drift"] == {
+        "active_alerts": 0, "critical_alerts": 0, "open_tasks": 0, "anomalies": 0,
+    }, counters.metrics()
+
+    # Once a4 is written, a quiet reconcile agrees with the counters
+    alerts.docs["a4"] = {"severity": "critical", "acknowledged": False}
+    during_flush = during_queries = None
+    await counters.reconcile()
+    assert counters.snapshot() == snapshot, counters.snapshot()
+    assert set(counters.metrics()["last_drift"].values()) == {0}
+    await counters.close()
+
+
+def test_reconcile_racing_events():
+    asyncio.run(_reconcile_racing_events())
+
+
+if __name__ == "__main__":
+    try:
+        test_reconcile_racing_events()
+        print("✅ Dashboard counters replay only the events a reconcile could not have counted")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ Dashboard counters drift across a reconcile: {e}")
+        sys.exit(1)
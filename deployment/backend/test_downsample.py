@@ -0,0 +1,93 @@
+"""
+LTTB Downsampling Test
+======================
+
+Checks that the vectorised lttb_indices keeps exactly the points a plain,
+loop-per-bucket Largest-Triangle-Three-Buckets implementation keeps, and that
+downsample_points bounds the point count, keeps every anomalous point and
+leaves short histories alone. Needs no model, database or server.
+
+    python test_downsample.py
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from downsample import downsample_points, lttb_indices
+
+
+def _reference_lttb(x: np.ndarray, y: np.ndarray, n_out: int) -> list:
+    """Textbook LTTB, one bucket at a time."""
+    n = len(x)
+    every = (n - 2) / (n_out - 2)
+    kept, a = [0], 0
+    for i in range(n_out - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        nxt_start, nxt_end = end, min(int((i + 2) * every) + 1, n)
+        cx, cy = x[nxt_start:nxt_end].mean(), y[nxt_start:nxt_end].mean()
+        best, best_area = start, -1.0
+        for p in range(start, end):
+            area = abs((x[a] - cx) * (y[p] - y[a]) - (x[a] - x[p]) * (cy - y[a]))
+            if area > best_area:
+                best, best_area = p, area
+        kept.append(best)
+        a = best
+    kept.append(n - 1)
+    return kept
+
+
+def test_lttb_matches_reference():
+    rng = np.random.default_rng(5)
+    for n, n_out in ((10_000, 800), (1_000, 3), (1_003, 997), (5_000, 117)):
+        x = np.cumsum(rng.uniform(0.5, 1.5, size=n))
+        y = np.sin(x / 50.0) * 10 + rng.normal(size=n)
+        actual = lttb_indices(x, y, n_out).tolist()
+        assert actual == _reference_lttb(x, y, n_out), (n, n_out)
+        assert len(actual) == n_out
+    assert lttb_indices(np.arange(5.0), np.arange(5.0), 10).tolist() == [0, 1, 2, 3, 4]
+
+
+def _history(n: int) -> list:
+    rng = np.random.default_rng(9)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [
+        {
+            "equipment_id": "eq-001",
+            "timestamp": start + timedelta(seconds=10 * i),
+            "air_temperature": 300 + np.sin(i / 300.0) + rng.normal(scale=0.1),
+            "torque": 40 + rng.normal(scale=2.0),
+            "tool_wear": i // 50,
+            "anomaly_detected": i % 997 == 0,
+        }
+        for i in range(n)
+    ]
+
+
+def test_downsample_points():
+    points = _history(10_000)
+    anomalies = [p for p in points if p["anomaly_detected"]]
+    reduced = downsample_points(points, 800)
+    assert len(reduced) <= 800 + len(anomalies) + 2, len(reduced)
+    assert all(p in reduced for p in anomalies)
+    assert reduced[0] is points[0] and reduced[-1] is points[-1]
+    assert all(a["timestamp"] < b["timestamp"] for a, b in zip(reduced, reduced[1:]))
+    # The extremes of every series survive
+    for field in ("air_temperature", "torque"):
+        assert max(p[field] for p in reduced) == max(p[field] for p in points), field
+        assert min(p[field] for p in reduced) == min(p[field] for p in points), field
+    short = points[:500]
+    assert downsample_points(short, 800) is short
+    print(f"   {len(points)} points -> {len(reduced)} ({len(anomalies)} anomalies kept)")
+
+
+if __name__ == "__main__":
+    try:
+        test_lttb_matches_reference()
+        test_downsample_points()
+        print("✅ LTTB downsampling matches the reference implementation")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ LTTB downsampling diverges: {e}")
+        sys.exit(1)
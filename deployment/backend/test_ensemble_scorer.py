@@ -0,0 +1,122 @@
+"""
+Ensemble Scorer Batch Parity Test
+=================================
+
+Checks that EnsembleScorer.compute_batch returns exactly — bit for bit — the
+scores that EnsembleScorer.compute gives for the same readings' top-5 feature
+dicts, for the AI4I and MetroPT feature sets, that the argpartition top-k
+selects the same features as sorting every feature, and that ingest's array
+scoring path gives a single reading and a batch the features and scores of
+sorting every feature and calling compute. Needs no model or server.
+
+    python test_ensemble_scorer.py
+"""
+
+import sys
+
+import numpy as np
+
+from rca_api import (
+    EnsembleScorer, _FEATURE_NAMES, _METROPT_FEATURE_NAMES,
+    _round_like_python, _score_reconstruction, _top_feature_dicts, _top_feature_list, _top_k_features,
+    model_registry,
+)
+
+
+def _sorted_top_features(row: np.ndarray, feature_names) -> list:
+    """Top-5 dicts built by sorting every feature (the reference selection)."""
+    return sorted(
+        [{'feature_name': feature_names[i], 'error': round(float(row[i]), 6)}
+         for i in range(len(feature_names))],
+        key=lambda x: x['error'],
+        reverse=True,
+    )[:5]
+
+
+def _error_matrices(n_features: int) -> np.ndarray:
+    rng = np.random.default_rng(7)
+    cases = [
+        rng.exponential(0.05, size=(500, n_features)),               # normal operation
+        rng.exponential(2.0, size=(200, n_features)),                # anomalies (saturating scores)
+        np.round(rng.exponential(0.05, size=(200, n_features)), 3),  # many ties after rounding
+        np.full((5, n_features), 0.0000125),                         # exact .5 rounding boundaries
+        np.zeros((3, n_features)),
+    ]
+    return np.concatenate(cases).astype(np.float32)
+
+
+def test_compute_batch_matches_compute():
+    for feature_names in (_FEATURE_NAMES, _METROPT_FEATURE_NAMES):
+        scorer = EnsembleScorer()
+        feature_errors = _error_matrices(len(feature_names))
+        recon_errors = feature_errors.mean(axis=1)
+
+        batch = scorer.compute_batch(recon_errors, feature_errors,
+                                     scorer.importance_vector(feature_names))
+        top_features = _top_feature_dicts(feature_names, *_top_k_features(feature_errors, 5))
+        for i, recon in enumerate(recon_errors.tolist()):
+            expected = scorer.compute(recon, top_features[i])
+            for key in ("lstm_normalized_score", "rf_probability", "ensemble_score"):
+                actual = batch[key][i].item()
+                assert actual == expected[key], (len(feature_names), i, key, actual, expected[key])
+        print(f"   {len(feature_errors)} readings × {len(feature_names)} features: identical")
+
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(11)
+    for n_features in (13, 43):
+        # Continuous errors: no ties, so the top-5 is unique
+        feature_errors = rng.exponential(0.05, size=(500, n_features)).astype(np.float32)
+        names = [f"f{i}" for i in range(n_features)]
+        actual = _top_feature_dicts(names, *_top_k_features(feature_errors, 5))
+        expected = [_sorted_top_features(row, names) for row in feature_errors]
+        assert actual == expected, n_features
+
+
+def test_score_reconstruction_matches_reference():
+    rng = np.random.default_rng(5)
+    for domain in ("ai4i", "metropt"):
+        spec = model_registry.spec(domain)
+        scorer = EnsembleScorer(lstm_threshold=spec.lstm_threshold)
+        for n in (1, 200):   # a single reading takes the same array path as a batch
+            windows = rng.normal(size=(n, spec.window, spec.n_features)).astype(np.float32)
+            x_hat = (windows + rng.normal(scale=0.3, size=windows.shape)).astype(np.float32)
+            per_feature_error = np.mean((windows - x_hat) ** 2, axis=1)
+            recon, top_columns, top_errors, scores = _score_reconstruction(spec, windows, x_hat.copy())
+            assert recon.shape == (n,) and top_columns.shape == top_errors.shape == (n, 5)
+            assert scores.shape == (n, 3)
+            top_features = [_top_feature_list(spec.feature_names, columns, errors)
+                            for columns, errors in zip(top_columns.tolist(), top_errors.tolist())]
+            for i, row in enumerate(per_feature_error):
+                expected_top = _sorted_top_features(row, spec.feature_names)
+                assert top_features[i] == expected_top, (domain, n, i)
+                expected = scorer.compute(recon[i].item(), expected_top)
+                assert tuple(scores[i].tolist()) == tuple(
+                    expected[k] for k in ("lstm_normalized_score", "rf_probability", "ensemble_score")
+                ), (domain, n, i)
+
+
+def test_round_like_python():
+    rng = np.random.default_rng(3)
+    values = np.concatenate([
+        rng.normal(scale=10.0, size=20000),
+        np.arange(-2000, 2000) / 1000.0 + 0.00005,   # halfway cases at 4 decimals
+        [0.0, -0.0, 1e300, -1e-300, np.inf, -np.inf],
+    ])
+    for ndigits in (4, 6):
+        actual = _round_like_python(values, ndigits)
+        expected = np.array([round(float(v), ndigits) for v in values])
+        assert np.array_equal(actual, expected), ndigits
+
+
+if __name__ == "__main__":
+    try:
+        test_round_like_python()
+        test_top_k_matches_full_sort()
+        test_compute_batch_matches_compute()
+        test_score_reconstruction_matches_reference()
+        print("✅ compute_batch is bit-compatible with compute")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ compute_batch diverges from compute: {e}")
+        sys.exit(1)
@@ -0,0 +1,131 @@
+"""
+Equipment State Table Test
+==========================
+
+Checks the in-memory equipment table against a reload racing the periodic
+flush: a machine decayed in memory but not yet flushed keeps its health when
+a flush is started between the reload's find and its merge (the find read
+the older document), and `last_reading_at` never moves back when a reading
+stamped earlier than the last one arrives, while its decay still applies.
+Uses an in-memory stand-in for the equipment collection; needs no database
+or server.
+
+    python test_equipment_state.py
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+
+from equipment_state import EquipmentStateTable
+
+
+def _decay(ensemble_score: float, health: float) -> float:
+    return health - 10.0 * ensemble_score
+
+
+class _Cursor:
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def to_list(self, length=None):
+        docs = [dict(doc) for doc in self.collection.docs.values()]
+        if self.collection.during_find is not None:
+            await self.collection.during_find()
+        return docs
+
+
+class _Collection:
+    def __init__(self, docs):
+        self.docs = {doc["equipment_id"]: dict(doc) for doc in docs}
+        self.during_find = None
+        self.writes = []
+
+    def find(self, query, projection=None):
+        return _Cursor(self)
+
+    async def bulk_write(self, operations, ordered=True):
+        for op in operations:
+            eq_id = op._filter["equipment_id"]
+            self.docs.setdefault(eq_id, {"equipment_id": eq_id}).update(op._doc["$set"])
+            self.writes.append((eq_id, dict(op._doc["$set"])))
+
+
+class _DB:
+    def __init__(self, docs):
+        self.equipment = _Collection(docs)
+
+
+async def _flush_between_find_and_merge() -> None:
+    now = datetime.now(timezone.utc)
+    db = _DB([{"equipment_id": "eq-001", "name": "Lathe", "health_score": 100.0,
+               "status": "operational"}])
+    table = EquipmentStateTable(lambda: db, _decay, flush_interval_ms=60_000)
+    await table.load()
+    table.record("eq-001", 0.5, now)        # 95, dirty, not yet flushed
+
+    flushes = []
+
+    async def flush_now():
+        # The periodic flush fires while the reload's find is in flight
+        flushes.append(asyncio.ensure_future(table.flush()))
+        await asyncio.sleep(0.01)
+    db.equipment.during_find = flush_now
+    db.equipment.docs["eq-001"]["name"] = "Lathe 2"   # an edit the reload should pick up
+    await table.load()
+    db.equipment.during_find = None
+    assert await flushes[0] == 1
+
+    doc = table.get("eq-001")
+    assert doc["health_score"] == 95.0, doc
+    assert doc["name"] == "Lathe 2", doc
+    assert db.equipment.docs["eq-001"]["health_score"] == 95.0
+    assert table.summary()["avg_health_score"] == 95.0
+
+    # Once flushed and clean, a reload takes the database's health
+    db.equipment.docs["eq-001"]["health_score"] = 80.0
+    await table.load()
+    assert table.get("eq-001")["health_score"] == 80.0
+    await table.close()
+
+
+async def _late_reading_keeps_last_reading_at() -> None:
+    now = datetime.now(timezone.utc)
+    db = _DB([{"equipment_id": "eq-001", "health_score": 100.0, "status": "operational",
+               "last_reading_at": now.replace(tzinfo=None)}])   # naive, as read back from MongoDB
+    table = EquipmentStateTable(lambda: db, _decay, flush_interval_ms=60_000)
+    await table.load()
+
+    table.record("eq-001", 0.5, now - timedelta(minutes=5))   # late upload
+    doc = table.get("eq-001")
+    assert doc["health_score"] == 95.0 and doc["last_reading_at"] == now.replace(tzinfo=None)
+    table.record("eq-001", 0.5, now + timedelta(seconds=1))
+    table.record("eq-001", 1.0, now - timedelta(seconds=30))  # out of order
+    doc = table.get("eq-001")
+    assert doc["health_score"] == 80.0, doc
+    assert doc["last_reading_at"] == now + timedelta(seconds=1), doc
+
+    table.record("eq-new", 0.5, now)
+    assert table.get("eq-new")["last_reading_at"] == now
+    await table.flush()
+    assert db.equipment.docs["eq-001"]["last_reading_at"] == now + timedelta(seconds=1)
+    await table.close()
+
+
+def test_flush_between_find_and_merge():
+    asyncio.run(_flush_between_find_and_merge())
+
+
+def test_late_reading_keeps_last_reading_at():
+    asyncio.run(_late_reading_keeps_last_reading_at())
+
+
+if __name__ == "__main__":
+    try:
+        test_flush_between_find_and_merge()
+        test_late_reading_keeps_last_reading_at()
+        print("✅ Equipment state survives a reload racing a flush, and readings never rewind it")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ Equipment state loses updates: {e}")
+        sys.exit(1)
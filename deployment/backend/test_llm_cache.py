@@ -0,0 +1,104 @@
+"""
+LLM Response Cache Test
+=======================
+
+Checks the agent response cache: keys ignore dict order and bucket the
+reconstruction error, entries expire after the TTL (in memory and on disk),
+the in-memory LRU evicts the least recently used entry and promotes one read
+back from SQLite, and a new cache on the same file serves what an earlier one
+stored. Uses a temporary SQLite file; needs no LLM, database or server.
+
+    python test_llm_cache.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from llm_cache import LLMResponseCache
+
+
+def test_keys_and_buckets():
+    cache = LLMResponseCache(path=None, error_bucket=0.05)
+    assert cache.bucket(0.412) == cache.bucket(0.437) == 0.4
+    assert cache.bucket(0.451) == 0.45
+    assert cache.bucket("n/a") is None and cache.bucket(float("nan")) is None
+    a = cache.key("diagnostic", {"severity": "high", "features": ["torque", "tool_wear"]})
+    b = cache.key("diagnostic", {"features": ["torque", "tool_wear"], "severity": "high"})
+    assert a == b
+    assert a != cache.key("planning", {"severity": "high", "features": ["torque", "tool_wear"]})
+    assert a != cache.key("diagnostic", {"severity": "high", "features": ["tool_wear", "torque"]})
+
+
+def test_ttl_expiry():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.sqlite3")
+        cache = LLMResponseCache(path=path, ttl_s=0.1)
+        cache.put("k", "response")
+        assert cache.get("k") == "response"
+        time.sleep(0.15)
+        assert cache.get("k") is None
+        metrics = cache.metrics()
+        assert metrics["memory_hits"] == 1 and metrics["expired"] == 1 and metrics["misses"] == 1
+        cache.close()
+
+        # Expired rows are not served by, and are deleted on opening, a later cache
+        reopened = LLMResponseCache(path=path, ttl_s=0.1)
+        assert reopened._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0] == 0
+        assert reopened.get("k") is None
+        reopened.close()
+
+
+def test_lru_promotion_from_sqlite():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "cache.sqlite3")
+        cache = LLMResponseCache(path=path, max_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, f"response {key}")
+        assert list(cache._entries) == ["b", "c"]
+        assert cache.metrics()["evictions"] == 1
+
+        # A memory miss falls through to SQLite and promotes the entry,
+        # evicting the least recently used one ("b", since "c" was just read)
+        assert cache.get("c") == "response c"
+        assert cache.get("a") == "response a"
+        assert list(cache._entries) == ["c", "a"]
+        metrics = cache.metrics()
+        assert metrics["disk_hits"] == 1 and metrics["memory_hits"] == 1
+        assert cache.get("a") == "response a"
+        assert cache.metrics()["memory_hits"] == 2
+
+        # Evicted entries are still on disk, for this cache and the next
+        assert cache.get("b") == "response b"
+        cache.close()
+        restarted = LLMResponseCache(path=path, max_entries=2)
+        assert restarted.get("c") == "response c"
+        assert restarted.metrics()["disk_hits"] == 1
+        restarted.clear()
+        assert restarted.get("a") is None
+        restarted.close()
+
+
+def test_unusable_path_falls_back_to_memory():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = LLMResponseCache(path=os.path.join(directory, "missing", "cache.sqlite3"))
+        assert not cache.metrics()["persistent"]
+        cache.put("k", "response")
+        assert cache.get("k") == "response"
+    disabled = LLMResponseCache(path=None, enabled=False)
+    disabled.put("k", "response")
+    assert disabled.get("k") is None
+
+
+if __name__ == "__main__":
+    try:
+        test_keys_and_buckets()
+        test_ttl_expiry()
+        test_lru_promotion_from_sqlite()
+        test_unusable_path_falls_back_to_memory()
+        print("✅ LLM response cache honours its keys, TTL and LRU")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ LLM response cache misbehaves: {e}")
+        sys.exit(1)
@@ -0,0 +1,76 @@
+"""
+NumPy LSTM Engine Parity Test
+=============================
+
+Checks that numpy_lstm reproduces the Keras autoencoder output within float32
+tolerance, on random windows and on windows built from realistic readings.
+Requires keras to be installed (the reference side of the comparison).
+
+    python test_numpy_lstm.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+import numpy_lstm
+
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+MODEL_PATH = os.path.join(MODELS_DIR, 'ai4i_lstm_ae_best.keras')
+
+ATOL = 1e-4   # absolute tolerance on reconstructed values
+RTOL = 1e-4
+
+
+def _test_windows() -> np.ndarray:
+    """Random z-scored windows plus constant and drifting realistic windows."""
+    from rca_api import _build_feature_matrix
+
+    rng = np.random.default_rng(42)
+    random_windows = rng.normal(scale=2.0, size=(64, 10, 13)).astype(np.float32)
+
+    # air temp, process temp, rpm, torque, tool wear
+    raw = np.column_stack([
+        np.linspace(296.0, 304.0, 40),
+        np.linspace(306.0, 314.0, 40),
+        np.linspace(1200.0, 2800.0, 40),
+        np.linspace(70.0, 5.0, 40),
+        np.linspace(0.0, 250.0, 40),
+    ])
+    feats = _build_feature_matrix(raw)
+    drifting = np.stack([feats[i:i + 10] for i in range(len(feats) - 10)])
+    constant = np.repeat(feats[:, np.newaxis, :], 10, axis=1)
+    return np.concatenate([random_windows, drifting, constant]).astype(np.float32)
+
+
+def test_numpy_matches_keras():
+    import keras
+
+    keras_model = keras.models.load_model(MODEL_PATH, compile=False)
+    numpy_model = numpy_lstm.load_model(MODEL_PATH)  # the shipped .npz export
+
+    x = _test_windows()
+    expected = keras_model.predict(x, verbose=0)
+    actual = numpy_model.predict(x)
+
+    max_abs = float(np.max(np.abs(expected - actual)))
+    err_keras = np.mean((x - expected) ** 2, axis=(1, 2))
+    err_numpy = np.mean((x - actual) ** 2, axis=(1, 2))
+    print(f"   windows compared:          {len(x)}")
+    print(f"   max |keras - numpy|:       {max_abs:.3e}")
+    print(f"   max recon-error deviation: {float(np.max(np.abs(err_keras - err_numpy))):.3e}")
+
+    assert actual.shape == expected.shape
+    assert np.allclose(actual, expected, atol=ATOL, rtol=RTOL), max_abs
+    assert np.allclose(err_numpy, err_keras, atol=ATOL, rtol=RTOL)
+
+
+if __name__ == "__main__":
+    try:
+        test_numpy_matches_keras()
+        print("✅ NumPy engine matches Keras within tolerance")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ NumPy engine diverges from Keras: {e}")
+        sys.exit(1)
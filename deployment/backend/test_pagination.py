@@ -0,0 +1,131 @@
+"""
+Keyset Pagination Test
+======================
+
+Checks that keyset_filter selects exactly the documents that sort after a
+cursor position on (field, _id), in both directions, when the sort field
+mixes nulls, numbers, strings and dates (MongoDB's type brackets), and that
+cursors round-trip through encode_cursor / decode_cursor. The filters are
+evaluated by a small matcher with MongoDB's comparison rules, so the test
+needs no database or server.
+
+    python test_pagination.py
+"""
+
+import sys
+from datetime import datetime, timezone
+
+from bson import ObjectId
+
+from pagination import (
+    ASCENDING, DESCENDING, InvalidCursor, decode_cursor, encode_cursor, keyset_filter,
+)
+
+_BRACKET_ORDER = {"null": 0, "number": 1, "string": 2, "date": 3}
+
+
+def _bracket(value) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    return "date"
+
+
+def _sort_key(doc: dict, field: str) -> tuple:
+    value = doc.get(field)
+    kind = _bracket(value)
+    return _BRACKET_ORDER[kind], (0 if value is None else value), doc["_id"]
+
+
+def _compare(actual, op: str, expected) -> bool:
+    # $gt / $lt only match values in the same type bracket, as in MongoDB
+    if actual is None or expected is None or _bracket(actual) != _bracket(expected):
+        return False
+    return actual > expected if op == "$gt" else actual < expected
+
+
+def _matches(doc: dict, query: dict) -> bool:
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(_matches(doc, clause) for clause in cond):
+                return False
+            continue
+        actual = doc.get(key)
+        if isinstance(cond, dict):
+            for op, expected in cond.items():
+                if op == "$type":
+                    if actual is None or _bracket(actual) != expected:
+                        return False
+                elif not _compare(actual, op, expected):
+                    return False
+        elif cond is None:
+            if actual is not None:   # null also matches a missing field
+                return False
+        elif actual is None or _bracket(actual) != _bracket(cond) or actual != cond:
+            return False
+    return True
+
+
+def _mixed_docs() -> list:
+    values = [
+        None, None, 3, 3, 7.5, -1, "2025-03-01", "2025-03-01", "2024-12-31",
+        datetime(2025, 3, 1, tzinfo=timezone.utc), datetime(2025, 3, 1, tzinfo=timezone.utc),
+        datetime(2024, 1, 1, tzinfo=timezone.utc),
+    ]
+    docs = []
+    for i, value in enumerate(values):
+        doc = {"_id": ObjectId(f"{i + 1:024x}")}
+        if value is not None or i % 2:   # one null is stored, the other missing
+            doc["due_date"] = value
+        docs.append(doc)
+    return docs
+
+
+def test_keyset_filter_mixed_brackets():
+    docs = _mixed_docs()
+    for direction in (ASCENDING, DESCENDING):
+        ordered = sorted(docs, key=lambda d: _sort_key(d, "due_date"),
+                         reverse=direction == DESCENDING)
+        for i, last in enumerate(ordered):
+            query = keyset_filter("due_date", direction, last.get("due_date"), last["_id"])
+            after = [d["_id"] for d in ordered if _matches(d, query)]
+            expected = [d["_id"] for d in ordered[i + 1:]]
+            assert after == expected, (direction, last, after, expected)
+
+
+def test_cursor_round_trip():
+    oid = ObjectId()
+    naive = datetime(2025, 3, 1, 12, 30)   # as Motor returns dates
+    for value in (None, 42, 2.5, "2025-03-01", naive):
+        decoded, decoded_oid = decode_cursor(encode_cursor(value, oid))
+        assert decoded_oid == oid
+        if value is naive:
+            assert decoded == naive.replace(tzinfo=timezone.utc)
+        else:
+            assert decoded == value and type(decoded) is type(value), (value, decoded)
+    for bad in ("", "not-a-cursor", encode_cursor(1, oid)[:-4]):
+        try:
+            decode_cursor(bad)
+        except InvalidCursor:
+            continue
+        raise AssertionError(f"accepted invalid cursor {bad!r}")
+    try:
+        encode_cursor(True, oid)
+    except InvalidCursor:
+        pass
+    else:
+        raise AssertionError("accepted a boolean sort value")
+
+
+if __name__ == "__main__":
+    try:
+        test_keyset_filter_mixed_brackets()
+        test_cursor_round_trip()
+        print("✅ Keyset pagination visits every document once across type brackets")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ Keyset pagination diverges: {e}")
+        sys.exit(1)
@@ -0,0 +1,79 @@
+"""
+RCA Workflow Coalescing Test
+============================
+
+Checks that anomalies with the same failure signature attach to the workflow
+started for it within the window, that a different machine, severity or
+feature set starts its own, that a forgotten (failed or shed) workflow or an
+expired window lets the next anomaly start a fresh one, and that a window of
+0 disables coalescing. Needs no LLM, database or server.
+
+    python test_rca_coalescer.py
+"""
+
+import sys
+import time
+
+from rca_coalescer import WorkflowCoalescer
+
+
+def _features(*names: str) -> list:
+    return [{"feature_name": name, "contribution": 1.0 / (i + 1)} for i, name in enumerate(names)]
+
+
+def test_signature():
+    coalescer = WorkflowCoalescer(top_features=2)
+    a = coalescer.signature("eq-001", "high", _features("torque", "tool_wear", "air_temperature"))
+    b = coalescer.signature("eq-001", "high", _features("tool_wear", "torque", "rotational_speed"))
+    assert a == b, "order and features past top_features must not matter"
+    assert a != coalescer.signature("eq-002", "high", _features("torque", "tool_wear"))
+    assert a != coalescer.signature("eq-001", "critical", _features("torque", "tool_wear"))
+    assert a != coalescer.signature("eq-001", "high", _features("torque", "air_temperature"))
+
+
+def test_attach_forget_and_expire():
+    coalescer = WorkflowCoalescer(window_s=0.1)
+    signature = coalescer.signature("eq-001", "high", _features("torque"))
+    other = coalescer.signature("eq-002", "high", _features("torque"))
+    assert coalescer.lookup(signature) is None
+    coalescer.register(signature, "wf-1")
+    coalescer.register(other, "wf-2")
+    for _ in range(3):
+        assert coalescer.lookup(signature) == "wf-1"
+        coalescer.attach("wf-1")
+    metrics = coalescer.metrics()
+    assert metrics["workflows_started"] == 2 and metrics["anomalies_attached"] == 3
+    assert metrics["coalesce_ratio"] == 0.6
+
+    # A dead-lettered or shed workflow is not attached to any more
+    coalescer.forget("wf-1")
+    assert coalescer.lookup(signature) is None
+    assert coalescer.lookup(other) == "wf-2"
+    coalescer.register(signature, "wf-3")
+    assert coalescer.lookup(signature) == "wf-3"
+
+    # Past the window the next anomaly starts a fresh diagnosis
+    time.sleep(0.12)
+    assert coalescer.lookup(signature) is None and coalescer.lookup(other) is None
+    assert coalescer.metrics()["signatures"] == 0
+
+
+def test_disabled():
+    coalescer = WorkflowCoalescer(window_s=0)
+    signature = coalescer.signature("eq-001", "high", _features("torque"))
+    assert not coalescer.enabled
+    coalescer.register(signature, "wf-1")
+    assert coalescer.lookup(signature) is None
+    assert coalescer.metrics()["workflows_started"] == 0
+
+
+if __name__ == "__main__":
+    try:
+        test_signature()
+        test_attach_forget_and_expire()
+        test_disabled()
+        print("✅ Repeated anomalies share one RCA workflow per signature and window")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ RCA workflow coalescing misbehaves: {e}")
+        sys.exit(1)
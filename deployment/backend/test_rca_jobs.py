@@ -0,0 +1,199 @@
+"""
+RCA Job Queue Test
+==================
+
+Checks the durable RCA job queue on its SQLite store: jobs are claimed by
+severity then ensemble score, reserved workers only take critical and high
+jobs, a job whose worker stopped renewing its lease is reclaimed by another
+worker (and the old worker can no longer touch it), failed attempts are
+retried after a doubling backoff and then dead-lettered until requeued, and
+admission sheds low severities under a backlog and refuses work past the
+bound. Uses a temporary SQLite file; needs no LLM, database or server.
+
+    python test_rca_jobs.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from rca_jobs import (
+    _URGENT_BELOW, RCAJobQueue, RCAQueueFull, SQLiteJobStore, job_priority,
+)
+
+
+def _job(job_id: str, severity: str = "medium", score: float = 0.5,
+         max_attempts: int = 3) -> dict:
+    now = datetime.now(timezone.utc)
+    return {
+        "job_id": job_id, "status": "queued", "payload": {"anomaly_id": job_id},
+        "severity": severity, "priority": job_priority(severity, score),
+        "attempts": 0, "max_attempts": max_attempts, "worker": None,
+        "available_at": now, "lease_expires_at": None,
+        "deadline_at": now + timedelta(hours=1),
+        "created_at": now, "updated_at": now, "finished_at": None, "last_error": None,
+    }
+
+
+async def _claim_order(path: str) -> None:
+    store = SQLiteJobStore(path)
+    await store.insert([_job("low", "low", 0.9), _job("medium", "medium", 0.6),
+                        _job("medium-hot", "medium", 0.95), _job("critical", "critical", 0.1),
+                        _job("high", "high", 0.7)])
+    now = datetime.now(timezone.utc)
+    lease = now + timedelta(seconds=60)
+    claimed = [(await store.claim("w", now, lease))["job_id"] for _ in range(2)]
+    assert claimed == ["critical", "high"], claimed
+    # A reserved worker leaves medium and low jobs to the others
+    assert await store.claim("reserved", now, lease, _URGENT_BELOW) is None
+    claimed = [(await store.claim("w", now, lease))["job_id"] for _ in range(3)]
+    assert claimed == ["medium-hot", "medium", "low"], claimed
+    assert await store.claim("w", now, lease) is None
+    store.close()
+
+
+async def _lease_reclaim(path: str) -> None:
+    store = SQLiteJobStore(path)
+    await store.insert([_job("wf-1")])
+    now = datetime.now(timezone.utc)
+    job = await store.claim("worker-a", now, now + timedelta(seconds=10))
+    assert job["worker"] == "worker-a" and job["attempts"] == 1 and job["status"] == "running"
+
+    # Held while the lease runs; claimable again once it lapses
+    assert await store.claim("worker-b", now + timedelta(seconds=5), now + timedelta(seconds=15)) is None
+    job = await store.claim("worker-b", now + timedelta(seconds=11), now + timedelta(seconds=21))
+    assert job is not None and job["worker"] == "worker-b" and job["attempts"] == 2
+
+    # The worker that lost its lease cannot complete or renew the job
+    assert not await store.update("wf-1", "worker-a", {"status": "completed"})
+    assert await store.update("wf-1", "worker-b", {"status": "completed"})
+    assert (await store.get("wf-1"))["status"] == "completed"
+    store.close()
+
+
+async def _lease_exhausted(path: str) -> None:
+    # Every attempt lost its lease (the workflow keeps killing its worker):
+    # the next claim dead-letters the job instead of running it again
+    store = SQLiteJobStore(path)
+    await store.insert([_job("wf-1", max_attempts=2)])
+    now = datetime.now(timezone.utc)
+    for n in range(3):
+        at = now + timedelta(seconds=11 * n)
+        job = await store.claim(f"worker-{n}", at, at + timedelta(seconds=10))
+    assert job["attempts"] == 3
+
+    ran, failures = [], []
+
+    async def handler(job_id, payload):
+        ran.append(job_id)
+
+    queue = RCAJobQueue(handler, on_failure=lambda *args: failures.append(args))
+    queue._store = store
+    await queue._run(job, "worker-2")
+    stored = await store.get("wf-1")
+    assert not ran and stored["status"] == "dead", stored
+    assert "lease expired" in stored["last_error"]
+    assert len(failures) == 1 and failures[0][2] is False
+    store.close()
+
+
+async def _retry_backoff(path: str) -> None:
+    attempts, failures = [], []
+    failing = True
+    dead = asyncio.Event()
+
+    async def handler(job_id, payload):
+        attempts.append(time.monotonic())
+        if failing:
+            raise ValueError("llm exploded")
+
+    def on_failure(job_id, error, retrying):
+        failures.append(retrying)
+        if not retrying:
+            dead.set()
+
+    queue = RCAJobQueue(handler, workers=1, reserved_workers=0, max_attempts=3,
+                        retry_backoff_s=0.1, poll_interval_s=0.01, shed_severities=(),
+                        on_failure=on_failure)
+    await queue.start(SQLiteJobStore(path))
+    try:
+        await queue.enqueue("wf-1", {"anomaly_id": "a"}, "high", 0.9)
+        await asyncio.wait_for(dead.wait(), 5)
+        assert failures == [True, True, False], failures
+        gaps = [b - a for a, b in zip(attempts, attempts[1:])]
+        assert gaps[0] >= 0.095 and gaps[1] >= 0.195, gaps   # 0.1 s, then doubled
+        job = await queue.get("wf-1")
+        assert job["status"] == "dead" and job["attempts"] == 3
+        assert job["last_error"] == "ValueError: llm exploded"
+        assert queue.metrics()["retried"] == 2 and queue.metrics()["dead_lettered"] == 1
+
+        # Requeued with fresh attempts, it runs again
+        assert not await queue.requeue("missing")
+        failing = False
+        assert await queue.requeue("wf-1")
+        for _ in range(500):
+            job = await queue.get("wf-1")
+            if job["status"] == "completed":
+                break
+            await asyncio.sleep(0.01)
+        assert job["status"] == "completed" and job["attempts"] == 1, job
+    finally:
+        await queue.close()
+
+
+def test_admission():
+    async def handler(job_id, payload):
+        pass
+
+    queue = RCAJobQueue(handler, max_pending=3, shed_backlog=2)
+    assert queue.admit(["low", "high"]) == [True, True]
+    queue._pending = 2
+    assert queue.admit(["low", "critical"]) == [False, True]
+    assert queue.admit(["low"], allow_shed=False) == [True]
+    queue._pending = 3
+    try:
+        queue.admit(["critical"])
+    except RCAQueueFull:
+        pass
+    else:
+        raise AssertionError("admitted a job past max_pending")
+    assert queue.metrics()["rejected"] == 1
+    assert queue.metrics()["by_severity"]["low"]["shed"] == 1
+
+
+def _with_store(scenario) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(scenario(os.path.join(directory, "jobs.sqlite3")))
+
+
+def test_claim_order():
+    _with_store(_claim_order)
+
+
+def test_lease_reclaim():
+    _with_store(_lease_reclaim)
+
+
+def test_lease_exhausted():
+    _with_store(_lease_exhausted)
+
+
+def test_retry_backoff():
+    _with_store(_retry_backoff)
+
+
+if __name__ == "__main__":
+    try:
+        test_claim_order()
+        test_lease_reclaim()
+        test_lease_exhausted()
+        test_retry_backoff()
+        test_admission()
+        print("✅ RCA job queue claims, reclaims, retries and dead-letters as specified")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ RCA job queue misbehaves: {e}")
+        sys.exit(1)
@@ -0,0 +1,77 @@
+"""
+Reading Timestamp Test
+======================
+
+Checks how ingest stamps a reading: its own ISO timestamp is used when it
+lies within the accepted window around server time — naive timestamps are
+read as UTC, offsets are converted to UTC — while missing, unparseable and
+skewed timestamps (a gateway with a wrong clock) get the server time and are
+counted. Needs no model, database or server.
+
+    python test_reading_timestamp.py
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+
+import rca_api
+from rca_api import _reading_timestamp
+
+
+NOW = datetime(2026, 3, 1, 12, 0, 0, tzinfo=timezone.utc)
+
+
+def _counts() -> dict:
+    return dict(rca_api._reading_timestamp_counts)
+
+
+def test_own_timestamps():
+    assert _reading_timestamp("2026-03-01T11:59:30", NOW) == NOW - timedelta(seconds=30)
+    assert _reading_timestamp("2026-03-01T11:59:30+00:00", NOW) == NOW - timedelta(seconds=30)
+    stamped = _reading_timestamp("2026-03-01T13:59:30+02:00", NOW)
+    assert stamped == NOW - timedelta(seconds=30) and stamped.utcoffset() == timedelta(0)
+    stamped = _reading_timestamp("2026-03-01T06:30:00-05:30", NOW)
+    assert stamped == NOW and stamped.tzinfo is timezone.utc
+    # A backfilled upload from earlier today is kept
+    assert _reading_timestamp("2026-02-28T13:00:00Z", NOW) == NOW - timedelta(hours=23)
+
+
+def test_missing_and_invalid():
+    before = _counts()
+    assert _reading_timestamp(None, NOW) is NOW
+    assert _reading_timestamp("", NOW) is NOW
+    assert _reading_timestamp("yesterday", NOW) is NOW
+    after = _counts()
+    assert after["invalid"] == before["invalid"] + 1
+    assert after["out_of_window"] == before["out_of_window"]
+
+
+def test_skewed_clocks():
+    before = _counts()
+    skewed = [
+        "2023-03-01T12:00:00",             # years behind (naive)
+        "2026-02-27T11:00:00+00:00",       # just over a day behind
+        "2026-03-01T12:10:00Z",            # 10 minutes ahead
+        "2030-01-01T00:00:00+09:00",       # years ahead (offset)
+        "2026-03-01T23:00:00+10:00",       # 3 hours ahead once converted
+    ]
+    for value in skewed:
+        assert _reading_timestamp(value, NOW) is NOW, value
+    assert _counts()["out_of_window"] == before["out_of_window"] + len(skewed)
+    # The window edges are inclusive
+    edge_ahead = NOW + rca_api._READING_MAX_AHEAD
+    assert _reading_timestamp(edge_ahead.isoformat(), NOW) == edge_ahead
+    edge_behind = NOW - rca_api._READING_MAX_AGE
+    assert _reading_timestamp(edge_behind.isoformat(), NOW) == edge_behind
+
+
+if __name__ == "__main__":
+    try:
+        test_own_timestamps()
+        test_missing_and_invalid()
+        test_skewed_clocks()
+        print("✅ Reading timestamps are kept in the window and replaced outside it")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ Reading timestamps mishandled: {e}")
+        sys.exit(1)
@@ -0,0 +1,170 @@
+"""
+Write Spool Test
+================
+
+Checks the disk spool behind the write-behind buffer: batches come back in
+order with their types intact, a committed offset survives a restart so
+replay resumes where it stopped, a torn final line from a crash is dropped
+without losing the batches before it, the circuit breaker opens, cools
+down and closes, and with write-behind disabled concurrent puts write (or
+spool) one at a time. Works in a temporary directory; needs no database or
+server.
+
+    python test_write_spool.py
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from bson import ObjectId
+
+from write_behind import WriteBehindBuffer
+from write_spool import CircuitBreaker, WriteSpool
+
+
+def _batch(n: int, start: int = 0) -> list:
+    return [
+        {"_id": ObjectId(), "equipment_id": f"eq-{i:03d}",
+         "timestamp": datetime(2025, 1, 1, 0, 0, i % 60, 123000, tzinfo=timezone.utc),
+         "ensemble_score": i / 100.0, "anomaly_detected": i % 2 == 0}
+        for i in range(start, start + n)
+    ]
+
+
+def test_read_commit_resume():
+    with tempfile.TemporaryDirectory() as directory:
+        spool = WriteSpool(directory, fsync=False)
+        first, second, third = _batch(3), _batch(2, 3), _batch(4, 5)
+        spool.append([("alerts", first), ("sensor_readings", second), ("alerts", [])])
+        spool.append([("alerts", third)])
+        assert spool.pending()
+
+        path, end, records = spool.read(max_records=2)
+        assert [(c, d) for c, d, _ in records] == [("alerts", first), ("sensor_readings", second)]
+        assert records[0][1][0]["timestamp"].tzinfo is not None
+        spool.commit(path, records[0][2], replayed_docs=len(first))
+
+        # A restart resumes after the last committed batch
+        spool = WriteSpool(directory, fsync=False)
+        assert spool.pending()
+        path, end, records = spool.read(max_records=10)
+        assert [(c, d) for c, d, _ in records] == [("sensor_readings", second), ("alerts", third)]
+        assert end == os.path.getsize(path)
+        spool.commit(path, end, replayed_docs=6)
+        assert not os.path.exists(path) and not os.path.exists(path + ".pos")
+        assert spool.read(max_records=10) == (None, 0, [])
+        assert not spool.pending()
+
+
+def test_torn_line_is_dropped():
+    with tempfile.TemporaryDirectory() as directory:
+        spool = WriteSpool(directory, fsync=False)
+        batch = _batch(3)
+        spool.append([("alerts", batch)])
+        segment = spool._active
+        with open(segment, "a", encoding="utf-8") as f:
+            f.write('{"c": "alerts", "d": [{"equipment_id": "eq-9')   # crash mid-append
+
+        # Restart: the complete batch is replayed, the torn one discarded
+        spool = WriteSpool(directory, fsync=False)
+        path, end, records = spool.read(max_records=10)
+        assert path == segment
+        assert [(c, d) for c, d, _ in records] == [("alerts", batch)]
+        assert end == os.path.getsize(path)
+        spool.commit(path, end, replayed_docs=len(batch))
+        assert not spool.pending()
+
+        # The torn bytes went with the segment; new appends replay normally
+        later = _batch(2, 10)
+        spool.append([("alerts", later)])
+        path, end, records = spool.read(max_records=10)
+        assert [(c, d) for c, d, _ in records] == [("alerts", later)]
+        assert end == os.path.getsize(path)
+
+
+def test_read_seals_active_segment():
+    with tempfile.TemporaryDirectory() as directory:
+        spool = WriteSpool(directory, fsync=False)
+        spool.append([("alerts", _batch(1))])
+        path, _, _ = spool.read(max_records=10)
+        spool.append([("alerts", _batch(1, 1))])
+        assert len(spool._segments()) == 2, "appended to a segment being replayed"
+        assert spool.metrics()["appended_docs"] == 2
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout_s=0.05)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.state == "half_open" and breaker.allow()
+    breaker.record_failure()   # the probe failed: cool down again
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.metrics()["trips"] == 1
+
+
+class _Collection:
+    def __init__(self, db):
+        self.db = db
+
+    async def insert_many(self, docs, ordered=True):
+        self.db.active += 1
+        self.db.overlapped |= self.db.active > 1
+        await asyncio.sleep(0.001)
+        self.db.inserted.extend(docs)
+        self.db.active -= 1
+
+
+class _DB:
+    def __init__(self):
+        self.active = 0
+        self.overlapped = False
+        self.inserted = []
+
+    def __getitem__(self, name):
+        return _Collection(self)
+
+
+def test_synchronous_puts_take_turns():
+    db = _DB()
+    with tempfile.TemporaryDirectory() as directory:
+        buffer = WriteBehindBuffer(lambda: db, enabled=False, max_batch=2,
+                                   spool=WriteSpool(directory, fsync=False),
+                                   breaker=CircuitBreaker(failure_threshold=1, reset_timeout_s=60))
+
+        async def concurrent_puts():
+            await asyncio.gather(*(buffer.put({"alerts": _batch(3, 3 * i)}) for i in range(4)))
+        asyncio.run(concurrent_puts())
+        assert not db.overlapped, "synchronous puts wrote concurrently"
+        assert len(db.inserted) == 12 and buffer.metrics()["depth"] == 0
+
+        # Behind an open breaker they spool, one whole put after another
+        buffer.breaker.record_failure()
+        asyncio.run(concurrent_puts())
+        _, _, records = buffer.spool.read(max_records=100)
+        spooled = [doc["equipment_id"] for _, docs, _ in records for doc in docs]
+        assert spooled == [f"eq-{i:03d}" for i in range(12)], spooled
+        assert buffer.metrics()["spooled"] == 12 and buffer.metrics()["depth"] == 0
+
+
+if __name__ == "__main__":
+    try:
+        test_read_commit_resume()
+        test_torn_line_is_dropped()
+        test_read_seals_active_segment()
+        test_circuit_breaker()
+        test_synchronous_puts_take_turns()
+        print("✅ Write spool replays every acknowledged batch once, in order")
+        sys.exit(0)
+    except AssertionError as e:
+        print(f"❌ Write spool misbehaves: {e}")
+        sys.exit(1)
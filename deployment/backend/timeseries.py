@@ -0,0 +1,350 @@
+"""Bucketed sensor time series with materialised 1-minute and 1-hour rollups.
+
+Readings used to be one `sensor_readings` document each, so a week of history
+for one machine meant tens of thousands of documents and index entries. They
+are now stored in three tiers:
+
+  - raw  (`sensor_buckets`)     : one document per equipment per hour holding
+                                  the readings as an array; a bucket holds at
+                                  most `bucket_max_readings` (a soft cap — a
+                                  full hour spills into another document)
+  - 1m   (`sensor_rollups_1m`)  : per equipment and minute, count, anomalies and
+                                  min / max / sum of every rolled-up field
+  - 1h   (`sensor_rollups_1h`)  : the same per hour
+
+All three are written together, with one bulk_write per tier, from the
+write-behind buffer's flush (see write_behind.py). Retention is set by the TTL
+indexes in db.py: raw 24 h, 1-minute rollups 14 days, 1-hour rollups 400 days.
+
+Writes are idempotent per batch, because a batch whose write timed out or was
+cut off by an outage is spooled and replayed although it may already have been
+applied. Every update records the batch id (a hash of the batch's readings, so
+a replay from the spool gets the same id) in the document's `batches` array
+and only matches documents without it. Re-applying a batch therefore upserts
+a second document, which the unique indexes refuse with a duplicate key error:
+(equipment_id, ts) for rollups, `batches` itself for raw buckets. The buffer
+counts those as already written. Documents keep the last BATCH_IDS_KEPT ids.
+
+History queries pick the finest tier whose point count stays small for the
+requested span: raw up to `raw_max_hours`, 1-minute rollups up to
+`minute_max_hours`, 1-hour rollups beyond. Rollup points carry the mean of each
+field under the field's own name, so callers plotting raw readings can plot
+rollups unchanged. Exports stream the same points through `iter_history`.
+
+Configuration (environment):
+  - RCA_TS_BUCKET_MAX_READINGS : readings per raw bucket document (default 1000)
+  - RCA_TS_RAW_MAX_HOURS       : longest span served from raw readings (default 2)
+  - RCA_TS_MINUTE_MAX_HOURS    : longest span served from 1-minute rollups (default 48)
+"""
+
+import hashlib
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+TIERS = ("raw", "1m", "1h")
+
+DEFAULT_COLLECTIONS: Dict[str, str] = {
+    "raw": "sensor_buckets",
+    "1m":  "sensor_rollups_1m",
+    "1h":  "sensor_rollups_1h",
+}
+
+# Numeric fields aggregated into the rollups (missing fields are skipped, e.g.
+# MetroPT readings only contribute reconstruction_error and ensemble_score)
+ROLLUP_FIELDS = (
+    "air_temperature",
+    "process_temperature",
+    "rotational_speed",
+    "torque",
+    "tool_wear",
+    "reconstruction_error",
+    "ensemble_score",
+)
+
+# Cap on points returned by one history query (the old per-document limit)
+MAX_HISTORY_POINTS = 10_000
+
+# Batch ids remembered per document; a replayed batch is the first write to
+# its documents after the outage, so only the most recent few matter
+BATCH_IDS_KEPT = 64
+
+
+def _as_utc(ts: datetime) -> datetime:
+    # Motor returns naive UTC datetimes; ingest produces aware ones
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def batch_id(readings: List[Dict[str, Any]]) -> str:
+    """Id of a batch of reading documents, the same for the batch replayed from the spool.
+
+    The spool keeps timestamps to the millisecond (as MongoDB does), so the
+    hash uses millisecond timestamps.
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    for doc in readings:
+        ts = _as_utc(doc["timestamp"])
+        ms = ts.replace(microsecond=ts.microsecond // 1000 * 1000)
+        digest.update(f"{doc['equipment_id']}|{ms.isoformat()}|{doc.get('ensemble_score')!r}|"
+                      f"{doc.get('reconstruction_error')!r}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _period_start(ts: datetime, tier: str) -> datetime:
+    if tier == "1m":
+        return ts.replace(second=0, microsecond=0)
+    return ts.replace(minute=0, second=0, microsecond=0)   # raw buckets and 1h rollups
+
+
+class SensorTimeSeries:
+    """Builds the tiered writes for scored readings and serves history from them."""
+
+    def __init__(self, bucket_max_readings: int = 1000, raw_max_hours: float = 2.0,
+                 minute_max_hours: float = 48.0,
+                 collections: Optional[Dict[str, str]] = None):
+        self.bucket_max_readings = max(1, int(bucket_max_readings))
+        self.raw_max = timedelta(hours=float(raw_max_hours))
+        self.minute_max = timedelta(hours=float(minute_max_hours))
+        self.collections = {**DEFAULT_COLLECTIONS, **(collections or {})}
+        self._readings_written = 0
+        self._queries: Dict[str, int] = {tier: 0 for tier in TIERS}
+
+    @classmethod
+    def from_env(cls) -> "SensorTimeSeries":
+        return cls(
+            bucket_max_readings=int(os.getenv("RCA_TS_BUCKET_MAX_READINGS", "1000")),
+            raw_max_hours=float(os.getenv("RCA_TS_RAW_MAX_HOURS", "2")),
+            minute_max_hours=float(os.getenv("RCA_TS_MINUTE_MAX_HOURS", "48")),
+        )
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def write_ops(self, readings: List[Dict[str, Any]]) -> Dict[str, list]:
+        """pymongo UpdateOne upserts per tier for a batch of reading documents.
+
+        Each reading is a flat document with `equipment_id` and `timestamp`, as
+        built by ingest. Readings are grouped first, so one batch costs one
+        update per bucket and per rollup period rather than one per reading.
+        Every update is guarded by the batch id (see the module docstring).
+        """
+        from pymongo import UpdateOne
+
+        batch = batch_id(readings)
+
+        buckets: Dict[Tuple[str, datetime], List[Dict[str, Any]]] = defaultdict(list)
+        for doc in readings:
+            ts = doc["timestamp"]
+            point = {k: v for k, v in doc.items() if k != "equipment_id"}
+            buckets[(doc["equipment_id"], _period_start(ts, "raw"))].append(point)
+
+        ops = {"raw": []}
+        for (eq_id, start), points in buckets.items():
+            for i in range(0, len(points), self.bucket_max_readings):
+                chunk = points[i:i + self.bucket_max_readings]
+                # One id per update: a batch can fill several buckets of an hour
+                op_id = f"{batch}.{len(ops['raw'])}"
+                ops["raw"].append(UpdateOne(
+                    {"equipment_id": eq_id, "bucket_start": start,
+                     "count": {"$lt": self.bucket_max_readings},
+                     "batches": {"$ne": op_id}},
+                    {"$push": {"readings": {"$each": chunk},
+                               "batches": {"$each": [op_id], "$slice": -BATCH_IDS_KEPT}},
+                     "$inc": {"count": len(chunk)},
+                     "$min": {"first_ts": min(p["timestamp"] for p in chunk)},
+                     "$max": {"last_ts": max(p["timestamp"] for p in chunk)}},
+                    upsert=True,
+                ))
+
+        for tier in ("1m", "1h"):
+            ops[tier] = [
+                UpdateOne({"equipment_id": eq_id, "ts": start, "batches": {"$ne": batch}},
+                          {**update, "$push": {"batches": {"$each": [batch], "$slice": -BATCH_IDS_KEPT}}},
+                          upsert=True)
+                for (eq_id, start), update in self._rollup_updates(readings, tier).items()
+            ]
+        return ops
+
+    @staticmethod
+    def _rollup_updates(readings: List[Dict[str, Any]], tier: str) -> Dict[Tuple[str, datetime], Dict]:
+        groups: Dict[Tuple[str, datetime], Dict[str, Any]] = {}
+        for doc in readings:
+            key = (doc["equipment_id"], _period_start(doc["timestamp"], tier))
+            g = groups.get(key)
+            if g is None:
+                g = groups[key] = {"count": 0, "anomalies": 0, "stats": {}}
+            g["count"] += 1
+            g["anomalies"] += 1 if doc.get("anomaly_detected") else 0
+            for field in ROLLUP_FIELDS:
+                value = doc.get(field)
+                if value is None:
+                    continue
+                s = g["stats"].get(field)
+                if s is None:
+                    g["stats"][field] = [value, value, value, 1]   # min, max, sum, n
+                else:
+                    s[0] = min(s[0], value)
+                    s[1] = max(s[1], value)
+                    s[2] += value
+                    s[3] += 1
+
+        updates = {}
+        for key, g in groups.items():
+            inc = {"count": g["count"], "anomalies": g["anomalies"]}
+            mins, maxs = {}, {}
+            for field, (lo, hi, total, n) in g["stats"].items():
+                inc[f"stats.{field}.sum"] = total
+                inc[f"stats.{field}.n"] = n
+                mins[f"stats.{field}.min"] = lo
+                maxs[f"stats.{field}.max"] = hi
+            update = {"$inc": inc}
+            if mins:
+                update["$min"] = mins
+                update["$max"] = maxs
+            updates[key] = update
+        return updates
+
+    async def write(self, db, readings: List[Dict[str, Any]]) -> None:
+        """Write-buffer handler: apply one batch of readings to every tier.
+
+        Every tier is written even when an earlier one reports write errors
+        (a replayed batch reports duplicate keys for the tiers it already
+        reached); the errors of all tiers are raised together at the end.
+        """
+        from pymongo.errors import BulkWriteError
+
+        write_errors: List[Dict[str, Any]] = []
+        for tier, ops in self.write_ops(readings).items():
+            if ops:
+                try:
+                    await db[self.collections[tier]].bulk_write(ops, ordered=False)
+                except BulkWriteError as exc:
+                    write_errors.extend(exc.details.get("writeErrors", []))
+        if write_errors:
+            raise BulkWriteError({"writeErrors": write_errors, "writeConcernErrors": [],
+                                  "nInserted": 0, "nUpserted": 0, "nMatched": 0,
+                                  "nModified": 0, "nRemoved": 0, "upserted": []})
+        self._readings_written += len(readings)
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    def pick_tier(self, span: timedelta) -> str:
+        if span <= self.raw_max:
+            return "raw"
+        if span <= self.minute_max:
+            return "1m"
+        return "1h"
+
+    async def history(self, db, equipment_id: str, since: datetime,
+                      tier: str = "raw") -> List[Dict[str, Any]]:
+        """Points for one machine from `since` on, oldest first, from the given tier.
+
+        At most MAX_HISTORY_POINTS are returned; exports use `iter_history`.
+        """
+        points: List[Dict[str, Any]] = []
+        rows = self.iter_history(db, equipment_id, since, tier)
+        try:
+            async for point in rows:
+                points.append(point)
+                if len(points) >= MAX_HISTORY_POINTS:
+                    break
+        finally:
+            await rows.aclose()
+        return points
+
+    async def iter_history(self, db, equipment_id: str, since: datetime, tier: str = "raw",
+                           batch_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        """Like `history`, but yields points as the cursor delivers them, without a cap.
+
+        Raw buckets are read `batch_size` documents at a time; only the
+        readings of one hour are held at once (an hour can span several
+        bucket documents, so its readings are sorted before being yielded).
+        """
+        self._queries[tier] += 1
+        since = _as_utc(since)
+        if tier == "raw":
+            cursor = db[self.collections["raw"]].find(
+                {"equipment_id": equipment_id,
+                 "bucket_start": {"$gte": _period_start(since, "raw")}},
+                {"_id": 0, "bucket_start": 1, "readings": 1},
+            ).sort([("bucket_start", 1), ("first_ts", 1)]).batch_size(batch_size)
+            hour, points = None, []
+            async for doc in cursor:
+                if doc["bucket_start"] != hour:
+                    points.sort(key=lambda p: p["timestamp"])
+                    for point in points:
+                        yield point
+                    hour, points = doc["bucket_start"], []
+                points.extend(
+                    {"equipment_id": equipment_id, **r}
+                    for r in doc["readings"]
+                    if _as_utc(r["timestamp"]) >= since
+                )
+            points.sort(key=lambda p: p["timestamp"])
+            for point in points:
+                yield point
+            return
+
+        cursor = db[self.collections[tier]].find(
+            {"equipment_id": equipment_id, "ts": {"$gte": _period_start(since, tier)}},
+            {"_id": 0},
+        ).sort("ts", 1).batch_size(batch_size)
+        async for doc in cursor:
+            yield self._rollup_point(doc, tier)
+
+    async def latest(self, db, equipment_id: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """The `limit` most recent raw readings, newest first."""
+        coll = db[self.collections["raw"]]
+        if equipment_id:
+            cursor = coll.find({"equipment_id": equipment_id}).sort("bucket_start", -1)
+        else:
+            cursor = coll.find({}).sort("last_ts", -1)
+        # Every bucket holds at least one reading, so `limit` buckets suffice
+        docs = await cursor.to_list(length=limit)
+        points = [
+            {"equipment_id": doc["equipment_id"], **r}
+            for doc in docs for r in doc["readings"]
+        ]
+        points.sort(key=lambda p: p["timestamp"], reverse=True)
+        return points[:limit]
+
+    async def anomaly_minutes(self, db, since: datetime) -> List[Tuple[datetime, int]]:
+        """(minute, anomalous readings) for every minute since `since` that had any."""
+        pipeline = [
+            {"$match": {"ts": {"$gte": _period_start(_as_utc(since), "1m")}, "anomalies": {"$gt": 0}}},
+            {"$group": {"_id": "$ts", "n": {"$sum": "$anomalies"}}},
+        ]
+        result = await db[self.collections["1m"]].aggregate(pipeline).to_list(length=None)
+        return [(doc["_id"], int(doc["n"])) for doc in result]
+
+    @staticmethod
+    def _rollup_point(doc: Dict[str, Any], tier: str) -> Dict[str, Any]:
+        point = {
+            "equipment_id": doc["equipment_id"],
+            "timestamp": doc["ts"],
+            "resolution": tier,
+            "count": doc.get("count", 0),
+            "anomalies": doc.get("anomalies", 0),
+            "min": {},
+            "max": {},
+        }
+        for field, s in doc.get("stats", {}).items():
+            if s.get("n"):
+                point[field] = round(s["sum"] / s["n"], 6)
+                point["min"][field] = s["min"]
+                point["max"][field] = s["max"]
+        return point
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "collections":         dict(self.collections),
+            "bucket_max_readings": self.bucket_max_readings,
+            "raw_max_hours":       self.raw_max.total_seconds() / 3600.0,
+            "minute_max_hours":    self.minute_max.total_seconds() / 3600.0,
+            "readings_written":    self._readings_written,
+            "history_queries":     dict(self._queries),
+        }
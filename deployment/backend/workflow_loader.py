@@ -12,6 +12,7 @@ Agents:
 import os
 import sys
 import json
+import hashlib
 from pathlib import Path
 
 current_dir = Path(__file__).parent
@@ -26,6 +27,8 @@ try:
     from langchain_groq import ChatGroq
     from langgraph.graph import StateGraph, END
     from langgraph.checkpoint.memory import MemorySaver
+    from llm_cache import LLMResponseCache
+    from rule_signals import signals_for_names
 
     GROQ_API_KEY = os.getenv('GROQ_API_KEY', '')
 
@@ -65,6 +68,9 @@ try:
         temperature=0.3,
     )
 
+    # Agent responses keyed on canonical agent inputs (see llm_cache.py)
+    llm_cache = LLMResponseCache.from_env()
+
     # ------------------------------------------------------------------
     # Load KG artefacts
     # ------------------------------------------------------------------
@@ -89,6 +95,11 @@ try:
                 all_rules.extend(category_rules)
         GLOBAL_CONTEXT['swrl_rules'] = all_rules
 
+    # Part of every cache key, so editing the KG or switching model misses the cache
+    _CACHE_VERSION = hashlib.sha256(json.dumps(
+        [getattr(llm, 'model_name', ''), GLOBAL_CONTEXT], sort_keys=True, default=str,
+    ).encode('utf-8')).hexdigest()[:16]
+
     # ------------------------------------------------------------------
     # SWRL Rule Evaluator
     # ------------------------------------------------------------------
@@ -101,18 +112,20 @@ try:
         if not all_rules:
             return []
 
-        # Normalise feature names to lowercase for fuzzy matching
-        features: Dict[str, float] = {}
-        for f in anomaly_data.get('top_contributing_features', []):
-            features[f['feature_name'].lower()] = float(f.get('error', 0))
+        # Ingest sends the signals of the top feature columns; payloads with
+        # feature names only are matched by name (see rule_signals.py)
+        top_features = anomaly_data.get('top_contributing_features', [])
+        signals = anomaly_data.get('feature_signals')
+        if signals is None:
+            signals = signals_for_names(f['feature_name'] for f in top_features)
 
         recon_error = float(anomaly_data.get('reconstruction_error', 0))
         severity = anomaly_data.get('severity', 'medium')
-        has_tool    = any('tool' in k for k in features)
-        has_temp    = any('temp' in k for k in features)
-        has_torque  = any('torque' in k for k in features)
-        has_speed   = any('speed' in k or 'rpm' in k for k in features)
-        has_power   = any('power' in k for k in features)
+        has_tool    = 'tool' in signals
+        has_temp    = 'temp' in signals
+        has_torque  = 'torque' in signals
+        has_speed   = 'speed' in signals
+        has_power   = 'power' in signals
 
         matched = []
         for rule in all_rules:
@@ -137,7 +150,7 @@ try:
                     score = base_conf * 0.90
 
             elif 'cascade' in rule_name:
-                if len(features) >= 3 and recon_error > 0.35:
+                if len(top_features) >= 3 and recon_error > 0.35:
                     score = base_conf * 0.85
 
             if score > 0.30:
@@ -164,6 +177,20 @@ try:
                 content = content[4:]
         return json.loads(content.strip())
 
+    def _invoke_llm_json(agent: str, cache_inputs: Dict[str, Any], prompt: str) -> Dict:
+        """
+        Parsed JSON reply to `prompt`, served from llm_cache when an earlier call
+        had the same canonical inputs. Only replies that parse are cached.
+        """
+        key = llm_cache.key(agent, {**cache_inputs, 'version': _CACHE_VERSION})
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return _parse_llm_json(cached)
+        response = llm.invoke(prompt)
+        parsed = _parse_llm_json(response.content)
+        llm_cache.put(key, response.content)
+        return parsed
+
     # ------------------------------------------------------------------
     # Agent 1 — Diagnostic Agent
     # ------------------------------------------------------------------
@@ -202,9 +229,16 @@ Respond ONLY with valid JSON — no markdown, no explanation outside the JSON:
   "diagnostic_reasoning": "One sentence."
 }}"""
 
+        cache_inputs = {
+            'severity':   anomaly_data.get('severity', 'unknown'),
+            'error':      llm_cache.bucket(anomaly_data.get('reconstruction_error')),
+            'features':   sorted(f.get('feature_name', '')
+                                 for f in anomaly_data.get('top_contributing_features', [])),
+            'rules':      [r['rule_id'] for r in matched_rules],
+        }
+
         try:
-            response = llm.invoke(prompt)
-            parsed = _parse_llm_json(response.content)
+            parsed = _invoke_llm_json('diagnostic', cache_inputs, prompt)
             return {
                 **state,
                 'symptoms':              parsed.get('symptoms', []),
@@ -275,9 +309,15 @@ Respond ONLY with valid JSON:
   "reasoning_steps": "Brief summary of reasoning."
 }}"""
 
+        cache_inputs = {
+            'symptoms':   symptoms,
+            'severity':   anomaly_data.get('severity'),
+            'error':      llm_cache.bucket(anomaly_data.get('reconstruction_error')),
+            'rules':      [h.get('rule_id') for h in causal_hypotheses],
+        }
+
         try:
-            response = llm.invoke(prompt)
-            parsed = _parse_llm_json(response.content)
+            parsed = _invoke_llm_json('causal_reasoning', cache_inputs, prompt)
             return {
                 **state,
                 'root_cause':           parsed.get('root_cause', ''),
@@ -335,9 +375,14 @@ Respond ONLY with valid JSON:
   "planning_rationale": "One sentence."
 }}"""
 
+        cache_inputs = {
+            'root_cause':        root_cause,
+            'severity':          severity,
+            'affected_entities': sorted(map(str, affected_entities)),
+        }
+
         try:
-            response = llm.invoke(prompt)
-            parsed = _parse_llm_json(response.content)
+            parsed = _invoke_llm_json('planning', cache_inputs, prompt)
             return {
                 **state,
                 'recommended_actions': parsed.get('recommended_actions', []),
@@ -403,6 +448,17 @@ Respond ONLY with valid JSON:
         ]
         return {**state, 'learning_updates': learning_updates}
 
+    # ------------------------------------------------------------------
+    # KG-only fast path (see kg_fast_path.py) — no LLM calls
+    # ------------------------------------------------------------------
+    def run_kg_fast_path(state: AgentState, fast_path) -> Optional[AgentState]:
+        """Final state built from a strong SWRL match, or None to run the LLM agents."""
+        anomaly_data = state['anomaly_data']
+        fields = fast_path.build(anomaly_data, evaluate_swrl_rules(anomaly_data), GLOBAL_CONTEXT)
+        if fields is None:
+            return None
+        return finalize_agent({**state, **fields})
+
     # ------------------------------------------------------------------
     # Build the LangGraph StateGraph
     # ------------------------------------------------------------------
@@ -454,8 +510,12 @@ except Exception as e:
 
     app = _FallbackApp()
     llm = None
+    llm_cache = None
     GLOBAL_CONTEXT: Dict[str, Any] = {}
 
+    def run_kg_fast_path(state, fast_path):
+        return None   # no KG loaded; always run the (fallback) workflow
+
     def learning_agent(state):
         return {
             **state,
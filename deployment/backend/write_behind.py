@@ -0,0 +1,393 @@
+"""Write-behind buffer for the MongoDB documents produced by sensor ingest.
+
+Ingest used to await its MongoDB writes — readings, equipment health, alerts
+and RCA stubs — before answering, which tied ingest latency to the Atlas
+round trip. The WriteBehindBuffer accepts those documents in memory and
+returns at once; a background flusher writes them with one
+`insert_many(ordered=False)` per collection and batch, when `max_batch`
+documents are waiting or every `flush_interval_ms`, whichever comes first.
+
+Collections with a registered handler (e.g. documents that need an upsert
+rather than an insert) get their batch passed to the handler instead.
+Flushes run one at a time, so handlers never race each other; with
+write-behind disabled, the synchronous writes inside `put` take the same
+lock.
+
+The buffer holds at most `max_buffered` documents, counting those being
+written. When it is full, `put` waits for a flush to free space; after
+`max_wait_ms` it raises WriteBufferFull so the API can answer 503 instead of
+growing without bound.
+
+Each write is bounded by `write_timeout_ms`. Writes that fail because MongoDB
+is unreachable or timing out go to the disk spool when one is configured
+(see write_spool.py): a circuit breaker then stops flushes from trying
+MongoDB at all, later batches queue behind the spooled ones so order is
+kept, and each flush replays up to `replay_batches` spooled batches once the
+breaker lets writes through. Other failures (rejected documents) are logged
+and counted, not retried.
+
+Configuration (environment):
+  - RCA_WRITE_BEHIND_ENABLED : "0" writes synchronously inside `put` (default on)
+  - RCA_WRITE_FLUSH_MS       : max time a document waits before a flush (default 200)
+  - RCA_WRITE_MAX_BATCH      : documents per insert_many; reaching it flushes early (default 500)
+  - RCA_WRITE_MAX_BUFFERED   : documents held before `put` blocks (default 20000)
+  - RCA_WRITE_MAX_WAIT_MS    : how long a blocked `put` waits before failing (default 2000)
+  - RCA_WRITE_TIMEOUT_MS     : longest a single bulk write may take before it counts as failed (default 5000)
+  - RCA_WRITE_REPLAY_BATCHES : spooled batches replayed per flush (default 50)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from write_spool import CircuitBreaker, WriteSpool
+
+logger = logging.getLogger(__name__)
+
+# Number of recent flushes kept for percentile metrics
+_METRIC_SAMPLES = 1024
+
+FlushHandler = Callable[[Any, List[Dict[str, Any]]], Awaitable[None]]
+
+
+class WriteBufferFull(RuntimeError):
+    """Raised when the write buffer stays full; callers should retry later."""
+
+
+def _is_outage(exc: BaseException) -> bool:
+    """Whether a write failed because MongoDB was unreachable or slow (worth spooling)."""
+    from pymongo.errors import ConnectionFailure, PyMongoError
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionFailure)):
+        return True
+    return isinstance(exc, PyMongoError) and exc.timeout
+
+
+def _percentile(samples, q: float) -> float:
+    if not samples:
+        return 0.0
+    return round(float(np.percentile(np.fromiter(samples, dtype=np.float64), q)), 3)
+
+
+class WriteBehindBuffer:
+    """Buffers documents per collection and bulk-inserts them in the background.
+
+    `get_db()` returns the database handle at flush time. `handlers` maps a
+    collection name to `async handler(db, docs)` for batches that need more
+    than an insert. Without a `spool`, writes that fail are dropped.
+    """
+
+    def __init__(self, get_db: Callable[[], Any],
+                 handlers: Optional[Dict[str, FlushHandler]] = None,
+                 max_batch: int = 500, flush_interval_ms: float = 200.0,
+                 max_buffered: int = 20000, max_wait_ms: float = 2000.0,
+                 enabled: bool = True, write_timeout_ms: float = 5000.0,
+                 spool: Optional[WriteSpool] = None,
+                 breaker: Optional[CircuitBreaker] = None,
+                 replay_batches: int = 50):
+        self.get_db = get_db
+        self.handlers = dict(handlers or {})
+        self.max_batch = max(1, int(max_batch))
+        self.flush_interval = max(0.001, float(flush_interval_ms) / 1000.0)
+        self.max_buffered = max(1, int(max_buffered))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.enabled = enabled
+        self.write_timeout = max(0.001, float(write_timeout_ms) / 1000.0)
+        self.spool = spool
+        self.breaker = breaker or CircuitBreaker()
+        self.replay_batches = max(1, int(replay_batches))
+
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._depth = 0            # buffered + being written
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._early_flush: Optional[asyncio.Task] = None
+        self._space: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        self._flushes = 0
+        self._written = 0
+        self._failed = 0
+        self._stalls = 0
+        self._rejected = 0
+        self._spooled = 0
+        self._replayed = 0
+        self._flush_ms: Deque[float] = deque(maxlen=_METRIC_SAMPLES)
+        self._flush_docs: Deque[int] = deque(maxlen=_METRIC_SAMPLES)
+        self._max_depth = 0
+
+    @classmethod
+    def from_env(cls, get_db: Callable[[], Any],
+                 handlers: Optional[Dict[str, FlushHandler]] = None) -> "WriteBehindBuffer":
+        return cls(
+            get_db,
+            handlers,
+            max_batch=int(os.getenv("RCA_WRITE_MAX_BATCH", "500")),
+            flush_interval_ms=float(os.getenv("RCA_WRITE_FLUSH_MS", "200")),
+            max_buffered=int(os.getenv("RCA_WRITE_MAX_BUFFERED", "20000")),
+            max_wait_ms=float(os.getenv("RCA_WRITE_MAX_WAIT_MS", "2000")),
+            enabled=os.getenv("RCA_WRITE_BEHIND_ENABLED", "1") != "0",
+            write_timeout_ms=float(os.getenv("RCA_WRITE_TIMEOUT_MS", "5000")),
+            spool=WriteSpool.from_env(),
+            breaker=CircuitBreaker.from_env(),
+            replay_batches=int(os.getenv("RCA_WRITE_REPLAY_BATCHES", "50")),
+        )
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    async def put(self, docs_by_collection: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Buffer documents for several collections as one unit.
+
+        Either every document is accepted or, when the buffer stays full for
+        `max_wait_ms`, none is and WriteBufferFull is raised.
+        """
+        batches = {name: docs for name, docs in docs_by_collection.items() if docs}
+        n = sum(len(docs) for docs in batches.values())
+        if not n:
+            return
+        if not self.enabled:
+            # No flusher, but writes still go one at a time: the spool and the
+            # breaker are only touched under the flush lock
+            self._depth += n
+            async with self._sync_lock():
+                await self._write(batches)
+            return
+
+        await self.reserve(n)
+        for name, docs in batches.items():
+            self._pending.setdefault(name, []).extend(docs)
+        self._depth += n
+        self._max_depth = max(self._max_depth, self._depth)
+        if self._depth >= self.max_batch:
+            self._flush_soon()
+
+    async def reserve(self, n: int) -> None:
+        """Wait until `n` more documents fit, or raise WriteBufferFull after `max_wait_ms`.
+
+        The space is not held, but a `put` of at most `n` documents made before
+        the caller next awaits is admitted without waiting, so a caller can
+        make sure of the space before it changes any state of its own.
+        """
+        if not self.enabled or n <= 0:
+            return
+        self._ensure_worker()
+        # An oversized put is admitted into an empty buffer rather than never
+        if self._depth and self._depth + n > self.max_buffered:
+            self._stalls += 1
+            deadline = self._loop.time() + self.max_wait
+            while self._depth and self._depth + n > self.max_buffered:
+                self._space.clear()
+                self._flush_soon()
+                remaining = deadline - self._loop.time()
+                try:
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError
+                    await asyncio.wait_for(self._space.wait(), remaining)
+                except asyncio.TimeoutError:
+                    self._rejected += n
+                    raise WriteBufferFull(
+                        f"Write buffer full ({self._depth}/{self.max_buffered} documents) "
+                        f"— retry shortly"
+                    ) from None
+
+    def start(self) -> None:
+        """Start the flusher now, e.g. at startup to replay a spool left by a previous run."""
+        if self.enabled:
+            self._ensure_worker()
+
+    async def flush(self) -> None:
+        """Write everything buffered so far, waiting for any flush in progress."""
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            while self._pending:
+                pending, self._pending = self._pending, {}
+                await self._write(pending)
+            if self.spool is not None and self.spool.pending():
+                await self._replay()
+
+    async def close(self) -> None:
+        """Write whatever is still buffered, then stop the flusher."""
+        same_loop = self._loop is asyncio.get_running_loop()
+        if same_loop:
+            await self.flush()
+        for task in (self._worker, self._early_flush):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        if self._pending:
+            if not same_loop:
+                self._flush_lock = asyncio.Lock()
+            await self.flush()
+        self._worker = None
+        self._early_flush = None
+        self._loop = None
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled":           self.enabled,
+            "write_timeout_ms":  round(self.write_timeout * 1000.0, 3),
+            "flush_interval_ms": round(self.flush_interval * 1000.0, 3),
+            "max_batch":         self.max_batch,
+            "max_buffered":      self.max_buffered,
+            "depth":             self._depth,
+            "depth_max":         self._max_depth,
+            "pending_by_collection": {name: len(docs) for name, docs in self._pending.items()},
+            "flushes":           self._flushes,
+            "written":           self._written,
+            "failed":            self._failed,
+            "stalls":            self._stalls,
+            "rejected":          self._rejected,
+            "spooled":           self._spooled,
+            "replayed":          self._replayed,
+            "breaker":           self.breaker.metrics(),
+            "spool":             self.spool.metrics() if self.spool is not None else None,
+            "flush_docs_p50":    _percentile(self._flush_docs, 50),
+            "flush_docs_max":    max(self._flush_docs, default=0),
+            "flush_ms_p50":      _percentile(self._flush_ms, 50),
+            "flush_ms_p99":      _percentile(self._flush_ms, 99),
+        }
+
+    # ------------------------------------------------------------------
+    # Flusher
+    # ------------------------------------------------------------------
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._worker is not None and self._loop is loop and not self._worker.done():
+            return
+        # First use, or the previous loop went away (e.g. test clients)
+        self._loop = loop
+        self._space = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._early_flush = None
+        self._worker = loop.create_task(self._run())
+
+    def _sync_lock(self) -> asyncio.Lock:
+        # The flush lock of the synchronous path, made for the running loop
+        loop = asyncio.get_running_loop()
+        if self._flush_lock is None or self._loop is not loop:
+            self._loop = loop
+            self._flush_lock = asyncio.Lock()
+        return self._flush_lock
+
+    def _flush_soon(self) -> None:
+        # A full batch (or a blocked put) does not wait for the next tick
+        if self._early_flush is None or self._early_flush.done():
+            self._early_flush = self._loop.create_task(self._safe_flush())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._safe_flush()
+
+    async def _safe_flush(self) -> None:
+        try:
+            await self.flush()
+        except Exception as exc:   # never let the flusher die
+            logger.warning("Write-behind flush failed: %s", exc)
+
+    async def _write(self, batches: Dict[str, List[Dict[str, Any]]]) -> None:
+        started = time.perf_counter()
+        chunks: List[Tuple[str, List[Dict[str, Any]]]] = [
+            (name, docs[start:start + self.max_batch])
+            for name, docs in batches.items()
+            for start in range(0, len(docs), self.max_batch)
+        ]
+        for i, (name, chunk) in enumerate(chunks):
+            # Behind a spool backlog, or with the breaker open, go straight to disk
+            if self.spool is not None and (self.spool.pending() or not self.breaker.allow()):
+                await self._spool(chunks[i:])
+                break
+            try:
+                await self._write_chunk(name, chunk)
+            except Exception as exc:
+                if self.spool is not None and _is_outage(exc):
+                    logger.warning("Write-behind %s: MongoDB unavailable, spooling to disk: %s",
+                                   name, exc)
+                    await self._spool(chunks[i:])
+                    break
+                self._failed += len(chunk)
+                logger.warning("Write-behind %s: %d documents failed: %s", name, len(chunk), exc)
+            self._release(len(chunk))
+        self._flushes += 1
+        self._flush_docs.append(sum(len(chunk) for _, chunk in chunks))
+        self._flush_ms.append((time.perf_counter() - started) * 1000.0)
+
+    async def _write_chunk(self, name: str, chunk: List[Dict[str, Any]]) -> None:
+        """One bulk write. Raises when nothing could be written; per-document errors are counted."""
+        try:
+            db = self.get_db()
+            handler = self.handlers.get(name)
+            if handler is not None:
+                op = handler(db, chunk)
+            else:
+                op = db[name].insert_many(chunk, ordered=False)
+            await asyncio.wait_for(op, self.write_timeout)
+        except Exception as exc:
+            # BulkWriteError: the rest of an unordered batch was still written
+            details = getattr(exc, "details", None) or {}
+            if "writeErrors" not in details:
+                if _is_outage(exc):
+                    self.breaker.record_failure()
+                raise
+            # A duplicate key means a replayed insert or handler batch had already been written
+            errors = sum(1 for e in details["writeErrors"] if e.get("code") != 11000)
+            self._written += len(chunk) - errors
+            self._failed += errors
+            if errors:
+                logger.warning("Write-behind %s: %d of %d documents failed: %s",
+                               name, errors, len(chunk), exc)
+        else:
+            self._written += len(chunk)
+        self.breaker.record_success()
+
+    async def _spool(self, chunks: List[Tuple[str, List[Dict[str, Any]]]]) -> None:
+        n = sum(len(chunk) for _, chunk in chunks)
+        try:
+            await asyncio.to_thread(self.spool.append, chunks)
+            self._spooled += n
+        except Exception as exc:   # disk full, permissions, ...
+            self._failed += n
+            logger.warning("Write-behind spool append of %d documents failed: %s", n, exc)
+        self._release(n)
+
+    async def _replay(self) -> None:
+        """Write up to `replay_batches` spooled batches, oldest first, while the breaker allows."""
+        budget = self.replay_batches
+        while budget > 0 and self.spool.pending() and self.breaker.allow():
+            path, end, records = await asyncio.to_thread(self.spool.read, budget)
+            if path is None:
+                return
+            for name, docs, offset in records:
+                try:
+                    await self._write_chunk(name, docs)
+                except Exception as exc:
+                    if _is_outage(exc):
+                        logger.warning("Write-behind spool replay paused: %s", exc)
+                        return
+                    # Not going to succeed on a retry either; skip it
+                    self._failed += len(docs)
+                    logger.warning("Write-behind spool replay of %d %s documents failed: %s",
+                                   len(docs), name, exc)
+                else:
+                    self._replayed += len(docs)
+                await asyncio.to_thread(self.spool.commit, path, offset, len(docs))
+                budget -= 1
+            if not records:
+                # Nothing (readable) left in the oldest segment
+                await asyncio.to_thread(self.spool.commit, path, end)
+
+    def _release(self, n: int) -> None:
+        self._depth -= n
+        if self._space is not None:
+            self._space.set()
@@ -0,0 +1,250 @@
+"""Local disk spool and circuit breaker for write-behind flushes.
+
+When Atlas is degraded every flush used to wait out the driver's timeouts and
+then drop its batch. With a spool configured, the WriteBehindBuffer (see
+write_behind.py) writes such batches to disk instead:
+
+  - CircuitBreaker counts consecutive failed writes. After `failure_threshold`
+    it opens, and flushes stop trying MongoDB and go straight to the spool;
+    after `reset_timeout_s` one probe write is let through (half-open) and
+    either closes the breaker or re-opens it.
+  - WriteSpool is an append-only log of write batches split into segment files
+    (`spool-<seq>.jsonl`, one JSON line per collection batch, in MongoDB
+    Extended JSON so dates and ObjectIds survive). Lines are fsynced before
+    the batch counts as accepted, so a crash loses nothing that was spooled.
+  - Replay reads the oldest segment from a saved byte offset (`.pos` file),
+    hands each batch back to the buffer to write, and advances the offset only
+    after the write succeeded; a fully replayed segment is deleted. Replay
+    therefore resumes in order after a restart. A batch can reach the spool
+    or be replayed after it was in fact written (a write that timed out, or a
+    crash before the offset was saved), so every write must be safe to
+    repeat: inserts keep their `_id` in the spool, so a repeated insert is a
+    duplicate-key error the buffer treats as written, and handler batches
+    (sensor buckets and rollups) record a batch id on each document they
+    update and fail the same way when repeated (see timeseries.py).
+
+Configuration (environment):
+  - RCA_SPOOL_ENABLED      : "0" disables the spool; failed writes are dropped (default on)
+  - RCA_SPOOL_DIR          : directory for spool segments (default backend/write_spool)
+  - RCA_SPOOL_SEGMENT_MB   : size at which a new segment is started (default 64)
+  - RCA_SPOOL_FSYNC        : "0" skips fsync after each append (default on)
+  - RCA_BREAKER_FAILURES   : consecutive failed writes that open the breaker (default 3)
+  - RCA_BREAKER_RESET_S    : seconds the breaker stays open before a probe (default 10)
+"""
+
+import glob
+import logging
+import os
+import re
+import time
+from datetime import timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import json_util
+from bson.json_util import JSONMode, JSONOptions
+
+logger = logging.getLogger(__name__)
+
+_JSON_OPTIONS = JSONOptions(json_mode=JSONMode.RELAXED, tz_aware=True, tzinfo=timezone.utc)
+
+_SEGMENT_RE = re.compile(r"spool-(\d{12})\.jsonl$")
+
+DEFAULT_SPOOL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "write_spool")
+
+SpoolRecord = Tuple[str, List[Dict[str, Any]]]   # (collection, documents)
+
+
+class CircuitBreaker:
+    """Closed → open after `failure_threshold` consecutive failures → half-open after `reset_timeout_s`."""
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout_s: float = 10.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = max(0.0, float(reset_timeout_s))
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trips = 0
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        return cls(
+            failure_threshold=int(os.getenv("RCA_BREAKER_FAILURES", "3")),
+            reset_timeout_s=float(os.getenv("RCA_BREAKER_RESET_S", "10")),
+        )
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a write may be attempted now (always, unless open and cooling down)."""
+        return self.state != "open"
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self.failure_threshold:
+            if self._opened_at is None:
+                self._trips += 1
+            # A failed probe restarts the cool-down
+            self._opened_at = time.monotonic()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "state":                self.state,
+            "consecutive_failures": self._failures,
+            "trips":                self._trips,
+        }
+
+
+class WriteSpool:
+    """Append-only, segmented on-disk log of (collection, documents) batches.
+
+    Not thread-safe; the write-behind buffer only touches it under its flush lock.
+    """
+
+    def __init__(self, directory: str = DEFAULT_SPOOL_DIR,
+                 segment_max_bytes: int = 64 * 1024 * 1024, fsync: bool = True):
+        self.directory = directory
+        self.segment_max_bytes = max(1, int(segment_max_bytes))
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self._active: Optional[str] = None     # segment currently appended to
+        self._backlog = bool(self._segments())  # left over from a previous run, or spooled since
+        self._appended_docs = 0
+        self._replayed_docs = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["WriteSpool"]:
+        if os.getenv("RCA_SPOOL_ENABLED", "1") == "0":
+            return None
+        return cls(
+            directory=os.getenv("RCA_SPOOL_DIR", DEFAULT_SPOOL_DIR),
+            segment_max_bytes=int(float(os.getenv("RCA_SPOOL_SEGMENT_MB", "64")) * 1024 * 1024),
+            fsync=os.getenv("RCA_SPOOL_FSYNC", "1") != "0",
+        )
+
+    # ------------------------------------------------------------------
+    # Appending
+    # ------------------------------------------------------------------
+
+    def append(self, records: List[SpoolRecord]) -> None:
+        """Durably append batches, in order, to the newest segment."""
+        lines = "".join(
+            json_util.dumps({"c": name, "d": docs}, json_options=_JSON_OPTIONS) + "\n"
+            for name, docs in records if docs
+        )
+        if not lines:
+            return
+        path = self._active
+        if path is None or not os.path.exists(path) or os.path.getsize(path) >= self.segment_max_bytes:
+            path = self._active = self._segment_path(self._last_seq() + 1)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        self._appended_docs += sum(len(docs) for _, docs in records)
+        self._backlog = True
+
+    # ------------------------------------------------------------------
+    # Replaying
+    # ------------------------------------------------------------------
+
+    def pending(self) -> bool:
+        """Whether any spooled batch is waiting to be replayed."""
+        return self._backlog
+
+    def read(self, max_records: int) -> Tuple[Optional[str], int, List[Tuple[str, List[Dict[str, Any]], int]]]:
+        """Up to `max_records` batches from the oldest segment.
+
+        Returns (segment, offset after the last line read, [(collection,
+        documents, offset after that batch)]); pass a batch's offset to
+        `commit` once it is written. Seals the segment first if it is the
+        one being appended to, so replay never reads a file that is still
+        growing.
+        """
+        segments = self._segments()
+        if not segments:
+            self._backlog = False
+            return None, 0, []
+        path = segments[0]
+        if path == self._active:
+            self._active = None
+        offset = self._position(path)
+        records: List[Tuple[str, List[Dict[str, Any]], int]] = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            while len(records) < max_records:
+                line = f.readline()
+                if not line:
+                    break
+                offset += len(line)
+                if not line.endswith(b"\n"):
+                    # Torn final write from a crash: it was never acknowledged,
+                    # and the sealed segment will not grow past it
+                    logger.warning("Discarding incomplete spool line at the end of %s", path)
+                    break
+                try:
+                    data = json_util.loads(line.decode("utf-8"), json_options=_JSON_OPTIONS)
+                    records.append((data["c"], data["d"], offset))
+                except (ValueError, KeyError) as exc:
+                    logger.warning("Skipping unreadable spool line in %s: %s", path, exc)
+        return path, offset, records
+
+    def commit(self, path: str, offset: int, replayed_docs: int = 0) -> None:
+        """Mark everything before `offset` in `path` as written; deletes a finished segment."""
+        self._replayed_docs += replayed_docs
+        if offset >= os.path.getsize(path) and path != self._active:
+            os.remove(path)
+            if os.path.exists(path + ".pos"):
+                os.remove(path + ".pos")
+            self._backlog = bool(self._segments())
+            return
+        tmp = path + ".pos.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(str(offset))
+        os.replace(tmp, path + ".pos")
+
+    def metrics(self) -> Dict[str, Any]:
+        segments = self._segments()
+        size = sum(os.path.getsize(p) for p in segments)
+        replayed = sum(self._position(p) for p in segments)
+        return {
+            "directory":      self.directory,
+            "segments":       len(segments),
+            "pending_bytes":  size - replayed,
+            "appended_docs":  self._appended_docs,
+            "replayed_docs":  self._replayed_docs,
+        }
+
+    # ------------------------------------------------------------------
+    # Segment files
+    # ------------------------------------------------------------------
+
+    def _segments(self) -> List[str]:
+        return sorted(
+            p for p in glob.glob(os.path.join(self.directory, "spool-*.jsonl"))
+            if _SEGMENT_RE.search(p)
+        )
+
+    def _last_seq(self) -> int:
+        segments = self._segments()
+        return int(_SEGMENT_RE.search(segments[-1]).group(1)) if segments else 0
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.directory, f"spool-{seq:012d}.jsonl")
+
+    @staticmethod
+    def _position(path: str) -> int:
+        try:
+            with open(path + ".pos", "r", encoding="utf-8") as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
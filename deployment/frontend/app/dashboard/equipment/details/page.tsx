@@ -133,7 +133,7 @@ function EquipmentDetail() {
         const [eqRes, sensorRes, histRes, alertRes, taskRes] = await Promise.all([
           fetch(`${API}/api/equipment/${equipmentId}`),
           fetch(`${API}/api/sensors/latest?equipment_id=${equipmentId}&limit=1`),
-          fetch(`${API}/api/sensors/history?equipment_id=${equipmentId}&hours=24`),
+          fetch(`${API}/api/sensors/history?equipment_id=${equipmentId}&hours=24&max_points=800`),
           fetch(`${API}/api/alerts?equipment_id=${equipmentId}&limit=3`),
           fetch(`${API}/api/maintenance/tasks?equipment_id=${equipmentId}&status=done`),
         ])
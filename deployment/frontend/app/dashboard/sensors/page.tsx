@@ -59,7 +59,7 @@ export default function SensorsPage() {
 
   // Fetch all registered equipment on mount so selector is always fully populated
   useEffect(() => {
-    fetch(`${API}/api/equipment`)
+    fetch(`${API}/api/equipment?fields=equipment_id&limit=1000`)
       .then((r) => r.ok ? r.json() : [])
       .then((data: Array<{ equipment_id: string }>) => {
         const ids = data.map((e) => e.equipment_id).sort()
@@ -74,7 +74,7 @@ export default function SensorsPage() {
       // Fetch last reading per equipment (limit=100 ensures all machines covered)
       const latRes  = await fetch(`${API}/api/sensors/latest?limit=100`)
       // Fetch 24h history for the selected equipment for the trend chart
-      const histRes = await fetch(`${API}/api/sensors/history?equipment_id=${histEqId}&hours=24`)
+      const histRes = await fetch(`${API}/api/sensors/history?equipment_id=${histEqId}&hours=24&max_points=800`)
       if (latRes.ok)  setLatest(await latRes.json())
       if (histRes.ok) setHistory(await histRes.json())
     } finally {